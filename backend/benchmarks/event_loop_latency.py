@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of unrelated endpoints while question generations are running
+
+Requirements:
+1. Run the server with the fake LLM so generations take a known time:
+   LLM_BACKEND=fake FAKE_LLM_LATENCY_SECONDS=3 python game_api.py
+2. Run this script: python benchmarks/event_loop_latency.py
+
+The script probes GET / at a fixed rate, first on an idle server and then while
+`--generations` create-session calls are in flight (`--duplicates` of them for the
+same theme, to exercise coalescing). If generation blocks the event loop, the
+p99 of the probes jumps to the generation time; when it does not, it stays flat.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label, latencies):
+    ms = [latency * 1000 for latency in latencies]
+    print(f"   {label:<18} n={len(ms):<5} p50={percentile(ms, 50):7.2f}ms "
+          f"p95={percentile(ms, 95):7.2f}ms p99={percentile(ms, 99):7.2f}ms "
+          f"max={max(ms, default=0):7.2f}ms mean={statistics.fmean(ms) if ms else 0:7.2f}ms")
+
+
+async def probe(client, duration, interval):
+    """Hit the health endpoint every `interval` seconds for `duration` seconds"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def create_session(client, theme):
+    start = time.perf_counter()
+    response = await client.post("/create-session", json={"theme": theme}, timeout=120)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--generations", type=int, default=20, help="Distinct themes generated concurrently")
+    parser.add_argument("--duplicates", type=int, default=50, help="Concurrent creates for one shared theme")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to probe in each phase")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between probes")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.generations + args.duplicates + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        print("🧪 Event loop latency benchmark\n")
+
+        print("1️⃣  Idle server")
+        idle = await probe(client, args.duration, args.interval)
+        summarize("GET / (idle)", idle)
+
+        print("\n2️⃣  While generations are running")
+        run_id = uuid.uuid4().hex[:6]
+        shared_theme = f"tennis {run_id}"
+        creates = [create_session(client, f"theme {run_id} {i}") for i in range(args.generations)]
+        creates += [create_session(client, shared_theme) for _ in range(args.duplicates)]
+        create_tasks = [asyncio.ensure_future(c) for c in creates]
+
+        loaded = await probe(client, args.duration, args.interval)
+        create_latencies = await asyncio.gather(*create_tasks)
+        summarize("GET / (loaded)", loaded)
+        summarize("POST create", create_latencies)
+
+        stats = (await client.get("/question-bank/stats")).json()
+        generation = stats.get("generation", {})
+        print(f"\n   Upstream generations: {generation.get('calls')} "
+              f"(coalesced: {generation.get('coalesced')}) for "
+              f"{args.generations + args.duplicates} creates")
+
+        ratio = percentile(loaded, 99) / max(percentile(idle, 99), 1e-9)
+        print(f"\n📊 p99 loaded/idle ratio: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
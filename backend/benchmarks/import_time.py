@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: module import time of the game API and the MCP server
+
+Cold starts pay for importing the service before the first request is served. For
+each service, the script imports its entry module in fresh interpreters and reports
+the median wall time, then lists the slowest imports according to `-X importtime`:
+    python benchmarks/import_time.py --runs 5 --top 15
+
+Nothing is initialized beyond what the import itself does: no network access and no
+credentials are needed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "backend": (BACKEND_DIR, "game_api"),
+    "mcpserver": (os.path.join(os.path.dirname(BACKEND_DIR), "mcpserver"), "main"),
+}
+
+TIMED_IMPORT = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def environment():
+    # Keep optional backends from reaching out while the module is imported
+    return dict(os.environ, LLM_BACKEND="fake", STORAGE_BACKEND="memory", PYTHONDONTWRITEBYTECODE="1")
+
+
+def wall_time(directory, module):
+    result = subprocess.run(
+        [sys.executable, "-c", TIMED_IMPORT.format(module=module)],
+        cwd=directory, env=environment(), capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(directory, module, top):
+    """The modules imported directly by `module`, by cumulative import time, from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory, env=environment(), capture_output=True, text=True, check=True,
+    )
+    # Lines come in post-order, nesting shown by two more spaces per level
+    children, direct = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((name.strip(), int(cumulative)))
+        elif depth == 0:
+            if name.strip() == module:
+                direct = children
+            children = []
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=[*SERVICES, "all"], default="all")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Also save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for service, (directory, module) in SERVICES.items():
+        if args.service not in ("all", service):
+            continue
+        try:
+            times = [wall_time(directory, module) for _ in range(args.runs)]
+            slowest = slowest_imports(directory, module, args.top)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Importing {service} failed:\n{e.stderr}")
+            continue
+        results[service] = {
+            "median_seconds": round(statistics.median(times), 4),
+            "min_seconds": round(min(times), 4),
+            "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        }
+        print(f"📦 {service} ({module}.py): median {statistics.median(times) * 1000:.0f} ms, "
+              f"min {min(times) * 1000:.0f} ms over {args.runs} runs")
+        for name, us in slowest:
+            print(f"   {us / 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
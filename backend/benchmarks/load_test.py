@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Load test: many concurrent players going through the whole game lifecycle
+
+By default the script starts its own server on `--port` with the fake LLM and the
+in-memory storage, so the numbers do not depend on Mistral or Firestore:
+    python benchmarks/load_test.py --sessions 50 --players 40
+
+Each session has a host that creates it, waits for its questions, and reads and
+advances every question, and `--players` players that join, fetch each question,
+answer it after a random think time and read the scores. All sessions run
+concurrently. Pass `--url` to load an already running server instead.
+
+The script reports throughput and p50/p95/p99 latency per endpoint and saves them to
+`--output` (a JSON file under benchmarks/results/ by default). With `--baseline`
+pointing to an earlier results file, it prints the change per endpoint and exits
+with status 1 when a p99 grew by more than `--tolerance`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """Latencies and errors per endpoint, keyed by method and path template"""
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response.json()
+
+    def summary(self, duration):
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            ms = [latency * 1000 for latency in self.latencies[endpoint]]
+            endpoints[endpoint] = {
+                "requests": len(ms),
+                "errors": self.errors[endpoint],
+                "rps": round(len(ms) / duration, 1),
+                "p50_ms": round(percentile(ms, 50), 2),
+                "p95_ms": round(percentile(ms, 95), 2),
+                "p99_ms": round(percentile(ms, 99), 2),
+                "max_ms": round(max(ms, default=0), 2),
+                "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+            }
+        return endpoints
+
+
+async def play_session(recorder, index, args):
+    created = await recorder.request("POST /create-session", "POST", "/create-session",
+                                     json={"theme": f"load test theme {index % args.themes}"})
+    if created is None:
+        return
+    session_id = created["session_id"]
+    while created is not None and created.get("status") == "pending":
+        await asyncio.sleep(0.2)
+        created = await recorder.request("GET /session-status/{id}", "GET", f"/session-status/{session_id}")
+
+    async def join(player):
+        joined = await recorder.request("POST /add-user-to-session", "POST", "/add-user-to-session",
+                                        json={"name": f"player{player}", "session_id": session_id})
+        return joined["user_id"] if joined is not None else None
+
+    user_ids = [user_id for user_id in await asyncio.gather(*(join(p) for p in range(args.players))) if user_id]
+
+    async def answer(user_id):
+        question = await recorder.request("GET /next-question/{id}", "GET", f"/next-question/{session_id}")
+        if question is None or question.get("finished"):
+            return
+        await asyncio.sleep(random.uniform(0, args.think_time))
+        await recorder.request("POST /answer", "POST", "/answer", json={
+            "session_id": session_id, "user_id": user_id, "answer": random.randrange(len(question["options"]) or 4),
+        })
+        await recorder.request("GET /scores/{id}", "GET", f"/scores/{session_id}")
+
+    for _ in range(args.questions):
+        question = await recorder.request("GET /next-question/{id}", "GET", f"/next-question/{session_id}")
+        if question is None or question.get("finished"):
+            break
+        await asyncio.gather(*(answer(user_id) for user_id in user_ids))
+        await recorder.request("GET /scores/{id}", "GET", f"/scores/{session_id}")
+        await recorder.request("POST /advance-question/{id}", "POST", f"/advance-question/{session_id}")
+
+
+def start_server(port):
+    env = dict(
+        os.environ,
+        LLM_BACKEND="fake",
+        STORAGE_BACKEND="memory",
+        PREGENERATE_THEMES="",
+        QUESTION_CORPUS_PATH="",
+        # Players answer within the think time; deadlines would only add noise
+        QUESTION_TIME_LIMIT_SECONDS="0",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "game_api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_until_up(client):
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Server did not start")
+        await asyncio.sleep(0.2)
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of each endpoint against a baseline; True when a p99 regressed"""
+    regressed = False
+    print(f"\n📐 Compared with {baseline['started_at']} (tolerance {tolerance:.0%} on p99)")
+    for endpoint, current in results["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None or not before["p99_ms"]:
+            print(f"   {endpoint:<30} new endpoint")
+            continue
+        change = current["p99_ms"] / before["p99_ms"] - 1
+        worse = change > tolerance
+        regressed |= worse
+        print(f"   {endpoint:<30} p99 {before['p99_ms']:8.2f} -> {current['p99_ms']:8.2f}ms "
+              f"({change:+.0%}){'  ❌' if worse else ''}")
+    change = results["throughput_rps"] / baseline["throughput_rps"] - 1 if baseline["throughput_rps"] else 0
+    print(f"   {'throughput':<30} {baseline['throughput_rps']:8.1f} -> {results['throughput_rps']:8.1f} rps ({change:+.0%})")
+    return regressed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Load this server instead of starting one")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--players", type=int, default=40, help="Players per session")
+    parser.add_argument("--questions", type=int, default=10, help="Questions played per session at most")
+    parser.add_argument("--themes", type=int, default=10, help="Distinct themes across sessions")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Longest delay before a player answers")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_server(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    started_at = datetime.now(timezone.utc)
+    try:
+        limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+        async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+            await wait_until_up(client)
+            print(f"🚀 {args.sessions} sessions x {args.players} players against {url}")
+            recorder = Recorder(client)
+            start = time.perf_counter()
+            await asyncio.gather(*(play_session(recorder, i, args) for i in range(args.sessions)))
+            duration = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    endpoints = recorder.summary(duration)
+    total = sum(stats["requests"] for stats in endpoints.values())
+    results = {
+        "started_at": started_at.isoformat(),
+        "url": url,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "duration_seconds": round(duration, 2),
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "throughput_rps": round(total / duration, 1),
+        "endpoints": endpoints,
+    }
+
+    print(f"   {total} requests in {duration:.1f}s: {results['throughput_rps']} rps, {results['errors']} errors")
+    for endpoint, stats in endpoints.items():
+        print(f"   {endpoint:<30} n={stats['requests']:<6} err={stats['errors']:<4} "
+              f"p50={stats['p50_ms']:7.2f}ms p95={stats['p95_ms']:7.2f}ms p99={stats['p99_ms']:7.2f}ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Check: sessions stay consistent across several routed workers and a scale-out
+
+Starts `--workers` local game API processes sharing one SQLite file, with the fake
+LLM, all listed in ROUTING_NODES:
+    python benchmarks/multi_worker.py --workers 3 --sessions 20 --players 5
+
+Every request goes to a random live worker, so most are forwarded to the session's
+owner. After the first question a worker is added while the quizzes go on: it
+starts with the larger node list, then the other workers are restarted one at a
+time with that list, the rest serving meanwhile. Part of the sessions move to new
+owners on the way. The script exits with status 1 if any worker reports a score
+different from the points it awarded.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRAIN_SECONDS = 1.0
+
+
+def worker_urls(count, base_port):
+    return [f"http://127.0.0.1:{base_port + i}" for i in range(count)]
+
+
+def start_worker(url, nodes, db_path):
+    env = dict(
+        os.environ,
+        PORT=url.rsplit(":", 1)[1],
+        ROUTING_SELF_URL=url,
+        ROUTING_NODES=",".join(nodes),
+        ROUTING_SECRET="multi-worker-benchmark",
+        STORAGE_BACKEND="sqlite",
+        SQLITE_PATH=db_path,
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_SECONDS="0.2",
+        PREGENERATE_THEMES="",
+        QUESTION_CORPUS_PATH="",
+        QUESTIONS_PER_SESSION="10",  # Long enough for the quizzes to span the restarts
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "game_api:app", "--port", url.rsplit(":", 1)[1], "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def stop_workers(processes):
+    # SIGTERM lets each worker persist its sessions and release its leases
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait(timeout=30)
+
+
+async def wait_until_up(client, urls):
+    deadline = time.monotonic() + 30
+    for url in urls:
+        while True:
+            try:
+                if (await client.get(f"{url}/")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Worker {url} did not start")
+            await asyncio.sleep(0.2)
+
+
+async def call(client, live, method, path, **kwargs):
+    """A request to a random live worker, retried while owners move between workers"""
+    for attempt in range(20):
+        try:
+            response = await client.request(method, f"{random.choice(live)}{path}", **kwargs)
+        except httpx.ConnectError:
+            response = None  # Stopped between picking it and connecting: never reached the worker
+        if response is not None and response.status_code != 503:
+            response.raise_for_status()
+            return response.json()
+        await asyncio.sleep(0.1 * (attempt + 1))
+    raise RuntimeError(f"{method} {path} kept failing")
+
+
+async def play_question(client, live, session_id, players, expected):
+    question = await call(client, live, "GET", f"/next-question/{session_id}")
+    if question.get("finished"):
+        return False
+    for user_id in players:
+        answered = await call(client, live, "POST", "/answer", json={
+            "session_id": session_id, "user_id": user_id, "answer": random.randint(0, 3),
+        })
+        if answered["correct"]:
+            expected[user_id] += 1
+    await call(client, live, "POST", f"/advance-question/{session_id}")
+    return True
+
+
+async def play_out(client, live, session_id, expected, pause):
+    while await play_question(client, live, session_id, list(expected), expected):
+        await asyncio.sleep(pause)
+
+
+async def scale_out(live, processes, new_url, db_path):
+    """Start `new_url` with the larger node list, then restart the other workers one by one"""
+    nodes = live + [new_url]
+    async with httpx.AsyncClient(timeout=60) as client:
+        processes[new_url] = start_worker(new_url, nodes, db_path)
+        await wait_until_up(client, [new_url])
+        live.append(new_url)
+        for url in nodes[:-1]:
+            # Drained like behind a load balancer: requests already sent to it finish first
+            live.remove(url)
+            await asyncio.sleep(DRAIN_SECONDS)
+            await asyncio.to_thread(stop_workers, [processes.pop(url)])
+            processes[url] = start_worker(url, nodes, db_path)
+            await wait_until_up(client, [url])
+            live.append(url)
+            print(f"   🔁 {url} restarted with {len(nodes)} nodes")
+
+
+async def check_scores(client, urls, games):
+    mismatches = 0
+    for session_id, expected in games.items():
+        scores = (await call(client, urls, "GET", f"/scores/{session_id}"))["scores"]
+        actual = {entry["user_id"]: entry["score"] for entry in scores}
+        if actual != expected:
+            mismatches += 1
+            print(f"   ❌ {session_id}: expected {expected}, got {actual}")
+    return mismatches
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--base-port", type=int, default=8101)
+    parser.add_argument("--pause", type=float, default=0.5, help="Seconds between two questions of a session")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    urls = worker_urls(args.workers, args.base_port)
+    processes = {url: start_worker(url, urls, db_path) for url in urls}
+    games = {}
+    try:
+        async with httpx.AsyncClient(timeout=60) as client:
+            await wait_until_up(client, urls)
+            print(f"🚀 {args.workers} workers up: {', '.join(urls)}")
+
+            for i in range(args.sessions):
+                created = (await client.post(f"{random.choice(urls)}/create-session",
+                                             json={"theme": f"theme {i % 4}"})).json()
+                session_id = created["session_id"]
+                while created.get("status") == "pending":
+                    await asyncio.sleep(0.2)
+                    created = (await client.get(f"{random.choice(urls)}/session-status/{session_id}")).json()
+                games[session_id] = {}
+                for p in range(args.players):
+                    joined = (await client.post(f"{random.choice(urls)}/add-user-to-session",
+                                                json={"name": f"player{p}", "session_id": session_id})).json()
+                    games[session_id][joined["user_id"]] = 0
+
+            for session_id, expected in games.items():
+                await play_question(client, urls, session_id, list(expected), expected)
+            mismatches = await check_scores(client, urls, games)
+            print(f"   first question played in {len(games)} sessions, {mismatches} mismatching scoreboards")
+
+            # Quizzes go on against whichever workers are live while one is added
+            live = list(urls)
+            new_url = worker_urls(args.workers + 1, args.base_port)[-1]
+            print(f"📈 scaling out to {args.workers + 1} workers while the quizzes go on")
+            await asyncio.gather(
+                scale_out(live, processes, new_url, db_path),
+                *(play_out(client, live, session_id, expected, args.pause) for session_id, expected in games.items()),
+            )
+            mismatches += await check_scores(client, live, games)
+            stats = await asyncio.gather(*(client.get(f"{url}/routing/stats") for url in live))
+            forwarded = sum(response.json()["forwarded"] for response in stats)
+            print(f"   quizzes finished, {forwarded} requests forwarded since the restarts")
+    finally:
+        stop_workers(processes.values())
+
+    if mismatches:
+        print(f"❌ {mismatches} scoreboards disagreed with the points awarded")
+        sys.exit(1)
+    print("✅ Every scoreboard matches the points awarded")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
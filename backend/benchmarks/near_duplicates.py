@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate detection over a large question corpus
+
+Builds a synthetic corpus of `--questions` questions, `--paraphrases` of which repeat an
+earlier question with `--changed` words replaced, then times the MinHash signatures
+and the batch deduplication, and reports how many paraphrases were caught and how
+many distinct questions were wrongly flagged:
+    python benchmarks/near_duplicates.py --questions 100000 --paraphrases 10000
+
+Also times the online filter applied to each generated batch against `--recent`
+remembered questions.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_dedup import DuplicateFilter, MinHasher, find_duplicates  # noqa: E402
+
+
+def synthetic_corpus(args, rng):
+    vocabulary = [f"word{i}" for i in range(args.vocabulary)]
+    distinct = args.questions - args.paraphrases
+    corpus = []
+    for _ in range(distinct):
+        words = rng.sample(vocabulary, args.words)
+        corpus.append({"question": " ".join(words) + "?", "options": ["a", "b", rng.choice(vocabulary), "c"],
+                       "correct": 2})
+    for _ in range(args.paraphrases):
+        original = corpus[rng.randrange(distinct)]
+        words = original["question"][:-1].split()
+        for position in rng.sample(range(len(words)), args.changed):
+            words[position] = rng.choice(vocabulary)
+        corpus.append({**original, "question": " ".join(words) + "?"})
+    return corpus, distinct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--paraphrases", type=int, default=10_000)
+    parser.add_argument("--words", type=int, default=8, help="Content words per question")
+    parser.add_argument("--changed", type=int, default=1, help="Words replaced in a paraphrase")
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--recent", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=15, help="Questions per generated batch")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus, distinct = synthetic_corpus(args, rng)
+    hasher = MinHasher()
+
+    start = time.perf_counter()
+    signatures = hasher.signatures(corpus)
+    hashed = time.perf_counter() - start
+    start = time.perf_counter()
+    duplicates = set(find_duplicates(signatures, args.threshold).tolist())
+    searched = time.perf_counter() - start
+
+    caught = sum(1 for index in duplicates if index >= distinct)
+    wrong = len(duplicates) - caught
+    print(f"🔎 {len(corpus)} questions: signatures in {hashed:.2f}s, deduplication in {searched:.2f}s")
+    print(f"   caught {caught}/{args.paraphrases} paraphrases ({caught / max(args.paraphrases, 1):.1%}), "
+          f"{wrong} distinct questions flagged")
+
+    duplicate_filter = DuplicateFilter(args.threshold, recent_size=args.recent)
+    for start in range(0, args.recent, args.batch):
+        duplicate_filter.filter(corpus[start:start + args.batch])
+    batches = [corpus[i:i + args.batch] for i in range(args.recent, min(len(corpus), args.recent + 200 * args.batch),
+                                                         args.batch)]
+    start = time.perf_counter()
+    for batch in batches:
+        duplicate_filter.filter(batch)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ Online filter: {elapsed / len(batches) * 1000:.2f} ms per batch of {args.batch} "
+          f"against {args.recent} recent questions")
+
+
+if __name__ == "__main__":
+    main()
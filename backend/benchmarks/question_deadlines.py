@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: question deadlines of many sessions on one timer wheel
+
+Schedules one deadline per session, spread over `--spread` seconds, and reports
+how late they fired and how much CPU the wheel task used per second:
+    python benchmarks/question_deadlines.py --sessions 10000 --spread 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_wheel import TimerWheel  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--spread", type=float, default=5.0, help="Deadlines are spread over this many seconds")
+    parser.add_argument("--tick", type=float, default=0.1)
+    args = parser.parse_args()
+
+    wheel = TimerWheel(tick=args.tick)
+    lateness = []
+    done = asyncio.Event()
+
+    def expired(due: float):
+        lateness.append(time.monotonic() - due)
+        if len(lateness) == args.sessions:
+            done.set()
+
+    wheel.start()
+    started, cpu_started = time.monotonic(), time.process_time()
+    for i in range(args.sessions):
+        delay = args.spread * i / args.sessions
+        wheel.schedule(f"session-{i}", delay, expired, time.monotonic() + delay)
+    scheduled = time.monotonic() - started
+    await done.wait()
+    elapsed, cpu = time.monotonic() - started, time.process_time() - cpu_started
+    await wheel.stop()
+
+    lateness.sort()
+    print(f"⏱️  {args.sessions} deadlines, scheduled in {scheduled * 1000:.1f} ms")
+    print(f"   lateness p50 {statistics.median(lateness) * 1000:.1f} ms, "
+          f"p99 {lateness[int(len(lateness) * 0.99) - 1] * 1000:.1f} ms, max {lateness[-1] * 1000:.1f} ms")
+    print(f"   CPU {cpu / elapsed * 100:.1f}% of one core over {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fan-out of session events to thousands of stream subscribers
+
+Runs in-process against an in-memory storage, no server needed:
+    python benchmarks/sse_fanout.py --subscribers 5000 --events 50
+
+`--subscribers` consumers subscribe to one session and drain their event stream;
+`--slow` of them never read, to show that stalled clients are cut down to a
+`resync` instead of growing memory or delaying the others. The script then makes
+`--events` changes to the session (a player joins, scores change, the question
+advances) and reports how long it takes for every reading subscriber to receive
+each change, measured from the storage write.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_stream import SessionEventHub  # noqa: E402
+from storage import MemoryStorage  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Round:
+    """Counts down the messages still expected by the reading subscribers"""
+
+    def __init__(self):
+        self.remaining = 0
+        self.done = asyncio.Event()
+        self.last_arrival = 0.0
+
+    def expect(self, messages):
+        self.remaining = messages
+        self.done.clear()
+
+    def received(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.last_arrival = time.perf_counter()
+            self.done.set()
+
+
+async def consume(hub, session_id, round_, ready):
+    stream = hub.subscribe(session_id)
+    await stream.__anext__()
+    ready.release()
+    async for _ in stream:
+        round_.received()
+
+
+async def stall(hub, session_id, ready):
+    stream = hub.subscribe(session_id)
+    await stream.__anext__()
+    ready.release()
+    await asyncio.Event().wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=100, help="subscribers that never read their stream")
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--queue-size", type=int, default=16)
+    args = parser.parse_args()
+
+    storage = MemoryStorage()
+    session_id = "bench"
+    await storage.set_session(session_id, {
+        "questions": [{"id": i} for i in range(args.events)],
+        "current_question": 0,
+        "status": "ready",
+    })
+
+    # Refreshes are driven by hand below, so the watcher's own polling stays out of the way
+    hub = SessionEventHub(storage, queue_size=args.queue_size, poll_interval=3600, keepalive_interval=3600)
+    ready = asyncio.Semaphore(0)
+    round_ = Round()
+    tasks = [asyncio.create_task(consume(hub, session_id, round_, ready)) for _ in range(args.subscribers)]
+    tasks += [asyncio.create_task(stall(hub, session_id, ready)) for _ in range(args.slow)]
+
+    # The first subscriber's watcher publishes the initial snapshot
+    await asyncio.sleep(0)
+    await hub.refresh(session_id)
+    for _ in range(args.subscribers + args.slow):
+        await ready.acquire()
+
+    latencies = []
+    publish_times = []
+    for i in range(args.events):
+        player, _ = await storage.add_player(session_id, {"player_id": f"p{i}", "pseudo": f"player-{i}", "score": 0})
+        if i:
+            await storage.increment_score(session_id, previous, 1)
+            await storage.update_session(session_id, {"current_question": i})
+        previous = player["player_id"]
+
+        # player_joined, then also question_advanced and leaderboard once there is a previous player
+        round_.expect(args.subscribers * (1 if i == 0 else 3))
+        start = time.perf_counter()
+        await hub.refresh(session_id)
+        publish_times.append(time.perf_counter() - start)
+        await round_.done.wait()
+        latencies.append(round_.last_arrival - start)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await hub.close()
+
+    ms = [latency * 1000 for latency in latencies]
+    publish_ms = [latency * 1000 for latency in publish_times]
+    stats = hub.stats()
+    print(f"📡 {args.subscribers} reading + {args.slow} stalled subscribers, {args.events} session changes")
+    print(f"   publish (diff + serialize + enqueue): p50={percentile(publish_ms, 50):.2f}ms "
+          f"p99={percentile(publish_ms, 99):.2f}ms")
+    print(f"   delivered to every reader:           p50={percentile(ms, 50):.2f}ms "
+          f"p99={percentile(ms, 99):.2f}ms mean={statistics.fmean(ms):.2f}ms")
+    print(f"   messages delivered={stats['delivered']} dropped for stalled clients={stats['dropped']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
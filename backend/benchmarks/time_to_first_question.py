@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first question, waiting for the whole quiz vs. streaming
+
+Runs in-process against the local fake Mistral client, which spreads its latency
+over the generated output like a real model does. Waiting for the parsed
+`QuizQuestions` object makes the first question available only once the last one
+is generated; streaming hands out question 1 after roughly 1/N of the time.
+
+Usage: python benchmarks/time_to_first_question.py [--latency-per-question 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import FakeMistral  # noqa: E402
+from question_stream import stream_quiz_questions  # noqa: E402
+
+
+class QuizQuestion(BaseModel):
+    id: int
+    question: str
+    options: List[str]
+    correct: int
+
+
+class QuizQuestions(BaseModel):
+    questions: List[QuizQuestion]
+
+
+def messages_for(num_questions: int) -> List[dict]:
+    return [{"role": "user", "content": f"Generate {num_questions} multiple choice quiz questions about tennis. "}]
+
+
+async def whole_quiz(client, num_questions):
+    start = time.perf_counter()
+    response = await client.chat.parse_async("fake", messages_for(num_questions), QuizQuestions)
+    assert len(response.choices[0].message.parsed.questions) == num_questions
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def streamed_quiz(client, num_questions):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in stream_quiz_questions(client, "fake", messages_for(num_questions), question_model=QuizQuestion):
+        count += 1
+        if first is None:
+            first = time.perf_counter() - start
+    assert count == num_questions
+    return first, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-per-question", type=float, default=0.5)
+    parser.add_argument("--sizes", default="3,10,20")
+    args = parser.parse_args()
+
+    print("🧪 Time to first question\n")
+    print(f"   {'questions':>9} {'whole first':>12} {'stream first':>13} {'stream total':>13}")
+    for num_questions in (int(n) for n in args.sizes.split(",")):
+        client = FakeMistral(latency=args.latency_per_question * num_questions)
+        whole_first, _ = await whole_quiz(client, num_questions)
+        stream_first, stream_total = await streamed_quiz(client, num_questions)
+        print(f"   {num_questions:>9} {whole_first:>11.2f}s {stream_first:>12.2f}s {stream_total:>12.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,234 @@
+"""
+Event bus for session changes, shared by the game API and the MCP server
+
+Every instance publishes what it changed in a session so that caches and live
+streams on the other instances can update right away instead of re-reading
+storage on a timer:
+
+- `player_joined`: {"players": [{"player_id", "pseudo"}]}
+- `scores_changed`: {"increments": {player_id: amount}}
+- `question_advanced`: {"current_question": index}
+- `session_changed`: anything else (questions generated, session created)
+
+Events are published once the change is in storage. Two implementations:
+
+- `LocalEventBus`: in-process delivery, for single-instance runs and tests
+- `SocketEventBus`: a client of the small TCP broker in this module
+  (`python event_bus.py`), which relays newline-delimited JSON messages between
+  every connected instance
+
+Pick one with EVENT_BUS=local|socket (EVENT_BUS_ADDRESS=host:port of the broker).
+This file is kept identical in backend/ and mcpserver/.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+Handler = Callable[[str, str, dict], None]
+
+
+class EventBus:
+    """Interface of a session event bus"""
+
+    name = "abstract"
+
+    def __init__(self):
+        # Tells this instance's own events apart from the others'
+        self.instance_id = uuid.uuid4().hex[:12]
+        self._handlers: List[Tuple[Handler, bool]] = []
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, handler: Handler, include_own: bool = False):
+        """
+        Call `handler(session_id, event, data)` for every event. Events published by
+        this instance are skipped unless `include_own`: its state is already up to date.
+        """
+        self._handlers.append((handler, include_own))
+
+    def publish(self, session_id: str, event: str, data: Optional[dict] = None):
+        """Queue an event for delivery; never waits"""
+        self.published += 1
+        self._send({"origin": self.instance_id, "session_id": session_id, "event": event, "data": data or {}})
+
+    def _send(self, message: dict):
+        raise NotImplementedError
+
+    def _dispatch(self, message: dict):
+        own = message.get("origin") == self.instance_id
+        for handler, include_own in self._handlers:
+            if own and not include_own:
+                continue
+            try:
+                handler(message["session_id"], message["event"], message.get("data") or {})
+            except Exception as e:
+                print(f"❌ Error handling {message.get('event')} event: {e}")
+
+    def start(self):
+        """Start background delivery if the bus needs it; safe to call repeatedly"""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name, "published": self.published, "received": self.received}
+
+
+class LocalEventBus(EventBus):
+    """Delivers events to handlers in this process, on the next event loop iteration"""
+
+    name = "local"
+
+    def _send(self, message: dict):
+        self.received += 1
+        try:
+            asyncio.get_running_loop().call_soon(self._dispatch, message)
+        except RuntimeError:
+            self._dispatch(message)
+
+
+class SocketEventBus(EventBus):
+    """
+    Exchanges events with other instances through the TCP broker of this module.
+
+    Publishing appends to an outbox that a background task writes to the broker.
+    While the broker is unreachable the task reconnects every `reconnect_delay`
+    seconds and the outbox keeps the latest `max_pending` events.
+    """
+
+    name = "socket"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 7070, max_pending: int = 10_000,
+                 reconnect_delay: float = 1.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self._outbox: deque = deque(maxlen=max_pending)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Started by the first publish or read inside the event loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def _send(self, message: dict):
+        self._outbox.append((json.dumps(message, separators=(",", ":")) + "\n").encode())
+        self.start()
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                print(f"⚠️ Event broker {self.host}:{self.port} unreachable: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self.connected = True
+            reading = asyncio.create_task(self._read(reader))
+            try:
+                while not reading.done():
+                    self._wake.clear()
+                    while self._outbox:
+                        writer.write(self._outbox.popleft())
+                    await writer.drain()
+                    waiting = asyncio.create_task(self._wake.wait())
+                    await asyncio.wait({reading, waiting}, return_when=asyncio.FIRST_COMPLETED)
+                    waiting.cancel()
+            except (OSError, ConnectionError) as e:
+                print(f"⚠️ Lost the event broker: {e}")
+            finally:
+                self.connected = False
+                reading.cancel()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _read(self, reader: asyncio.StreamReader):
+        async for line in reader:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            self.received += 1
+            self._dispatch(message)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {**super().stats(), "connected": self.connected, "pending": len(self._outbox)}
+
+
+async def run_broker(host: str = "127.0.0.1", port: int = 7070, max_buffer: int = 1 << 20):
+    """
+    Relay every line received from one client to all the others. A client whose
+    unsent data exceeds `max_buffer` bytes is disconnected rather than buffered.
+    """
+    clients: Set[asyncio.StreamWriter] = set()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        clients.add(writer)
+        try:
+            async for line in reader:
+                for other in list(clients):
+                    if other is writer:
+                        continue
+                    if other.transport.get_write_buffer_size() > max_buffer:
+                        clients.discard(other)
+                        other.close()
+                        continue
+                    other.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            clients.discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"📡 Event broker listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def _address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def create_event_bus(backend: Optional[str] = None) -> EventBus:
+    """
+    Build the event bus named by `backend` or the EVENT_BUS environment variable.
+    """
+    backend = (backend or os.environ.get("EVENT_BUS", "local")).lower()
+
+    if backend == "local":
+        return LocalEventBus()
+    if backend == "socket":
+        host, port = _address(os.environ.get("EVENT_BUS_ADDRESS", "127.0.0.1:7070"))
+        return SocketEventBus(host, port)
+
+    raise ValueError(f"Unknown EVENT_BUS '{backend}' (expected local or socket).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the local event broker")
+    parser.add_argument("--address", default=os.environ.get("EVENT_BUS_ADDRESS", "127.0.0.1:7070"))
+    args = parser.parse_args()
+    asyncio.run(run_broker(*_address(args.address)))
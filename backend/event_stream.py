@@ -0,0 +1,246 @@
+"""
+Server-sent event streams of session changes
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """Encode one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+
+class _Watch:
+    """What the watcher last saw of a session"""
+
+    __slots__ = ("task", "wake", "current_question", "status", "total_questions", "players", "snapshot")
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+        self.current_question = None
+        self.status = None
+        self.total_questions = 0
+        self.players: Dict[str, dict] = {}
+        self.snapshot: Optional[bytes] = None
+
+
+class SessionEventHub:
+    """
+    Fans session events out to stream subscribers.
+
+    Every event is serialized once and the same bytes are queued for every subscriber
+    of the session. Each subscriber has a bounded queue: a client too slow to drain it
+    has its backlog dropped and receives a single `resync` event instead, telling it
+    to reload the full state, so one slow connection never holds memory or slows the
+    others down.
+
+    Sessions with at least one subscriber are watched by a single task that reads the
+    session from storage every `poll_interval` seconds, or as soon as `notify` reports
+    a change made elsewhere, and publishes what changed: players joining, the question
+    advancing and leaderboard deltas. Code that holds the
+    authoritative state of a session subscribes clients with that state as `snapshot`,
+    which skips the watcher, and `publish`es the changes itself.
+    """
+
+    def __init__(self, storage, queue_size: int = 64, poll_interval: float = 1.0,
+                 keepalive_interval: float = 15.0):
+        self.storage = storage
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.keepalive_interval = keepalive_interval
+        self._subscribers: Dict[str, Set[_Subscriber]] = {}
+        self._watches: Dict[str, _Watch] = {}
+        self._event_ids: Dict[str, int] = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def publish(self, session_id: str, event: str, data: dict):
+        if session_id not in self._subscribers:
+            return
+        event_id = self._event_ids.get(session_id, 0) + 1
+        self._event_ids[session_id] = event_id
+        self._fan_out(session_id, format_sse(event, data, event_id))
+
+    def _fan_out(self, session_id: str, message: bytes):
+        subscribers = self._subscribers.get(session_id)
+        if not subscribers:
+            return
+        self.published += 1
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and ask it to reload the state
+                backlog = subscriber.queue.qsize()
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.dropped += backlog + 1
+                self.dropped += backlog + 1
+                subscriber.queue.put_nowait(format_sse("resync", {"session_id": session_id}))
+
+    async def subscribe(self, session_id: str, snapshot: Optional[dict] = None) -> AsyncIterator[bytes]:
+        """
+        Yield the encoded events of a session, starting with a snapshot of its state.
+        Without a `snapshot`, the session's state is read from storage by its watcher.
+        """
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers.setdefault(session_id, set()).add(subscriber)
+
+        try:
+            if snapshot is not None:
+                yield format_sse("snapshot", snapshot)
+            else:
+                watch = self._ensure_watch(session_id)
+                if watch.snapshot is not None:
+                    yield watch.snapshot
+            while True:
+                if subscriber.queue.empty():
+                    try:
+                        message = await asyncio.wait_for(subscriber.queue.get(), self.keepalive_interval)
+                    except asyncio.TimeoutError:
+                        message = KEEPALIVE
+                else:
+                    # Skip the timeout machinery while there is a backlog to drain
+                    message = subscriber.queue.get_nowait()
+                yield message
+        finally:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[session_id]
+                    self._event_ids.pop(session_id, None)
+                    self._stop_watch(session_id)
+
+    def _ensure_watch(self, session_id: str) -> _Watch:
+        watch = self._watches.get(session_id)
+        if watch is None:
+            watch = _Watch()
+            self._watches[session_id] = watch
+            watch.task = asyncio.create_task(self._watch(session_id, watch))
+        return watch
+
+    def _stop_watch(self, session_id: str):
+        watch = self._watches.pop(session_id, None)
+        if watch is not None and watch.task is not None:
+            watch.task.cancel()
+
+    async def _watch(self, session_id: str, watch: _Watch):
+        while True:
+            try:
+                await self.refresh(session_id, watch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error watching session {session_id}: {e}")
+            try:
+                await asyncio.wait_for(watch.wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            watch.wake.clear()
+
+    def notify(self, session_id: str):
+        """A session changed elsewhere: refresh its watcher now instead of at the next poll"""
+        watch = self._watches.get(session_id)
+        if watch is not None:
+            watch.wake.set()
+
+    async def refresh(self, session_id: str, watch: Optional[_Watch] = None):
+        """Read the session once and publish what changed since the previous read"""
+        watch = watch or self._watches.get(session_id)
+        if watch is None:
+            return
+        session, roster = await asyncio.gather(self.storage.get_session(session_id),
+                                               self.storage.list_players(session_id))
+        if session is None:
+            return
+        players = {p["player_id"]: p for p in roster}
+
+        current_question = session.get("current_question", 0)
+        status = session.get("status", "ready")
+        total_questions = session.get("total_questions", len(session.get("questions", [])))
+        first_read = watch.current_question is None
+
+        joined = [{"player_id": pid, "pseudo": p.get("pseudo")} for pid, p in players.items() if pid not in watch.players]
+        changed = [
+            {"player_id": pid, "pseudo": p.get("pseudo"), "score": p.get("score", 0)}
+            for pid, p in players.items()
+            if pid in watch.players and watch.players[pid].get("score", 0) != p.get("score", 0)
+        ]
+        advanced = not first_read and current_question != watch.current_question
+        became_ready = not first_read and status != watch.status and status == "ready"
+        moved = first_read or joined or changed or advanced or became_ready or total_questions != watch.total_questions
+
+        watch.current_question = current_question
+        watch.status = status
+        watch.total_questions = total_questions
+        watch.players = players
+
+        if not moved:
+            return
+        watch.snapshot = format_sse("snapshot", self._snapshot(session_id, watch))
+        if first_read:
+            self._fan_out(session_id, watch.snapshot)
+            return
+
+        if joined:
+            self.publish(session_id, "player_joined", {"players": joined, "player_count": len(players)})
+        if became_ready:
+            self.publish(session_id, "questions_ready", {"total_questions": total_questions})
+        if advanced:
+            self.publish(session_id, "question_advanced", {
+                "current_question": current_question + 1,
+                "total_questions": total_questions,
+            })
+        if changed:
+            self.publish(session_id, "leaderboard", {"changes": changed})
+
+    @staticmethod
+    def _snapshot(session_id: str, watch: _Watch) -> dict:
+        scores: List[dict] = sorted(
+            ({"player_id": pid, "pseudo": p.get("pseudo"), "score": p.get("score", 0)} for pid, p in watch.players.items()),
+            key=lambda entry: entry["score"],
+            reverse=True,
+        )
+        return {
+            "session_id": session_id,
+            "status": watch.status,
+            "current_question": watch.current_question + 1,
+            "total_questions": watch.total_questions,
+            "scores": scores,
+        }
+
+    async def close(self):
+        for session_id in list(self._watches):
+            self._stop_watch(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
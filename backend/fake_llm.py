@@ -0,0 +1,98 @@
+"""
+Local stand-in for the Mistral client, used for benchmarks and offline runs.
+
+Enable it with LLM_BACKEND=fake. Responses are deterministic per theme and take
+FAKE_LLM_LATENCY_SECONDS to arrive, like a real generation would.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import List
+
+
+def _requested_count(messages: List[dict]) -> int:
+    match = re.search(r"Generate (\d+)", messages[-1]["content"])
+    return int(match.group(1)) if match else 3
+
+
+def _requested_theme(messages: List[dict]) -> str:
+    match = re.search(r"questions about (.+?)\.", messages[-1]["content"])
+    return match.group(1).strip() if match else "general knowledge"
+
+
+def _usage(messages: List[dict], completion: str) -> SimpleNamespace:
+    # About four characters per token
+    prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+    completion_tokens = len(completion) // 4
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+# Filler terms that keep fake questions of one theme apart for the near-duplicate filter
+_FILLER = [f"topic{n}" for n in range(1000)]
+
+
+def fake_questions(theme: str, num_questions: int) -> List[dict]:
+    return [
+        {
+            "id": i + 1,
+            "question": f"Fake question {i + 1} about {theme}: {' '.join(random.Random(f'{theme}/{i}').sample(_FILLER, 6))}?",
+            "options": [f"{theme} answer {j}" for j in range(4)],
+            "correct": i % 4,
+        }
+        for i in range(num_questions)
+    ]
+
+
+class _FakeChat:
+    def __init__(self, latency: float, chunk_size: int = 16):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def _response(self, messages, response_format):
+        self.calls += 1
+        questions = fake_questions(_requested_theme(messages), _requested_count(messages))
+        parsed = response_format.model_validate({"questions": questions})
+        message = SimpleNamespace(parsed=parsed, content=parsed.model_dump_json())
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=_usage(messages, message.content))
+
+    def parse(self, model, messages, response_format, **kwargs):
+        time.sleep(self.latency)
+        return self._response(messages, response_format)
+
+    async def parse_async(self, model, messages, response_format, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._response(messages, response_format)
+
+    def _completion_text(self, messages) -> str:
+        return json.dumps({"questions": fake_questions(_requested_theme(messages), _requested_count(messages))})
+
+    async def stream_async(self, model, messages, **kwargs):
+        """Stream the JSON completion in `chunk_size` pieces, spread over the configured latency"""
+        self.calls += 1
+        text = self._completion_text(messages)
+        pieces = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        delay = self.latency / max(len(pieces), 1)
+
+        async def events():
+            for i, piece in enumerate(pieces):
+                await asyncio.sleep(delay)
+                delta = SimpleNamespace(content=piece)
+                # Like Mistral, the last chunk reports the token usage
+                usage = _usage(messages, text) if i == len(pieces) - 1 else None
+                yield SimpleNamespace(data=SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=usage))
+
+        return events()
+
+
+class FakeMistral:
+    """Minimal object with the `chat.parse` / `parse_async` / `stream_async` surface of `mistralai.Mistral`"""
+
+    def __init__(self, latency: float = 2.0, chunk_size: int = 16):
+        self.chat = _FakeChat(latency, chunk_size)
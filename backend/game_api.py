@@ -1,29 +1,47 @@
+import asyncio
 import json
 import os
 import random
-import uuid
+import re
+import time
+from contextlib import asynccontextmanager
 
 import dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
-from firebase_admin.firestore import DocumentReference
-from fastapi import FastAPI, HTTPException
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from mistralai import Mistral
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+from event_bus import create_event_bus
+from event_stream import SessionEventHub
+from game_engine import GameEngine, GameError
+from metrics import HTTP_REQUESTS, LLM_CALLS, LLM_TOKENS, QUESTION_SOURCES, REGISTRY, InstrumentedStorage, log_event
+from pregeneration import PregenerationWorker, ThemeDemand
+from question_bank import QuestionBankCache, normalize_theme
+from question_corpus import QuestionCorpus, question_key
+from question_stream import stream_quiz_questions
+from routing import MAX_HOPS, ROUTED_HEADER, SessionRouter
+from storage import SERVER_TIMESTAMP, create_storage
+from singleflight import SingleFlight
 
 dotenv.load_dotenv()
 
 
 def initialize_firestore():
     """
-    Initialize Firestore based on the platform.
+    Initialize Firestore based on the platform and return its asyncio client.
+    Called once by the storage on first use; the client and its channel are then shared.
     """
+    # Import Firebase modules only when needed
+    import firebase_admin
+    from firebase_admin import credentials, firestore_async
+    
     # Check if default app already exists
     try:
         firebase_admin.get_app()
-        return firestore.client()  # App already exists, just return client
+        return firestore_async.client()  # App already exists, just return client
     except ValueError:
         # App doesn't exist, initialize it
         pass
@@ -51,12 +69,45 @@ def initialize_firestore():
             except FileNotFoundError:
                 raise ValueError("Neither FIREBASE_SERVICE_ACCOUNT_KEY environment variable nor cred.json file found.")
     
-    return firestore.client()
+    return firestore_async.client()
+
+# Session storage (STORAGE_BACKEND=firestore|memory|sqlite); Firestore connects on first use
+storage = InstrumentedStorage(create_storage(firestore_client_factory=initialize_firestore))
 
-db = initialize_firestore()
+# Session changes announced between instances (EVENT_BUS=local|socket)
+event_bus = create_event_bus()
+
+# Server-sent events of session changes, one storage watcher per watched session
+event_hub = SessionEventHub(
+    storage,
+    queue_size=int(os.environ.get("EVENT_STREAM_QUEUE_SIZE", "64")),
+    poll_interval=float(os.environ.get("EVENT_STREAM_POLL_SECONDS", "1")),
+    keepalive_interval=float(os.environ.get("EVENT_STREAM_KEEPALIVE_SECONDS", "15")),
+)
+# Watched sessions changed by another instance are re-read right away
+event_bus.subscribe(lambda session_id, event, data: event_hub.notify(session_id))
 
 
-app = FastAPI(title="Game Session API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.environ.get("WARM_UP_ON_START", "true").lower() == "true":
+        run_in_background(warm_up())
+    event_bus.start()
+    run_in_background(question_corpus.load())
+    pregeneration_worker.start()
+    engine.start()
+    router.start()
+    yield
+    await pregeneration_worker.stop()
+    await engine.stop()
+    # Sessions are persisted: hand their leases back for the remaining workers
+    await router.stop()
+    await event_bus.close()
+    await event_hub.close()
+    storage.close()
+
+
+app = FastAPI(title="Game Session API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -67,11 +118,147 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mistral AI client (you'll need to set MISTRAL_API_KEY environment variable)
-mistral_client = Mistral(api_key=os.environ["MISTRAL_API_KEY"])
+def create_llm_client():
+    """
+    Create the question generation client. LLM_BACKEND=fake swaps in a local stand-in.
+    """
+    if os.environ.get("LLM_BACKEND", "mistral").lower() == "fake":
+        from fake_llm import FakeMistral
+        return FakeMistral(latency=float(os.environ.get("FAKE_LLM_LATENCY_SECONDS", "2")))
+    # The SDK takes a noticeable share of the start time: import it only when needed
+    from mistralai import Mistral
+    return Mistral(api_key=os.environ["MISTRAL_API_KEY"])
+
+# Mistral AI client (you'll need to set MISTRAL_API_KEY environment variable), created on first use
+_llm_client = None
+
+def get_llm_client():
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client()
+    return _llm_client
 
-# In-memory storage: session_id → { users, scores, current_question }
-sessions: Dict[str, dict] = {}
+async def warm_up():
+    """
+    Create the LLM client and open the storage connection in the background, so the
+    first requests that need them do not pay for it. The server answers meanwhile.
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(get_llm_client)
+        await asyncio.to_thread(get_duplicate_filter)
+        # The client is created off the loop; the read then opens its channel
+        await asyncio.to_thread(storage.connect)
+        await storage.get_session("__warmup__")
+        print(f"🔥 Warmed up LLM client, duplicate filter and storage in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Warm-up failed, connecting on first use instead: {e}")
+
+# Bound on concurrent upstream generations, and coalescing of identical ones
+mistral_semaphore = asyncio.Semaphore(int(os.environ.get("MISTRAL_MAX_CONCURRENCY", "8")))
+question_generation = SingleFlight()
+
+# Question bank cache: popular themes are served from a pool instead of a new LLM call
+question_bank = QuestionBankCache(
+    max_themes=int(os.environ.get("QUESTION_BANK_MAX_THEMES", "128")),
+    ttl_seconds=float(os.environ.get("QUESTION_BANK_TTL_SECONDS", "3600")),
+    bank_size=int(os.environ.get("QUESTION_BANK_SIZE", "15")),
+)
+
+# Every generated question, indexed by theme: quizzes are assembled from it before asking the LLM
+question_corpus = QuestionCorpus(
+    path=os.environ.get("QUESTION_CORPUS_PATH", "question_corpus.jsonl") or None,
+    min_match=float(os.environ.get("QUESTION_CORPUS_MIN_MATCH", "0.5")),
+)
+
+# Near-duplicate filter of generated questions (QUESTION_DEDUP_THRESHOLD=0 disables it), created on first use
+DEDUP_THRESHOLD = float(os.environ.get("QUESTION_DEDUP_THRESHOLD", "0.7"))
+_duplicate_filter = None
+
+def get_duplicate_filter():
+    global _duplicate_filter
+    if _duplicate_filter is None and DEDUP_THRESHOLD > 0:
+        # Imports NumPy: only paid once questions are generated, or by the warm-up
+        from question_dedup import DuplicateFilter
+        _duplicate_filter = DuplicateFilter(
+            DEDUP_THRESHOLD, recent_size=int(os.environ.get("QUESTION_DEDUP_RECENT", "10000")))
+    return _duplicate_filter
+
+async def drop_near_duplicates(questions: List[dict], keep_at_least: int = 0) -> List[dict]:
+    """
+    Generated questions minus paraphrases of each other and of recently generated ones,
+    keeping at least the `keep_at_least` most distinct. Runs in a worker thread: the
+    comparison takes milliseconds against a full window of recent questions.
+    """
+    duplicate_filter = await asyncio.to_thread(get_duplicate_filter)
+    if duplicate_filter is None:
+        return questions
+    kept = await asyncio.to_thread(duplicate_filter.filter, questions, keep_at_least)
+    if len(kept) < len(questions):
+        print(f"♻️ Dropped {len(questions) - len(kept)} near-duplicate generated questions")
+    return kept
+
+# Number of questions per quiz
+QUESTIONS_PER_SESSION = int(os.environ.get("QUESTIONS_PER_SESSION", "3"))
+
+# Stream questions of pending sessions so the first one is playable before the rest are generated
+STREAM_QUESTIONS = os.environ.get("STREAM_QUESTIONS", "false").lower() == "true"
+
+MISTRAL_MODEL = "mistral-medium-2508"
+
+# Background refills of the question bank, weighted by recently requested themes
+theme_demand = ThemeDemand(
+    half_life_seconds=float(os.environ.get("PREGENERATE_HALF_LIFE_SECONDS", "1800")),
+    max_themes=int(os.environ.get("PREGENERATE_MAX_THEMES", "256")),
+)
+
+# Background tasks started by requests, kept referenced until they finish
+background_tasks = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Authoritative in-memory game state, snapshotted to storage in the background.
+# Idle, finished and least recently used sessions are archived to stay within the memory budget.
+engine = GameEngine(
+    storage,
+    snapshot_interval=float(os.environ.get("SNAPSHOT_INTERVAL_SECONDS", "1")),
+    on_event=event_hub.publish,
+    memory_budget=int(float(os.environ.get("SESSION_MEMORY_BUDGET_MB", "256")) * 1024 * 1024),
+    idle_ttl=float(os.environ.get("SESSION_IDLE_TTL_SECONDS", "1800")),
+    finished_ttl=float(os.environ.get("SESSION_FINISHED_TTL_SECONDS", "300")),
+    sweep_interval=float(os.environ.get("SESSION_SWEEP_INTERVAL_SECONDS", "30")),
+    event_bus=event_bus,
+    question_time_limit=float(os.environ.get("QUESTION_TIME_LIMIT_SECONDS", "30")) or None,
+    reveal_interval=float(os.environ.get("QUESTION_REVEAL_SECONDS", "5")),
+    auto_advance=os.environ.get("QUESTION_AUTO_ADVANCE", "true").lower() == "true",
+)
+
+async def archive_session(session_id: str):
+    """Write a resident session out and drop it, retrying while requests keep touching it"""
+    for _ in range(5):
+        session = engine.get(session_id)
+        if session is None or await engine.archive(session):
+            return
+    raise RuntimeError(f"Session {session_id} kept changing during handover")
+
+# Session-affine routing between workers (ROUTING_NODES lists every worker's base URL)
+router = SessionRouter(
+    os.environ.get("ROUTING_SELF_URL", f"http://127.0.0.1:{os.environ.get('PORT', '8000')}"),
+    [node for node in os.environ.get("ROUTING_NODES", "").split(",") if node.strip()],
+    storage,
+    archive=archive_session,
+    is_resident=lambda session_id: engine.get(session_id) is not None,
+    lease_ttl=float(os.environ.get("ROUTING_LEASE_SECONDS", "30")),
+    secret=os.environ.get("ROUTING_SECRET"),
+)
+
+# Current state sampled at every /metrics scrape
+REGISTRY.gauge("game_sessions_resident", "Sessions held in memory by the game engine", lambda: engine.stats()["sessions"])
+REGISTRY.gauge("event_stream_subscribers", "Open session event streams", lambda: event_hub.stats()["subscribers"])
 
 # Simple question bank
 QUESTIONS = [
@@ -105,114 +292,528 @@ class QuizQuestion(BaseModel):
 class QuizQuestions(BaseModel):
     questions: List[QuizQuestion]
 
-async def generate_questions_with_mistral(theme: str, num_questions: int = 3) -> List[dict]:
-    """Generate questions using Mistral AI based on theme with structured output"""
-    
-    prompt = f"""Generate {num_questions} multiple choice quiz questions about {theme}. 
+def build_question_prompt(theme: str, num_questions: int) -> str:
+    return f"""Generate {num_questions} multiple choice quiz questions about {theme}. 
     
     Make sure:
     - Each question has exactly 4 options
     - The "correct" field is the index (0-3) of the correct answer
     - Questions are appropriate difficulty for a fun quiz game
     - All questions are related to: {theme}
+    - No two questions ask about the same fact
     """
+
+def build_question_messages(prompt: str) -> List[dict]:
+    return [
+        {
+            "role": "system", 
+            "content": "You are a quiz question generator. Generate engaging multiple-choice questions."
+        },
+        {
+            "role": "user", 
+            "content": prompt
+        }
+    ]
+
+async def request_questions_from_mistral(theme: str, num_questions: int) -> List[dict]:
+    """Ask Mistral AI for `num_questions` questions about the theme with structured output"""
+    
+    prompt = build_question_prompt(theme, num_questions)
+    
+    print(f"🤖 Generating {num_questions} questions with Mistral AI for theme: {theme}")
+    
+    # Use the async variant of chat.parse so the event loop keeps serving other requests
+    async with mistral_semaphore:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await get_llm_client().chat.parse_async(
+                model=MISTRAL_MODEL,
+                messages=build_question_messages(prompt),
+                response_format=QuizQuestions,
+                max_tokens=max(1000, 300 * num_questions),
+                temperature=0.7
+            )
+            outcome = "ok"
+        finally:
+            record_llm_call("parse", outcome, time.perf_counter() - start)
+    record_llm_usage(getattr(response, "usage", None))
+    
+    # Get the parsed Pydantic object
+    quiz_data = response.choices[0].message.parsed
+    
+    if not quiz_data or not quiz_data.questions:
+        raise ValueError("No questions received from Mistral API")
+    
+    # Convert to list of dicts, without near duplicates, and ensure proper IDs
+    questions = await drop_near_duplicates(
+        [question.model_dump() for question in quiz_data.questions],
+        keep_at_least=min(num_questions, QUESTIONS_PER_SESSION),
+    )
+    for i, question_dict in enumerate(questions):
+        question_dict["id"] = i + 1
+    
+    question_corpus.add(theme, questions)
+    print(f"✅ Successfully generated {len(questions)} questions using structured output")
+    print(f"📝 First question: {questions[0]['question']}")
+    return questions
+
+def record_llm_call(mode: str, outcome: str, duration: float):
+    LLM_CALLS.observe(duration, model=MISTRAL_MODEL, mode=mode, outcome=outcome)
+    log_event("llm", duration, model=MISTRAL_MODEL, mode=mode, outcome=outcome)
+
+def record_llm_usage(usage):
+    """Count the tokens reported by a completion, when it reports them"""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=MISTRAL_MODEL, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=MISTRAL_MODEL, kind="completion")
+
+async def fill_question_bank(theme: str, num_questions: int) -> List[dict]:
+    """Generate a fresh pool for the theme into the question bank and return it"""
+    
+    async def generate_pool() -> List[dict]:
+        # Generate a larger pool in one call so later sessions can sample from it
+        pool = await request_questions_from_mistral(theme, question_bank.pool_size(num_questions))
+        if len(pool) >= num_questions:
+            question_bank.put(theme, num_questions, pool)
+        return pool
     
+    # Simultaneous misses for the same theme share a single upstream call
+    return await question_generation.do((normalize_theme(theme), num_questions), generate_pool)
+
+def fallback_questions(theme: str, num_questions: int, exclude: Iterable[str] = ()) -> List[dict]:
+    """Stored questions closest to the theme, topped up with the default questions"""
+    questions = question_corpus.search(theme, num_questions, min_match=0, exclude=exclude)
+    asked = {q["question"] for q in questions} | set(exclude)
+    for default in random.sample(QUESTIONS, len(QUESTIONS)):
+        if len(questions) >= num_questions:
+            break
+        if default["question"] not in asked:
+            questions.append({**default, "id": len(questions) + 1})
+    return questions
+
+async def generate_uncached_questions(theme: str, num_questions: int) -> List[dict]:
+    """Generate questions through the LLM, falling back to the closest stored questions on error"""
     try:
-        print(f"🤖 Generating questions with Mistral AI for theme: {theme}")
-        
-        # Use chat.parse with structured output
-        response = mistral_client.chat.parse(
-            model="mistral-medium-2508",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a quiz question generator. Generate engaging multiple-choice questions."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            response_format=QuizQuestions,
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        # Get the parsed Pydantic object
-        quiz_data = response.choices[0].message.parsed
-        
-        if not quiz_data or not quiz_data.questions:
-            raise ValueError("No questions received from Mistral API")
-        
-        # Convert to list of dicts and ensure proper IDs
-        questions = []
-        for i, question in enumerate(quiz_data.questions):
-            question_dict = question.model_dump()
-            question_dict["id"] = i + 1
-            questions.append(question_dict)
-        
-        print(f"✅ Successfully generated {len(questions)} questions using structured output")
-        print(f"📝 First question: {questions[0]['question']}")
-        return questions
+        pool = await fill_question_bank(theme, num_questions)
+        questions = question_bank.sample(theme, num_questions)
+        QUESTION_SOURCES.inc(source="llm")
+        return questions if questions is not None else pool
         
     except Exception as e:
         print(f"❌ Error generating questions with Mistral: {e}")
-        print(f"   Falling back to default questions for theme: {theme}")
-        return random.sample(QUESTIONS, min(num_questions, len(QUESTIONS)))
+        print(f"   Falling back to stored questions for theme: {theme}")
+        QUESTION_SOURCES.inc(source="fallback")
+        return fallback_questions(theme, num_questions)
+
+async def stream_questions_with_mistral(theme: str, num_questions: int,
+                                       on_question: Callable[[dict], Awaitable[None]]) -> List[dict]:
+    """Stream questions from Mistral AI, handing each one to `on_question` as soon as it is parsed"""
+    
+    prompt = build_question_prompt(theme, num_questions) + """
+    Respond with a JSON object of the form:
+    {"questions": [{"id": 1, "question": "...", "options": ["...", "...", "...", "..."], "correct": 0}]}
+    """
+    
+    questions = []
+    outcome = "error"
+    start = time.perf_counter()
+    try:
+        print(f"🤖 Streaming {num_questions} questions from Mistral AI for theme: {theme}")
+        async with mistral_semaphore:
+            start = time.perf_counter()
+            stream = stream_quiz_questions(
+                get_llm_client(),
+                MISTRAL_MODEL,
+                build_question_messages(prompt),
+                question_model=QuizQuestion,
+                max_tokens=max(1000, 300 * num_questions),
+                on_usage=record_llm_usage,
+            )
+            skipped = []
+            async for question in stream:
+                if not await drop_near_duplicates([question]):
+                    skipped.append(question)
+                    continue
+                question["id"] = len(questions) + 1
+                questions.append(question)
+                await on_question(question)
+                if len(questions) >= num_questions:
+                    break
+            # Near duplicates still beat a session too short to play
+            for question in skipped[:min(num_questions, QUESTIONS_PER_SESSION) - len(questions)]:
+                question["id"] = len(questions) + 1
+                questions.append(question)
+                await on_question(question)
+        outcome = "ok"
+        print(f"✅ Successfully streamed {len(questions)} questions")
+        
+    except Exception as e:
+        print(f"❌ Error streaming questions from Mistral: {e}")
+    record_llm_call("stream", outcome, time.perf_counter() - start)
+    question_corpus.add(theme, questions)
+    
+    # Top up with the closest stored questions if the stream failed or came up short
+    QUESTION_SOURCES.inc(source="llm" if len(questions) >= num_questions else "fallback")
+    if len(questions) < num_questions:
+        print(f"   Falling back to stored questions for theme: {theme}")
+        asked = [q["question"] for q in questions]
+        for fallback in fallback_questions(theme, num_questions - len(questions), exclude=asked):
+            question = {**fallback, "id": len(questions) + 1}
+            questions.append(question)
+            await on_question(question)
+    
+    return questions
+
+async def generate_questions_with_mistral(theme: str, num_questions: int = 3,
+                                          on_question: Optional[Callable[[dict], Awaitable[None]]] = None) -> List[dict]:
+    """
+    Generate questions for a theme, served from the question bank when possible.
+    
+    With `on_question`, the model output is streamed instead and every question is
+    handed to the callback as soon as it is complete.
+    """
+    if on_question is not None:
+        return await stream_questions_with_mistral(theme, num_questions, on_question)
+    
+    cached = question_bank.get(theme, num_questions)
+    if cached is not None:
+        print(f"⚡ Question bank hit for theme: {theme}")
+        QUESTION_SOURCES.inc(source="bank")
+        return cached
+    
+    return await generate_uncached_questions(theme, num_questions)
+
+pregeneration_worker = PregenerationWorker(
+    question_bank,
+    theme_demand,
+    fill_question_bank,
+    num_questions=QUESTIONS_PER_SESSION,
+    interval=float(os.environ.get("PREGENERATE_INTERVAL_SECONDS", "30")),
+    themes_per_cycle=int(os.environ.get("PREGENERATE_THEMES_PER_CYCLE", "4")),
+    seed_themes=[t for t in os.environ.get("PREGENERATE_THEMES", "general knowledge").split(",") if t.strip()],
+    initial_delay=float(os.environ.get("PREGENERATE_INITIAL_DELAY_SECONDS", "30")),
+    min_demand=float(os.environ.get("PREGENERATE_MIN_DEMAND", "1.5")),
+)
 
-async def save_questions_to_db(session_id: str, questions: List[dict], theme: str):
-    """Save generated questions to Firestore database"""
+async def save_questions_to_db(session_id: str, questions: List[dict], theme: str, status: str = "ready",
+                               total_questions: Optional[int] = None):
+    """Save generated questions to the session database"""
     try:
         # Create a document for this session's questions
         session_doc = {
             "session_id": session_id,
             "theme": theme,
             "questions": questions,
-            "created_at": firestore.SERVER_TIMESTAMP,
-            "total_questions": len(questions)
+            "status": status,
+            "created_at": SERVER_TIMESTAMP,
+            "total_questions": total_questions if total_questions is not None else len(questions)
         }
         
         # Save to 'quiz_sessions' collection
-        doc_ref = db.collection('quiz_sessions').document(session_id)
-        doc_ref.set(session_doc)
+        await storage.set_session(session_id, session_doc, merge=True)
+        event_bus.publish(session_id, "session_changed")
         
-        print(f"✅ Successfully saved {len(questions)} questions to database for session {session_id}")
+        print(f"✅ Successfully saved {len(questions)} questions to {storage.name} for session {session_id}")
         return True
         
     except Exception as e:
         print(f"❌ Error saving questions to database: {e}")
         return False
 
+async def publish_question_to_db(session_id: str, question: dict):
+    """Append one streamed question to a pending session in the database"""
+    try:
+        await storage.append_question(session_id, question)
+        event_bus.publish(session_id, "session_changed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error publishing question to database: {e}")
+        return False
+
+# Session routing: requests about a session are served by the worker that owns it
+SESSION_PATH = re.compile(r"^/(?:next-question|scores|advance-question|session-status)/([^/]+)$|^/sessions/([^/]+)/events$")
+SESSION_BODY_PATHS = ("/add-user-to-session", "/answer")
+# Hop-by-hop and re-encoded headers that must not be copied from a forwarded response
+SKIPPED_RESPONSE_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection"}
+
+async def request_session_id(request: Request) -> Optional[str]:
+    match = SESSION_PATH.match(request.url.path)
+    if match:
+        return match.group(1) or match.group(2)
+    if request.method == "POST" and request.url.path in SESSION_BODY_PATHS:
+        try:
+            return json.loads(await request.body()).get("session_id")
+        except (ValueError, AttributeError):
+            return None
+    return None
+
+@app.middleware("http")
+async def route_to_session_owner(request: Request, call_next):
+    if not router.enabled or request.method == "OPTIONS":
+        return await call_next(request)
+    session_id = await request_session_id(request)
+    if session_id is None:
+        return await call_next(request)
+
+    hops = int(request.headers.get(ROUTED_HEADER, "0"))
+    owner = await router.owner(session_id, forwarded=hops > 0)
+    if owner == router.self_url:
+        return await call_next(request)
+
+    if hops >= MAX_HOPS:
+        return JSONResponse({"detail": "Session owner unavailable, try again"}, status_code=503)
+    if request.url.path.endswith("/events"):
+        # Event streams are long-lived: send the client to the owner instead of relaying
+        return RedirectResponse(f"{owner}{request.url.path}", status_code=307)
+
+    request.state.forwarded = True
+    try:
+        forwarded = await router.forward(owner, request.method, request.url.path, request.url.query,
+                                         request.headers, await request.body(), hops)
+    except (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError):
+        # The owner is stopping: it refused the connection, or closed a kept-alive one
+        # before reading the request (a stopping worker finishes the requests it has
+        # started), so the request was not handled and can be retried
+        return JSONResponse({"detail": "Session owner unavailable, try again"}, status_code=503)
+    except httpx.HTTPError as e:
+        print(f"⚠️ Forwarding {request.url.path} to {owner} failed: {e}")
+        return JSONResponse({"detail": "Session owner did not answer"}, status_code=502)
+    headers = {k: v for k, v in forwarded.headers.items() if k.lower() not in SKIPPED_RESPONSE_HEADERS}
+    return Response(content=forwarded.content, status_code=forwarded.status_code, headers=headers)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency per route template; declared last, so it also times forwarded requests"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - start
+        route = request.scope.get("route")
+        if route is not None:
+            path = route.path
+        else:
+            path = "forwarded" if getattr(request.state, "forwarded", False) else "unmatched"
+        HTTP_REQUESTS.observe(duration, method=request.method, route=path, status=str(status))
+        log_event("http", duration, method=request.method, route=path, status=status, path=request.url.path)
+
+@app.post("/internal/sessions/{session_id}/handover")
+async def hand_over_session(session_id: str, request: Request):
+    """Archive a session and release its lease so another worker can own it"""
+    if not router.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not router.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    await router.hand_over(session_id)
+    return {"released": True}
+
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms and backend call counters in the Prometheus text format"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/routing/stats")
+async def routing_stats():
+    """Ring membership, held leases and forwarding counters of this worker"""
+    return router.stats()
+
 # Endpoints
 @app.get("/")
 async def root():
     return {"message": "Game API is running!"}
 
+@app.get("/question-bank/stats")
+async def question_bank_stats():
+    """Hit/miss counters of the theme question bank cache"""
+    return {
+        **question_bank.stats(),
+        "generation": question_generation.stats(),
+        "pregeneration": pregeneration_worker.stats(),
+        "corpus": question_corpus.stats(),
+        "dedup": _duplicate_filter.stats() if _duplicate_filter is not None else None,
+    }
+
+async def generate_missing_questions(theme: str, num_questions: int, exclude: Iterable[str] = ()) -> List[dict]:
+    """
+    The questions the corpus could not provide, drawn from the theme's session pool.
+    Concurrent partial hits on a theme share one pool generation; stored questions
+    are the fallback on error.
+    """
+    exclude = list(exclude)
+    try:
+        questions = question_bank.sample(theme, QUESTIONS_PER_SESSION, count=num_questions, exclude=exclude)
+        if questions is None:
+            pool = await fill_question_bank(theme, QUESTIONS_PER_SESSION)
+            questions = question_bank.sample(theme, QUESTIONS_PER_SESSION, count=num_questions, exclude=exclude)
+            if questions is None:
+                questions = [q for q in pool if q["question"] not in exclude][:num_questions]
+        QUESTION_SOURCES.inc(source="llm")
+        return questions
+    except Exception as e:
+        print(f"❌ Error generating questions with Mistral: {e}")
+        QUESTION_SOURCES.inc(source="fallback")
+        return fallback_questions(theme, num_questions, exclude=exclude)
+
+async def complete_pending_session(session_id: str, theme: str, num_questions: int, stored: Iterable[dict] = ()):
+    """
+    Generate questions for a session created before its theme had a pool. The
+    questions already found in the corpus (`stored`) are kept: only the rest is generated.
+    """
+    questions = list(stored)
+    await save_questions_to_db(session_id, questions, theme, status="pending", total_questions=num_questions)
+    asked = {question_key(q["question"]) for q in questions}
+    
+    async def publish(question: dict):
+        # Generated questions can repeat the stored ones
+        if len(questions) >= num_questions or question_key(question["question"]) in asked:
+            return
+        asked.add(question_key(question["question"]))
+        question = {**question, "id": len(questions) + 1}
+        questions.append(question)
+        if STREAM_QUESTIONS:
+            # Question 1 becomes playable while the following ones are still generated
+            session = engine.get(session_id)
+            if session is not None:
+                engine.add_question(session, question)
+            await publish_question_to_db(session_id, question)
+    
+    missing = num_questions - len(questions)
+    if questions:
+        # Partial corpus hit: the session is already playable, so the gap comes from the shared pool
+        for question in await generate_missing_questions(theme, missing, exclude=[q["question"] for q in questions]):
+            await publish(question)
+    elif STREAM_QUESTIONS:
+        await generate_questions_with_mistral(theme, missing, on_question=publish)
+    else:
+        for question in await generate_uncached_questions(theme, missing):
+            await publish(question)
+    if len(questions) < num_questions:
+        asked_questions = [q["question"] for q in questions]
+        for question in fallback_questions(theme, num_questions - len(questions), exclude=asked_questions):
+            await publish(question)
+    
+    session = engine.get(session_id)
+    if session is not None:
+        engine.questions_ready(session, questions)
+    
+    await save_questions_to_db(session_id, questions, theme)
+
 @app.post("/create-session")
 async def create_session(request: CreateSessionRequest = CreateSessionRequest()):
-    """Create a new game session with AI-generated questions"""
-    session_id = str(uuid.uuid4())[:8]  # Short unique ID
-    
-    # Generate questions using Mistral AI
-    questions = await generate_questions_with_mistral(request.theme, num_questions=3)
-    
-    sessions[session_id] = {
-        "users": {},  # user_id -> {"name": str, "score": int}
-        "scores": {},  # user_id -> score
-        "current_question": 0,
-        "questions": questions,
-        "theme": request.theme
-    }
+    """Create a new game session, with questions from the pre-generated pool or the corpus when available"""
+    session_id = router.new_session_id()  # Short unique ID, owned by this worker
+    theme_demand.record(request.theme)
+    
+    questions = question_bank.get(request.theme, QUESTIONS_PER_SESSION)
+    source = "bank"
+    if questions is None:
+        # Assemble the quiz from stored questions first; the LLM only fills the gap
+        questions = question_corpus.search(request.theme, QUESTIONS_PER_SESSION)
+        source = "corpus"
+    status = "ready" if len(questions) >= QUESTIONS_PER_SESSION else "pending"
+    
+    engine.create(session_id, request.theme, list(questions), status, QUESTIONS_PER_SESSION)
+    if router.enabled:
+        run_in_background(router.owner(session_id))
+    
+    if status == "ready":
+        print(f"⚡ Question {source} hit for theme: {request.theme}")
+        QUESTION_SOURCES.inc(source=source)
+        run_in_background(save_questions_to_db(session_id, questions, request.theme))
+    else:
+        # Theme without enough questions: hand out the code now, generate the rest in the background
+        run_in_background(complete_pending_session(session_id, request.theme, QUESTIONS_PER_SESSION, questions))
     
-    # Save questions to database
-    await save_questions_to_db(session_id, questions, request.theme)
     # Returns unique session_id plus additional info
     return {
         "session_id": session_id,
         "theme": request.theme,
-        "total_questions": len(questions)
+        "total_questions": QUESTIONS_PER_SESSION,
+        "status": status
     }
 
+@app.get("/session-status/{session_id}")
+async def session_status(session_id: str):
+    """Whether the session's questions are ready or still being generated"""
+    session = await load_session(session_id)
+    return {
+        "session_id": session_id,
+        "status": session.status,
+        # The configured total: while pending, only part of the questions exist yet
+        "total_questions": session.total_questions,
+        "questions_ready": len(session.questions)
+    }
+
+async def load_session(session_id: str):
+    try:
+        return await engine.load(session_id)
+    except GameError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+T = TypeVar("T")
+
+async def play(action: Awaitable[T]) -> T:
+    """Run a game engine action, turning its refusals into HTTP errors"""
+    try:
+        return await action
+    except GameError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.post("/add-user-to-session")
+async def add_user_to_session(request: AddUserRequest):
+    """Add a player to a session; stored with the next snapshot"""
+    return await play(engine.add_player(request.session_id, request.name))
+
+@app.get("/next-question/{session_id}")
+async def next_question(session_id: str):
+    """The session's current question, without its answer; the engine hands out its serialized reply"""
+    return Response(await play(engine.next_question(session_id)), media_type="application/json")
+
+@app.post("/answer")
+async def submit_answer(request: AnswerRequest):
+    """Score one answer to the current question"""
+    return await play(engine.answer(request.session_id, request.user_id, request.answer))
+
+@app.get("/scores/{session_id}")
+async def get_scores(session_id: str):
+    """Live leaderboard, highest score first"""
+    return await play(engine.scores(session_id))
+
+@app.post("/advance-question/{session_id}")
+async def advance_question(session_id: str):
+    """Move the session to its next question (host only)"""
+    return await play(engine.advance(session_id))
+
+@app.get("/engine/stats")
+async def engine_stats():
+    """Resident sessions and snapshot counters of the game engine"""
+    return engine.stats()
+
+@app.get("/sessions/{session_id}/events")
+async def session_events(session_id: str):
+    """Server-sent events for a session: snapshot, player_joined, answers, question_advanced, leaderboard, resync"""
+    session = engine.get(session_id)
+    if session is None and await storage.get_session(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    # Sessions played here stream from the engine; others are watched in storage
+    snapshot = engine.snapshot(session) if session is not None else None
+    return StreamingResponse(
+        event_hub.subscribe(session_id, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/sessions/events/stats")
+async def session_events_stats():
+    """Subscriber and delivery counters of the session event streams and the event bus"""
+    return {**event_hub.stats(), "bus": event_bus.stats()}
+
 
 if __name__ == "__main__":
     import uvicorn
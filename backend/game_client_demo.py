@@ -42,7 +42,13 @@ def test_single_game(theme="general knowledge"):
         print(f"   📝 Session ID: {session_id}")
         print(f"   🎯 Theme: {session_data['theme']}")
         print(f"   📊 Questions: {session_data['total_questions']}\n")
-        
+
+        # Unseen themes are generated in the background
+        while session_data.get("status") == "pending":
+            print("   ⏳ Questions are being generated...")
+            time.sleep(1)
+            session_data = requests.get(f"{BASE_URL}/session-status/{session_id}").json()
+
         # 2. Add users
         print("2️⃣  Adding players...")
         players = ["Alice", "Bob"]
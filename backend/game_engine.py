@@ -0,0 +1,706 @@
+"""
+In-memory game engine: the authoritative state of the sessions played through this API
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from timer_wheel import TimerWheel
+
+
+class GameError(Exception):
+    """A game request that cannot be served; carries the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+# Rough per-object costs used to estimate resident memory
+_SESSION_OVERHEAD_BYTES = 2048
+_PLAYER_OVERHEAD_BYTES = 200
+
+
+def _questions_bytes(questions: List[dict]) -> int:
+    # Parsed dicts weigh several times their JSON text, plus their serialized replies
+    return 5 * len(json.dumps(questions))
+
+
+def _dumps(reply: dict) -> bytes:
+    # Same rendering as FastAPI's JSONResponse
+    return json.dumps(reply, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _finished_payload(question_number: int, total_questions: int) -> bytes:
+    return _dumps({
+        "finished": True,
+        "message": "Quiz finished - no more questions",
+        "question_number": question_number,
+        "total_questions": total_questions,
+    })
+
+
+class GameSession:
+    """
+    State of one quiz. Players are numbered in join order; their ids, names and
+    scores live in parallel lists and arrays indexed by that number.
+    """
+
+    __slots__ = (
+        "session_id", "theme", "status", "questions", "total_questions", "current_question",
+        "user_ids", "names", "scores", "answered", "answer_count", "by_id", "by_name",
+        "storage_ids", "persisted_players", "persisted_scores", "persisted_question", "persisted_status",
+        "changed_scores", "last_access", "questions_bytes", "names_bytes",
+        "opened_question", "deadline", "payloads", "finished_payload",
+    )
+
+    def __init__(self, session_id: str, theme: str, questions: List[dict], status: str, total_questions: int):
+        self.session_id = session_id
+        self.theme = theme
+        self.status = status
+        self.questions = questions
+        self.total_questions = total_questions
+        self.current_question = 0
+
+        self.user_ids: List[str] = []
+        self.names: List[str] = []
+        self.scores = array("i")
+        # One flag per player for the current question
+        self.answered = bytearray()
+        self.answer_count = 0
+        self.by_id: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+
+        # What the last snapshot wrote to storage
+        self.storage_ids: List[str] = []
+        self.persisted_players = 0
+        self.persisted_scores = array("i")
+        self.persisted_question = 0
+        self.persisted_status = status
+
+        # Players whose score changed since the last published leaderboard event
+        self.changed_scores: set = set()
+        self.last_access = time.monotonic()
+        self.questions_bytes = _questions_bytes(questions)
+        self.names_bytes = 0
+
+        # Answer window of the current question: opened when it is first served
+        self.opened_question = -1
+        self.deadline: Optional[float] = None
+
+        # Serialized replies of `next_question`, built as questions are stored
+        self.payloads: List[bytes] = []
+        self.finished_payload = b""
+        self.serialize_questions()
+
+    def _join(self, user_id: str, name: str, score: int = 0) -> int:
+        index = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.names.append(name)
+        self.scores.append(score)
+        self.answered.append(0)
+        self.by_id[user_id] = index
+        self.by_name[name] = index
+        self.names_bytes += len(name)
+        return index
+
+    def serialize_questions(self):
+        """
+        Serialize the replies of the questions added since the last call, without their
+        correct answer, and the reply once they have all been played. A question's reply
+        is kept without its closing brace so `time_left` can be appended.
+        """
+        for index in range(len(self.payloads), len(self.questions)):
+            question = self.questions[index]
+            self.payloads.append(_dumps({
+                "id": question.get("id"),
+                "question": question.get("question"),
+                "options": question.get("options", []),
+                "question_number": index + 1,
+                "total_questions": self.total_questions,
+            })[:-1])
+        self.finished_payload = _finished_payload(len(self.questions) + 1, self.total_questions)
+
+    @property
+    def closed(self) -> bool:
+        """The current question's answer window has run out"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "pending" and self.current_question >= len(self.questions)
+
+    def estimated_bytes(self) -> int:
+        return (
+            _SESSION_OVERHEAD_BYTES
+            + self.questions_bytes
+            + len(self.user_ids) * _PLAYER_OVERHEAD_BYTES
+            + self.names_bytes
+        )
+
+    @property
+    def dirty(self) -> bool:
+        return (
+            self.persisted_players < len(self.user_ids)
+            or self.persisted_scores != self.scores
+            or self.persisted_question != self.current_question
+            or self.persisted_status != self.status
+        )
+
+    def scoreboard(self) -> List[dict]:
+        order = sorted(range(len(self.user_ids)), key=self.scores.__getitem__, reverse=True)
+        return [{"user_id": self.user_ids[i], "name": self.names[i], "score": self.scores[i]} for i in order]
+
+
+class GameEngine:
+    """
+    Serves the game endpoints from memory and persists sessions in the background.
+
+    Requests only touch the in-memory `GameSession`. Every `snapshot_interval` seconds
+    the changed sessions are written to storage: new players as player records, score
+    changes as one batch of increments and the current question on the session
+    document, so the MCP server and other readers see the game. Sessions not resident
+    in this process are loaded from storage on first access.
+
+    With an `on_event(session_id, event, data)` callback, changes are also published
+    as live events: joins and question changes right away, answer counts and score
+    changes coalesced every `event_interval` seconds. With an `event_bus`, every
+    snapshot is announced to other instances, and changes they announce for a
+    resident session (players joining or scoring through the MCP server) are
+    applied in memory.
+
+    Resident memory is bounded. Every `sweep_interval` seconds, sessions untouched for
+    `idle_ttl` seconds, or finished and untouched for `finished_ttl` seconds, are
+    archived to storage and dropped from memory, and when the estimated size of all
+    resident sessions exceeds `memory_budget` bytes the least recently used ones go
+    too. An archived session is rehydrated by the next request for it.
+
+    With a `question_time_limit`, each question's answer window opens when the
+    question is first served and closes after that many seconds (or the question's
+    own `time_limit`): later answers are refused, a `question_closed` event reveals
+    the correct answer and, with `auto_advance`, the session moves to the next
+    question `reveal_interval` seconds later. The deadlines of all sessions are kept
+    on one `TimerWheel`.
+    """
+
+    def __init__(self, storage, snapshot_interval: float = 1.0, event_interval: float = 0.25,
+                 on_event: Optional[Callable[[str, str, dict], None]] = None,
+                 memory_budget: Optional[int] = None, idle_ttl: float = 1800.0,
+                 finished_ttl: float = 300.0, sweep_interval: float = 30.0, event_bus=None,
+                 question_time_limit: Optional[float] = None, reveal_interval: float = 5.0,
+                 auto_advance: bool = True, timers: Optional[TimerWheel] = None):
+        self.storage = storage
+        self.snapshot_interval = snapshot_interval
+        self.event_interval = event_interval
+        self.on_event = on_event
+        self.memory_budget = memory_budget
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.sweep_interval = sweep_interval
+        self.question_time_limit = question_time_limit
+        self.reveal_interval = reveal_interval
+        self.auto_advance = auto_advance
+        self.timers = timers or TimerWheel()
+        # Least recently used first
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._announce: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._sweep_now = False
+        self._approx_bytes = 0
+
+        self.snapshots = 0
+        self.snapshot_errors = 0
+        self.rehydrations = 0
+        self.evictions = {"idle": 0, "finished": 0, "memory": 0}
+        self.questions_closed = 0
+        self.auto_advances = 0
+
+        self.event_bus = event_bus
+        if event_bus is not None:
+            event_bus.subscribe(self._on_remote_event)
+
+    # Session lifecycle
+
+    def create(self, session_id: str, theme: str, questions: List[dict], status: str,
+               total_questions: int) -> GameSession:
+        session = GameSession(session_id, theme, questions, status, total_questions)
+        self._sessions[session_id] = session
+        self._grew(session.estimated_bytes())
+        return session
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """The resident session, without going to storage"""
+        return self._sessions.get(session_id)
+
+    async def load(self, session_id: str) -> GameSession:
+        """The session, loaded from storage when it is not resident"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            task = self._loading.get(session_id)
+            if task is None:
+                task = asyncio.create_task(self._load(session_id))
+                self._loading[session_id] = task
+                task.add_done_callback(lambda _: self._loading.pop(session_id, None))
+            session = await asyncio.shield(task)
+        if session is None:
+            raise GameError(404, "Session not found")
+        session.last_access = time.monotonic()
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    async def _load(self, session_id: str) -> Optional[GameSession]:
+        # Independent reads: one round trip instead of two
+        data, players = await asyncio.gather(self.storage.get_session(session_id),
+                                             self.storage.list_players(session_id))
+        if data is None:
+            return None
+        resident = self._sessions.get(session_id)
+        if resident is not None:
+            return resident
+
+        questions = data.get("questions", [])
+        session = GameSession(
+            session_id,
+            data.get("theme", "general knowledge"),
+            questions,
+            data.get("status", "ready"),
+            data.get("total_questions", len(questions)),
+        )
+        session.current_question = session.persisted_question = data.get("current_question", 0)
+        for player in players:
+            session._join(player["player_id"], player.get("pseudo"), player.get("score", 0))
+            session.storage_ids.append(player["player_id"])
+        session.persisted_players = len(session.user_ids)
+        session.persisted_scores = array("i", session.scores)
+        # Who already answered the current question when the session was archived
+        if data.get("answered_question") == session.current_question:
+            for user_id in data.get("answered_players", []):
+                index = session.by_id.get(user_id)
+                if index is not None:
+                    session.answered[index] = 1
+                    session.answer_count += 1
+        self._sessions[session_id] = session
+        self.rehydrations += 1
+        self._grew(session.estimated_bytes())
+        return session
+
+    def add_question(self, session: GameSession, question: dict):
+        """Append a streamed question to a pending session"""
+        session.questions.append(question)
+        session.questions_bytes += _questions_bytes([question])
+        session.serialize_questions()
+
+    def questions_ready(self, session: GameSession, questions: List[dict]):
+        session.questions = questions
+        session.questions_bytes = _questions_bytes(questions)
+        session.total_questions = len(questions)
+        session.status = "ready"
+        session.payloads = []
+        session.serialize_questions()
+        self._emit(session.session_id, "questions_ready", {"total_questions": session.total_questions})
+
+    # Game actions
+
+    async def add_player(self, session_id: str, name: str) -> dict:
+        session = await self.load(session_id)
+        if name in session.by_name:
+            raise GameError(400, f"Name '{name}' is already taken in this session")
+
+        user_id = str(uuid.uuid4())[:8]
+        session._join(user_id, name)
+        self._grew(_PLAYER_OVERHEAD_BYTES + len(name))
+        self._emit(session_id, "player_joined", {
+            "players": [{"player_id": user_id, "pseudo": name}],
+            "player_count": len(session.user_ids),
+        })
+        return {"user_id": user_id, "message": f"User {name} added to session {session_id}"}
+
+    async def next_question(self, session_id: str) -> bytes:
+        """The current question (or the finished state) as JSON, served from its pre-serialized reply"""
+        session = await self.load(session_id)
+        index = session.current_question
+
+        if index < len(session.questions):
+            if session.opened_question != index:
+                self._open_window(session, session.questions[index])
+            if session.deadline is not None:
+                time_left = round(max(0.0, session.deadline - time.monotonic()), 1)
+                return session.payloads[index] + b',"time_left":%r}' % time_left
+            return session.payloads[index] + b"}"
+        if session.status == "pending":
+            raise GameError(409, "Questions are still being generated - try again in a few seconds")
+        if index == len(session.questions):
+            return session.finished_payload
+        return _finished_payload(index + 1, session.total_questions)
+
+    async def answer(self, session_id: str, user_id: str, answer: int) -> dict:
+        session = await self.load(session_id)
+        player = session.by_id.get(user_id)
+        if player is None:
+            raise GameError(404, "User not found in session")
+
+        index = session.current_question
+        if index >= len(session.questions):
+            if session.status == "pending":
+                raise GameError(409, "Question not generated yet - try again in a few seconds")
+            raise GameError(400, "Quiz finished - no active question")
+        if session.answered[player]:
+            raise GameError(409, "Answer already submitted for this question")
+        if session.closed:
+            raise GameError(409, "Time is up for this question")
+
+        correct_answer = session.questions[index].get("correct")
+        correct = answer == correct_answer
+        session.answered[player] = 1
+        session.answer_count += 1
+        if correct:
+            session.scores[player] += 1
+            session.changed_scores.add(player)
+        self._announce.add(session_id)
+
+        return {"correct": correct, "correct_answer": correct_answer, "new_score": session.scores[player]}
+
+    async def scores(self, session_id: str) -> dict:
+        session = await self.load(session_id)
+        return {
+            "scores": session.scoreboard(),
+            "current_question": session.current_question + 1,
+            "total_questions": session.total_questions,
+        }
+
+    async def advance(self, session_id: str) -> dict:
+        session = await self.load(session_id)
+        if session.current_question >= len(session.questions):
+            if session.status == "pending":
+                raise GameError(409, "Next question not generated yet - try again in a few seconds")
+            return {"message": "Quiz already finished"}
+
+        self._advance(session)
+        if session.current_question >= len(session.questions):
+            return {"message": "Quiz finished"}
+        return {"message": f"Advanced to question {session.current_question + 1}"}
+
+    def _advance(self, session: GameSession):
+        if session.session_id in self._announce:
+            self._publish_answers(session)
+        self._reset_window(session)
+        session.current_question += 1
+        session.answered = bytearray(len(session.user_ids))
+        session.answer_count = 0
+        self._emit(session.session_id, "question_advanced", {
+            "current_question": session.current_question + 1,
+            "total_questions": session.total_questions,
+        })
+
+    # Question deadlines
+
+    def _open_window(self, session: GameSession, question: dict):
+        session.opened_question = session.current_question
+        time_limit = question.get("time_limit", self.question_time_limit)
+        if not time_limit:
+            return
+        session.deadline = time.monotonic() + time_limit
+        self.timers.schedule(session.session_id, time_limit, self._close_window,
+                             session.session_id, session.current_question)
+
+    def _reset_window(self, session: GameSession):
+        session.opened_question = -1
+        session.deadline = None
+        self.timers.cancel(session.session_id)
+
+    def _close_window(self, session_id: str, index: int):
+        session = self._sessions.get(session_id)
+        if session is None or session.current_question != index:
+            return
+        self.questions_closed += 1
+        if session_id in self._announce:
+            self._publish_answers(session)
+        self._emit(session_id, "question_closed", {
+            "question_number": index + 1,
+            "correct_answer": session.questions[index].get("correct"),
+            "answered": session.answer_count,
+            "player_count": len(session.user_ids),
+        })
+        if self.auto_advance:
+            self.timers.schedule(session_id, self.reveal_interval, self._auto_advance, session_id, index)
+
+    def _auto_advance(self, session_id: str, index: int):
+        session = self._sessions.get(session_id)
+        if session is None or session.current_question != index:
+            return
+        self.auto_advances += 1
+        self._advance(session)
+
+    def snapshot(self, session: GameSession) -> dict:
+        """Full state for a new live-event subscriber"""
+        return {
+            "session_id": session.session_id,
+            "status": session.status,
+            "current_question": session.current_question + 1,
+            "total_questions": session.total_questions,
+            "answered": session.answer_count,
+            "time_left": (
+                round(max(0.0, session.deadline - time.monotonic()), 1) if session.deadline is not None else None
+            ),
+            "scores": [
+                {"player_id": entry["user_id"], "pseudo": entry["name"], "score": entry["score"]}
+                for entry in session.scoreboard()
+            ],
+        }
+
+    # Live events
+
+    def _emit(self, session_id: str, event: str, data: dict):
+        if self.on_event is not None:
+            self.on_event(session_id, event, data)
+
+    def _publish_answers(self, session: GameSession):
+        """One coalesced event for the answers and score changes since the last one"""
+        self._announce.discard(session.session_id)
+        self._emit(session.session_id, "answers", {
+            "question_number": session.current_question + 1,
+            "answered": session.answer_count,
+            "player_count": len(session.user_ids),
+        })
+        if session.changed_scores:
+            changes = [
+                {"player_id": session.user_ids[i], "pseudo": session.names[i], "score": session.scores[i]}
+                for i in sorted(session.changed_scores)
+            ]
+            session.changed_scores.clear()
+            self._emit(session.session_id, "leaderboard", {"changes": changes})
+
+    # Background snapshots
+
+    async def persist(self, session: GameSession):
+        """Write what changed in a session since its last snapshot"""
+        session_id = session.session_id
+
+        # Players who joined since the last snapshot get their storage records, in one batched write
+        joined = []
+        new_players = [
+            {"player_id": session.user_ids[index], "pseudo": session.names[index], "score": 0}
+            for index in range(session.persisted_players, len(session.user_ids))
+        ]
+        if new_players:
+            for record, _ in await self.storage.add_players(session_id, new_players):
+                # A pseudo already registered through the MCP server keeps its record; only our points are added
+                session.storage_ids.append(record["player_id"])
+                session.persisted_scores.append(0)
+                session.persisted_players += 1
+                joined.append({"player_id": record["player_id"], "pseudo": record["pseudo"]})
+        if joined:
+            self._publish(session_id, "player_joined", {"players": joined})
+
+        # Score changes as increments, so concurrent writers (the MCP server) are not overwritten
+        deltas = []
+        for index in range(session.persisted_players):
+            delta = session.scores[index] - session.persisted_scores[index]
+            if delta:
+                deltas.append((index, delta))
+        if deltas:
+            increments = {session.storage_ids[index]: delta for index, delta in deltas}
+            await self.storage.apply_score_increments(session_id, increments)
+            for index, delta in deltas:
+                session.persisted_scores[index] += delta
+            self._publish(session_id, "scores_changed", {"increments": increments})
+
+        current_question, status = session.current_question, session.status
+        if current_question != session.persisted_question or status != session.persisted_status:
+            await self.storage.set_session(session_id, {"current_question": current_question, "status": status},
+                                           merge=True)
+            if current_question != session.persisted_question:
+                self._publish(session_id, "question_advanced", {"current_question": current_question})
+            else:
+                self._publish(session_id, "session_changed")
+            session.persisted_question = current_question
+            session.persisted_status = status
+
+    # Changes made by other instances
+
+    def _publish(self, session_id: str, event: str, data: Optional[dict] = None):
+        if self.event_bus is not None:
+            self.event_bus.publish(session_id, event, data)
+
+    def _on_remote_event(self, session_id: str, event: str, data: dict):
+        """Apply a change another instance made to a session resident here"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        if event == "player_joined":
+            for player in data.get("players", []):
+                if player["player_id"] in session.by_id or player["pseudo"] in session.by_name:
+                    continue
+                up_to_date = session.persisted_players == len(session.user_ids)
+                session._join(player["player_id"], player["pseudo"])
+                if up_to_date:
+                    # Already stored by the other instance
+                    session.storage_ids.append(player["player_id"])
+                    session.persisted_scores.append(0)
+                    session.persisted_players += 1
+                # Otherwise the next snapshot finds its record by pseudo and maps it
+                self._emit(session_id, "player_joined", {
+                    "players": [player],
+                    "player_count": len(session.user_ids),
+                })
+
+        elif event == "scores_changed":
+            for player_id, amount in data.get("increments", {}).items():
+                index = session.by_id.get(player_id)
+                if index is None or index >= session.persisted_players or session.storage_ids[index] != player_id:
+                    index = next((i for i, stored in enumerate(session.storage_ids) if stored == player_id), None)
+                if index is None:
+                    continue
+                # Written by the other instance: in memory and already persisted
+                session.scores[index] += amount
+                session.persisted_scores[index] += amount
+                session.changed_scores.add(index)
+                self._announce.add(session_id)
+
+        elif event == "question_advanced":
+            current_question = data.get("current_question", session.current_question)
+            if current_question != session.current_question:
+                self._reset_window(session)
+                session.current_question = session.persisted_question = current_question
+                session.answered = bytearray(len(session.user_ids))
+                session.answer_count = 0
+                self._emit(session_id, "question_advanced", {
+                    "current_question": current_question + 1,
+                    "total_questions": session.total_questions,
+                })
+
+    async def persist_all(self):
+        for session in list(self._sessions.values()):
+            if not session.dirty:
+                continue
+            try:
+                await self.persist(session)
+                self.snapshots += 1
+            except Exception as e:
+                self.snapshot_errors += 1
+                print(f"❌ Error persisting session {session.session_id}: {e}")
+
+    # Bounded residency
+
+    def resident_bytes(self) -> int:
+        return sum(session.estimated_bytes() for session in self._sessions.values())
+
+    def _grew(self, size: int):
+        # Running estimate between sweeps; each sweep recomputes it from the sessions
+        self._approx_bytes += size
+        if self.memory_budget is not None and self._approx_bytes > self.memory_budget:
+            self._sweep_now = True
+
+    async def archive(self, session: GameSession) -> bool:
+        """Write a session out and drop it from memory; False if it changed meanwhile"""
+        session_id = session.session_id
+        await self.persist(session)
+        answered = [session.user_ids[i] for i, flag in enumerate(session.answered) if flag]
+        await self.storage.set_session(session_id, {
+            "answered_question": session.current_question,
+            "answered_players": answered,
+        }, merge=True)
+        # A request may have touched the session while it was being written
+        if session.dirty or session.answer_count != len(answered):
+            return False
+        if self._sessions.get(session_id) is session:
+            del self._sessions[session_id]
+            self.timers.cancel(session_id)
+        self._announce.discard(session_id)
+        return True
+
+    async def sweep(self):
+        """Archive expired sessions, then least recently used ones while over the memory budget"""
+        now = time.monotonic()
+        for session in list(self._sessions.values()):
+            if session.status == "pending":
+                continue  # Still receiving generated questions
+            idle = now - session.last_access
+            reason = None
+            if session.finished and idle >= self.finished_ttl:
+                reason = "finished"
+            elif idle >= self.idle_ttl:
+                reason = "idle"
+            if reason is not None:
+                await self._evict(session, reason)
+
+        resident = self._approx_bytes = self.resident_bytes()
+        if self.memory_budget is None:
+            return
+        for session in list(self._sessions.values()):
+            if resident <= self.memory_budget:
+                break
+            if session.status == "pending":
+                continue
+            size = session.estimated_bytes()
+            if await self._evict(session, "memory"):
+                resident -= size
+        self._approx_bytes = resident
+
+    async def _evict(self, session: GameSession, reason: str) -> bool:
+        try:
+            if await self.archive(session):
+                self.evictions[reason] += 1
+                return True
+        except Exception as e:
+            print(f"❌ Error archiving session {session.session_id}: {e}")
+        return False
+
+    async def _run(self):
+        last_snapshot = last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(self.event_interval)
+            for session_id in list(self._announce):
+                session = self._sessions.get(session_id)
+                if session is None:
+                    self._announce.discard(session_id)
+                else:
+                    self._publish_answers(session)
+            if time.monotonic() - last_snapshot >= self.snapshot_interval:
+                last_snapshot = time.monotonic()
+                await self.persist_all()
+            if self._sweep_now or time.monotonic() - last_sweep >= self.sweep_interval:
+                self._sweep_now = False
+                last_sweep = time.monotonic()
+                await self.sweep()
+
+    def start(self):
+        self.timers.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        await self.timers.stop()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.persist_all()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "sessions": len(self._sessions),
+            "players": sum(len(s.user_ids) for s in self._sessions.values()),
+            "estimated_bytes": self.resident_bytes(),
+            "memory_budget_bytes": self.memory_budget,
+            "dirty_sessions": sum(1 for s in self._sessions.values() if s.dirty),
+            "snapshots": self.snapshots,
+            "snapshot_errors": self.snapshot_errors,
+            "rehydrations": self.rehydrations,
+            "evictions": dict(self.evictions),
+            "questions_closed": self.questions_closed,
+            "auto_advances": self.auto_advances,
+            "timers": self.timers.stats(),
+        }
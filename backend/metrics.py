@@ -0,0 +1,224 @@
+"""
+Latency histograms and counters in the Prometheus text format, plus structured logs
+
+The game API serves `REGISTRY.render()` on `GET /metrics` and the MCP server on its
+`/metrics` route. Besides the per-endpoint and per-tool latencies, every storage call
+and every LLM call is timed, so a latency budget can be split between the request
+handling and the backends it waits on.
+
+Timed events are also written as one JSON line each to stdout: all of them with
+METRICS_LOG=true, otherwise only those slower than METRICS_LOG_SLOW_MS.
+This file is kept identical in backend/ and mcpserver/.
+"""
+
+import asyncio
+import functools
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LOG_ALL = os.environ.get("METRICS_LOG", "false").lower() == "true"
+LOG_SLOW_SECONDS = float(os.environ.get("METRICS_LOG_SLOW_MS", "1000")) / 1000
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.label_names), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed seconds per label set"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count above the last bucket], sum
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        counts[index] += 1
+        self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(tuple(labels.get(name, "") for name in self.label_names), ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                bucket_labels = _labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {self._sums[key]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A value read from `read()` at every scrape"""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value:g}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        return self._add(Gauge(name, help, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request", ("method", "route", "status"))
+MCP_TOOL_CALLS = REGISTRY.histogram(
+    "mcp_tool_duration_seconds", "Time to run an MCP tool", ("tool", "outcome"))
+STORAGE_CALLS = REGISTRY.histogram(
+    "storage_operation_duration_seconds", "Time of a session storage call", ("backend", "operation", "kind", "outcome"))
+LLM_CALLS = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Time of a question generation call to the LLM", ("model", "mode", "outcome"),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens used by LLM calls", ("model", "kind"))
+QUESTION_SOURCES = REGISTRY.counter(
+    "question_sets_total", "Question sets served, by where they came from (bank, corpus, llm, fallback)", ("source",))
+
+
+def log_event(event: str, duration: Optional[float] = None, **fields):
+    """One JSON line per timed event: always with METRICS_LOG=true, else only when slow"""
+    if not LOG_ALL and (duration is None or duration < LOG_SLOW_SECONDS):
+        return
+    record = {"ts": round(time.time(), 3), "event": event}
+    if duration is not None:
+        record["duration_ms"] = round(duration * 1000, 2)
+    record.update(fields)
+    print(json.dumps(record, separators=(",", ":"), default=str), flush=True)
+
+
+# Storage calls that only read
+_READ_OPERATIONS = {"get_session", "find_player", "get_player", "list_players"}
+
+
+class InstrumentedStorage:
+    """Wraps a session storage backend and times each of its async calls"""
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._storage, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+        backend = self._storage.name
+        kind = "read" if name in _READ_OPERATIONS else "write"
+
+        @functools.wraps(attribute)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await attribute(*args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                STORAGE_CALLS.observe(duration, backend=backend, operation=name, kind=kind, outcome=outcome)
+                log_event("storage", duration, backend=backend, operation=name, outcome=outcome)
+
+        # Later lookups find the wrapper without going through __getattr__
+        setattr(self, name, timed)
+        return timed
+
+
+def timed_tool(function: Callable) -> Callable:
+    """
+    Time an MCP tool. Tools report problems as plain-text replies rather than raising,
+    so a reply that is not a JSON object counts as `rejected`.
+    """
+
+    @functools.wraps(function)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await function(*args, **kwargs)
+            outcome = "ok" if isinstance(result, str) and result.startswith("{") else "rejected"
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            MCP_TOOL_CALLS.observe(duration, tool=function.__name__, outcome=outcome)
+            log_event("mcp_tool", duration, tool=function.__name__, outcome=outcome)
+
+    return timed
@@ -0,0 +1,137 @@
+"""
+Background pre-generation of question pools for recently requested themes
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Awaitable, Callable, Collection, Dict, Iterable, List
+
+from question_bank import QuestionBankCache, normalize_theme
+
+
+class ThemeDemand:
+    """Exponentially decaying request counts per normalized theme"""
+
+    def __init__(self, half_life_seconds: float = 1800, max_themes: int = 256):
+        self.half_life_seconds = half_life_seconds
+        self.max_themes = max_themes
+        self._scores: Dict[str, float] = {}
+        self._updated: Dict[str, float] = {}
+
+    def _decayed(self, theme: str, now: float) -> float:
+        elapsed = now - self._updated.get(theme, now)
+        return self._scores.get(theme, 0.0) * math.pow(0.5, elapsed / self.half_life_seconds)
+
+    def record(self, theme: str, weight: float = 1.0):
+        key = normalize_theme(theme)
+        now = time.monotonic()
+        self._scores[key] = self._decayed(key, now) + weight
+        self._updated[key] = now
+
+        if len(self._scores) > self.max_themes:
+            coldest = min(self._scores, key=lambda t: self._decayed(t, now))
+            del self._scores[coldest]
+            del self._updated[coldest]
+
+    def weights(self) -> Dict[str, float]:
+        now = time.monotonic()
+        return {theme: self._decayed(theme, now) for theme in self._scores}
+
+    def choose(self, count: int, min_weight: float = 0.0, always: Collection[str] = ()) -> List[str]:
+        """
+        Pick up to `count` distinct themes, each drawn with probability proportional to its
+        demand, among those with at least `min_weight` of demand and the `always` ones
+        (even when they are no longer tracked).
+        """
+        weights = {**dict.fromkeys(always, 1.0), **self.weights()}
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys)
+        keyed = sorted(
+            (random.random() ** (1.0 / w), theme) for theme, w in weights.items()
+            if w > 0 and (w >= min_weight or theme in always)
+        )
+        return [theme for _, theme in reversed(keyed[-count:])] if count > 0 else []
+
+
+class PregenerationWorker:
+    """
+    Keeps question pools topped up so create-session rarely waits on the LLM.
+
+    Every `interval` seconds, the first time `initial_delay` seconds after start, the
+    worker draws themes weighted by recent demand and refills the pools that are
+    missing, about to expire or already served too often. Only themes whose decayed
+    request count reaches `min_demand` are drawn, besides the seed themes, so one-off
+    themes never cost a generation.
+    """
+
+    def __init__(
+        self,
+        bank: QuestionBankCache,
+        demand: ThemeDemand,
+        fill: Callable[[str, int], Awaitable[object]],
+        num_questions: int = 3,
+        interval: float = 30.0,
+        themes_per_cycle: int = 4,
+        seed_themes: Iterable[str] = (),
+        initial_delay: float = 30.0,
+        min_demand: float = 1.5,
+    ):
+        self.bank = bank
+        self.demand = demand
+        self.fill = fill
+        self.num_questions = num_questions
+        self.interval = interval
+        self.themes_per_cycle = themes_per_cycle
+        self.initial_delay = initial_delay
+        self.min_demand = min_demand
+        self.seed_themes = {normalize_theme(theme) for theme in seed_themes}
+        self.refills = 0
+        self.failures = 0
+        self._task = None
+
+        for theme in self.seed_themes:
+            self.demand.record(theme, weight=0.5)
+
+    async def run_once(self) -> int:
+        refilled = 0
+        for theme in self.demand.choose(self.themes_per_cycle, self.min_demand, self.seed_themes):
+            if not self.bank.needs_refill(theme, self.num_questions, refresh_before=self.interval * 2):
+                continue
+            try:
+                await self.fill(theme, self.num_questions)
+                refilled += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Pre-generation failed for theme '{theme}': {e}")
+        self.refills += refilled
+        return refilled
+
+    async def _run(self):
+        # Start-up traffic goes first; the first cycle also sees its demand
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "refills": self.refills,
+            "failures": self.failures,
+            "running": self._task is not None,
+            "min_demand": self.min_demand,
+            "demand": {theme: round(w, 3) for theme, w in self.demand.weights().items()},
+        }
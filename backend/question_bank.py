@@ -0,0 +1,128 @@
+"""
+Theme-keyed question bank cache for AI-generated quiz questions
+"""
+
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_theme(theme: Optional[str]) -> str:
+    """Normalize a theme so "Football", " football " and "FOOTBALL" share a bank"""
+    return " ".join((theme or "general knowledge").lower().split())
+
+
+class _Bank:
+    """A pool of questions for one theme, with per-question serve counts"""
+
+    __slots__ = ("questions", "served", "expires_at")
+
+    def __init__(self, questions: List[dict], expires_at: float):
+        self.questions = questions
+        self.served = [0] * len(questions)
+        self.expires_at = expires_at
+
+
+class QuestionBankCache:
+    """
+    LRU + TTL cache of question pools keyed by (normalized theme, question count).
+
+    Each entry holds a pool of `bank_size` questions generated in a single LLM call.
+    Every lookup samples a fresh set out of the pool, preferring the least served
+    questions, so hosts picking a popular theme get varied quizzes without a round
+    trip to the model.
+    """
+
+    def __init__(self, max_themes: int = 128, ttl_seconds: float = 3600, bank_size: int = 15):
+        self.max_themes = max_themes
+        self.ttl_seconds = ttl_seconds
+        self.bank_size = bank_size
+        self._banks: "OrderedDict[Tuple[str, int], _Bank]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pool_size(self, num_questions: int) -> int:
+        """Number of questions to generate when filling a bank for `num_questions`"""
+        return max(self.bank_size, num_questions)
+
+    def get(self, theme: str, num_questions: int) -> Optional[List[dict]]:
+        """Return a sampled question set for the theme, or None on a miss"""
+        questions = self.sample(theme, num_questions)
+        if questions is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return questions
+
+    def sample(self, theme: str, num_questions: int, count: Optional[int] = None,
+               exclude: Iterable[str] = ()) -> Optional[List[dict]]:
+        """
+        Like `get`, without touching the hit/miss counters. With `count`, that many
+        questions are drawn from the pool for `num_questions`, leaving out the
+        question texts in `exclude`.
+        """
+        key = (normalize_theme(theme), num_questions)
+        bank = self._banks.get(key)
+
+        if bank is not None and bank.expires_at <= time.monotonic():
+            del self._banks[key]
+            self.evictions += 1
+            bank = None
+
+        if bank is None:
+            return None
+
+        self._banks.move_to_end(key)
+        return self._sample(bank, num_questions if count is None else count, set(exclude))
+
+    def put(self, theme: str, num_questions: int, questions: List[dict]):
+        """Store a question pool for the theme"""
+        key = (normalize_theme(theme), num_questions)
+        self._banks[key] = _Bank([dict(q) for q in questions], time.monotonic() + self.ttl_seconds)
+        self._banks.move_to_end(key)
+        while len(self._banks) > self.max_themes:
+            self._banks.popitem(last=False)
+            self.evictions += 1
+
+    def needs_refill(self, theme: str, num_questions: int, refresh_before: float = 60.0, max_serves: int = 3) -> bool:
+        """True when the pool is missing, expires within `refresh_before` seconds or is worn out"""
+        bank = self._banks.get((normalize_theme(theme), num_questions))
+        if bank is None:
+            return True
+        if bank.expires_at - time.monotonic() < refresh_before:
+            return True
+        return min(bank.served) >= max_serves
+
+    def clear(self):
+        self._banks.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "themes": len(self._banks),
+            "max_themes": self.max_themes,
+            "bank_size": self.bank_size,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    @staticmethod
+    def _sample(bank: _Bank, num_questions: int, exclude: set = frozenset()) -> List[dict]:
+        # Least-served questions first, random order among equally served ones
+        order = sorted((i for i in range(len(bank.questions)) if bank.questions[i]["question"] not in exclude),
+                       key=lambda i: (bank.served[i], random.random()))
+        picked = order[:num_questions]
+        random.shuffle(picked)
+
+        questions = []
+        for position, index in enumerate(picked):
+            bank.served[index] += 1
+            question = dict(bank.questions[index])
+            question["id"] = position + 1
+            questions.append(question)
+        return questions
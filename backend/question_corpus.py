@@ -0,0 +1,199 @@
+"""
+Local corpus of every generated question, searchable by theme through an inverted index
+"""
+
+import asyncio
+import heapq
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from question_bank import normalize_theme
+
+_WORD = re.compile(r"[^\W_]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been by did do does for from how in is it its of on or that the "
+    "these this those to was were what when where which who whom whose why with".split()
+)
+
+# A question's text counts for half as much as its theme when matching a theme
+TEXT_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> Set[str]:
+    """Lowercase terms without stopwords, with plural "s" dropped so "planets" finds "planet" """
+    terms = set()
+    for word in _WORD.findall(text.lower()):
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.add(word)
+    return terms
+
+
+def question_key(text: str) -> str:
+    """Questions differing only in case, spacing or punctuation share a key"""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class _Index:
+    """Stored questions and the postings of their theme terms and question text terms"""
+
+    def __init__(self):
+        self.records: List[dict] = []
+        self.served: List[int] = []
+        self.keys: Dict[str, int] = {}
+        self.themes: Dict[str, int] = {}
+        self.theme_postings: Dict[str, Set[int]] = {}
+        self.text_postings: Dict[str, Set[int]] = {}
+
+    def add(self, record: dict) -> bool:
+        key = question_key(record["question"])
+        if not key or key in self.keys:
+            return False
+        doc = len(self.records)
+        self.records.append(record)
+        self.served.append(0)
+        self.keys[key] = doc
+        self.themes[record["theme"]] = self.themes.get(record["theme"], 0) + 1
+        for term in tokenize(record["theme"]):
+            self.theme_postings.setdefault(term, set()).add(doc)
+        for term in tokenize(record["question"]):
+            self.text_postings.setdefault(term, set()).add(doc)
+        return True
+
+
+class QuestionCorpus:
+    """
+    Every question the LLM produced, kept in an append-only JSON lines file at `path`
+    (in memory only without one) and indexed by the terms of its theme and its text.
+
+    `search` scores the stored questions against the terms of a theme: each term
+    counts by its inverse document frequency, in full when it appears in the theme the
+    question was generated for and by `TEXT_WEIGHT` when it only appears in the question
+    text. A question matches when it covers at least `min_match` of the theme's total
+    weight; terms the corpus has never seen weigh the most, so a theme it knows little
+    about finds nothing. Among matches, the best covering and least served come first.
+    Questions differing only in case, spacing or punctuation are stored once.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_match: float = 0.5):
+        self.path = path
+        self.min_match = min_match
+        self._index = _Index()
+        self.loaded = path is None
+        self.searches = 0
+        self.matched = 0
+
+    def __len__(self) -> int:
+        return len(self._index.records)
+
+    def _read(self) -> _Index:
+        index = _Index()
+        if not os.path.exists(self.path):
+            return index
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    index.add(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue  # A line cut short by a crash
+        return index
+
+    async def load(self):
+        """Read the corpus file in a worker thread; questions added meanwhile are kept"""
+        if self.path is None:
+            return
+        index = await asyncio.to_thread(self._read)
+        for record in self._index.records:
+            index.add(record)
+        self._index = index
+        self.loaded = True
+        print(f"📚 Loaded {len(index.records)} questions from the question corpus")
+
+    def add(self, theme: str, questions: Iterable[dict]) -> int:
+        """Store new questions generated for the theme; returns how many were new"""
+        added = []
+        for question in questions:
+            record = {
+                "theme": normalize_theme(theme),
+                "question": question["question"],
+                "options": list(question["options"]),
+                "correct": question["correct"],
+                "added_at": round(time.time()),
+            }
+            if self._index.add(record):
+                added.append(record)
+        if added and self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in added)
+        return len(added)
+
+    def search(self, theme: str, limit: int, min_match: Optional[float] = None,
+               exclude: Iterable[str] = ()) -> List[dict]:
+        """
+        Up to `limit` stored questions matching the theme, numbered from 1. With
+        `min_match=0` any question sharing a term with the theme qualifies.
+        """
+        self.searches += 1
+        index = self._index
+        terms = tokenize(normalize_theme(theme))
+        if not terms or not index.records or limit <= 0:
+            return []
+        min_match = self.min_match if min_match is None else min_match
+
+        total_docs = len(index.records)
+        total_weight = 0.0
+        scores: Dict[int, float] = {}
+        for term in terms:
+            in_theme = index.theme_postings.get(term, set())
+            in_text = index.text_postings.get(term, set())
+            weight = math.log(1 + total_docs / max(1, len(in_theme | in_text)))
+            total_weight += weight
+            for doc in in_theme:
+                scores[doc] = scores.get(doc, 0.0) + weight
+            for doc in in_text - in_theme:
+                scores[doc] = scores.get(doc, 0.0) + weight * TEXT_WEIGHT
+
+        excluded = {question_key(text) for text in exclude}
+        candidates = [
+            (-round(score / total_weight, 2), index.served[doc], random.random(), doc)
+            for doc, score in scores.items()
+            if score > 0 and score / total_weight >= min_match
+        ]
+        questions = []
+        # Only the best ones are sorted; skipped exclusions are made up for
+        for *_, doc in heapq.nsmallest(limit + len(excluded), candidates):
+            record = index.records[doc]
+            if question_key(record["question"]) in excluded:
+                continue
+            index.served[doc] += 1
+            questions.append({
+                "id": len(questions) + 1,
+                "question": record["question"],
+                "options": list(record["options"]),
+                "correct": record["correct"],
+            })
+            if len(questions) >= limit:
+                break
+        if questions:
+            self.matched += 1
+        return questions
+
+    def stats(self) -> Dict[str, object]:
+        index = self._index
+        return {
+            "questions": len(index.records),
+            "themes": len(index.themes),
+            "terms": len(index.theme_postings.keys() | index.text_postings.keys()),
+            "searches": self.searches,
+            "matched": self.matched,
+            "min_match": self.min_match,
+            "loaded": self.loaded,
+            "path": self.path,
+        }
@@ -0,0 +1,244 @@
+"""
+Near-duplicate detection of quiz questions with MinHash signatures
+
+A question is reduced to the set of its content terms plus the terms of its correct
+answer, so paraphrases of the same fact ("What is the capital of France?", "Which city
+is the capital of France?") share most of their set. MinHash estimates the Jaccard
+similarity of two sets from the fraction of equal positions in their signatures, and
+every comparison is a vectorized NumPy operation over whole signature matrices.
+
+Run as a script, it deduplicates the question corpus file offline:
+    python question_dedup.py question_corpus.jsonl --threshold 0.7 --write
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from question_corpus import tokenize
+
+# Largest prime below 2**31: hashed values and coefficients stay below it, so a*x + b fits in 64 bits
+_PRIME = (1 << 31) - 1
+
+
+def question_terms(question: dict) -> List[str]:
+    """Content terms of the question text, and the correct answer's terms marked as such"""
+    terms = sorted(tokenize(question.get("question", "")))
+    options = question.get("options") or []
+    correct = question.get("correct")
+    if isinstance(correct, int) and 0 <= correct < len(options):
+        terms.extend(sorted("=" + term for term in tokenize(str(options[correct]))))
+    return terms
+
+
+class MinHasher:
+    """`num_perm` universal hash functions (a*x + b) mod p, drawn from a fixed seed"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, questions: Sequence[dict], chunk_size: int = 4096) -> np.ndarray:
+        """One row of `num_perm` minimum hashes per question; all-max rows for empty questions"""
+        signatures = np.full((len(questions), self.num_perm), _PRIME, dtype=np.uint32)
+        for start in range(0, len(questions), chunk_size):
+            chunk = questions[start:start + chunk_size]
+            hashes, owners = [], []
+            for row, question in enumerate(chunk):
+                terms = question_terms(question)
+                hashes.extend(zlib.crc32(term.encode("utf-8")) % _PRIME for term in terms)
+                owners.extend([row] * len(terms))
+            if not hashes:
+                continue
+            # Every term hashed by every function at once, then the minimum per question
+            permuted = (np.asarray(hashes, dtype=np.uint64)[:, None] * self._a + self._b) % _PRIME
+            owners = np.asarray(owners)
+            starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            signatures[start + owners[starts]] = np.minimum.reduceat(permuted, starts, axis=0)
+        return signatures
+
+
+def similarity(signatures: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of every row of `signatures` with every row of `others`"""
+    result = np.zeros((len(signatures), len(others)))
+    if not len(signatures) or not len(others):
+        return result
+    # Rows are compared in chunks so the boolean temporary stays around 16 MB
+    step = max(1, (1 << 24) // (len(others) * signatures.shape[1]))
+    for start in range(0, len(signatures), step):
+        chunk = signatures[start:start + step]
+        equal = (chunk[:, None, :] == others[None, :, :]).sum(axis=2, dtype=np.uint16)
+        result[start:start + step] = equal / signatures.shape[1]
+    return result
+
+
+def find_duplicates(signatures: np.ndarray, threshold: float = 0.7, bands: int = 16,
+                    max_bucket: int = 1000) -> np.ndarray:
+    """
+    Indexes of the rows that are near duplicates of an earlier row, over a whole corpus.
+
+    Locality-sensitive hashing: signatures are cut into `bands` bands and rows equal
+    on a whole band become candidates. Each candidate is checked against the first
+    and the previous row of its bucket, so the number of comparisons grows linearly
+    with the corpus instead of quadratically. Buckets larger than `max_bucket` (empty
+    or boilerplate questions) are skipped.
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    empty = (signatures == _PRIME).all(axis=1)
+    # Odd multipliers fold a band into one 64-bit key; a collision only adds a candidate
+    mixers = np.random.default_rng(0).integers(1, 1 << 62, size=rows, dtype=np.uint64) | np.uint64(1)
+    pairs = []
+    for band in range(bands):
+        block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (block * mixers).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+        bucket = np.repeat(np.arange(len(starts)), sizes)
+        first = order[starts][bucket]
+        previous = np.r_[order[0], order[:-1]]
+        keep = (order != first) & (sizes[bucket] <= max_bucket) & ~empty[order]
+        later = order[keep]
+        pairs.append(np.stack([first[keep], later], axis=1))
+        keep_previous = keep & (previous != first)
+        pairs.append(np.stack([previous[keep_previous], order[keep_previous]], axis=1))
+    if not pairs:
+        return np.empty(0, dtype=np.int64)
+
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    if not len(pairs):
+        return np.empty(0, dtype=np.int64)
+    earlier, later = pairs.min(axis=1), pairs.max(axis=1)
+    similar = np.empty(len(pairs), dtype=bool)
+    for start in range(0, len(pairs), 100_000):
+        window = slice(start, start + 100_000)
+        similar[window] = (signatures[earlier[window]] == signatures[later[window]]).mean(axis=1) >= threshold
+    return np.unique(later[similar])
+
+
+class DuplicateFilter:
+    """
+    Rejects generated questions that are near duplicates of another question of the
+    same batch or of one of the last `recent_size` questions it accepted.
+
+    Accepted questions are remembered in a ring buffer of signatures, so repeated
+    generations for a theme keep bringing new facts instead of paraphrases. `filter`
+    may be called from worker threads; calls are serialized.
+    """
+
+    def __init__(self, threshold: float = 0.7, recent_size: int = 10_000, num_perm: int = 64):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self._recent = np.empty((recent_size, num_perm), dtype=np.uint32)
+        self._recent_count = 0
+        self._next = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def filter(self, questions: List[dict], keep_at_least: int = 0) -> List[dict]:
+        """
+        The questions to keep, in order; they become recent questions. When fewer than
+        `keep_at_least` pass, the least similar of the rejected ones are kept as well.
+        """
+        if not questions:
+            return []
+        with self._lock:
+            return self._filter(questions, keep_at_least)
+
+    def _filter(self, questions: List[dict], keep_at_least: int) -> List[dict]:
+        signatures = self.hasher.signatures(questions)
+        recent = similarity(signatures, self._recent[:self._recent_count])
+        within = similarity(signatures, signatures)
+        empty = (signatures == _PRIME).all(axis=1)
+        closest_recent = recent.max(axis=1) if recent.shape[1] else np.zeros(len(questions))
+
+        kept = []
+        for i in range(len(questions)):
+            if empty[i] or (closest_recent[i] < self.threshold and not (within[i, kept] >= self.threshold).any()):
+                kept.append(i)
+        if len(kept) < keep_at_least:
+            # The rejected questions least similar to anything already kept or recent
+            rejected = [i for i in range(len(questions)) if i not in kept]
+            rejected.sort(key=lambda i: max(closest_recent[i], within[i, kept].max(initial=0.0)))
+            kept = sorted(kept + rejected[:keep_at_least - len(kept)])
+        self.accepted += len(kept)
+        self.rejected += len(questions) - len(kept)
+        self._remember(signatures[kept])
+        return [questions[i] for i in kept]
+
+    def _remember(self, signatures: np.ndarray):
+        size = len(self._recent)
+        for signature in signatures[-size:]:
+            self._recent[self._next] = signature
+            self._next = (self._next + 1) % size
+            self._recent_count = min(self._recent_count + 1, size)
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "recent": self._recent_count,
+            "threshold": self.threshold,
+        }
+
+
+def read_corpus(path: str) -> List[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def deduplicate(records: List[dict], threshold: float = 0.7, hasher: Optional[MinHasher] = None) -> List[int]:
+    """Indexes of the records to drop: near duplicates of an earlier record"""
+    signatures = (hasher or MinHasher()).signatures(records)
+    return find_duplicates(signatures, threshold).tolist()
+
+
+def write_corpus(path: str, records: Iterable[dict]):
+    """Replace the corpus file atomically"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=os.environ.get("QUESTION_CORPUS_PATH", "question_corpus.jsonl"))
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("QUESTION_DEDUP_THRESHOLD", "0.7")))
+    parser.add_argument("--write", action="store_true", help="Rewrite the corpus without its near duplicates")
+    parser.add_argument("--show", type=int, default=5, help="Duplicates to print")
+    args = parser.parse_args()
+
+    records = read_corpus(args.path)
+    start = time.perf_counter()
+    duplicates = deduplicate(records, args.threshold)
+    print(f"🔎 {len(duplicates)} near duplicates among {len(records)} questions "
+          f"in {time.perf_counter() - start:.2f}s")
+    for index in duplicates[:args.show]:
+        print(f"   - {records[index]['question']}")
+
+    if args.write and duplicates:
+        dropped = set(duplicates)
+        write_corpus(args.path, (record for i, record in enumerate(records) if i not in dropped))
+        print(f"💾 Rewrote {args.path} with {len(records) - len(dropped)} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Incremental parsing of streamed quiz questions
+"""
+
+import json
+from typing import AsyncIterator, Callable, List, Optional
+
+
+class QuestionStreamParser:
+    """
+    Incremental JSON scanner that yields each question object as soon as it is complete.
+
+    The model streams `{"questions": [{...}, {...}]}` (or a bare `[{...}]`) in arbitrary
+    chunks. The parser tracks string/escape state and the stack of open containers, and
+    emits every object that closes directly inside an array.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._stack: List[str] = []
+        self._object_start: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self._length = 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        completed = []
+        for char in chunk:
+            position = self._length
+            self._buffer.append(char)
+            self._length += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack and self._stack[-1] == "[" and self._object_start is None:
+                    self._object_start = position
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if (char == "}" and self._object_start is not None
+                        and self._stack and self._stack[-1] == "["):
+                    text = "".join(self._buffer[self._object_start:position + 1])
+                    self._object_start = None
+                    try:
+                        completed.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        pass
+        return completed
+
+
+def _chunk_text(chunk) -> str:
+    """Text delta of a streamed completion chunk (`CompletionEvent` in mistralai)"""
+    data = getattr(chunk, "data", chunk)
+    content = data.choices[0].delta.content
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    # Content may come as a list of chunks with a `text` attribute
+    return "".join(getattr(part, "text", "") for part in content)
+
+
+async def stream_quiz_questions(client, model: str, messages: List[dict], question_model=None,
+                                max_tokens: int = 1000, temperature: float = 0.7,
+                                on_usage: Optional[Callable[[object], None]] = None) -> AsyncIterator[dict]:
+    """
+    Stream a JSON completion and yield each question dict as soon as it is parsed.
+
+    `question_model` is an optional Pydantic model used to validate every question;
+    questions that fail validation are skipped. `on_usage` receives the token usage
+    reported with the last chunk, if the stream is read to the end.
+    """
+    parser = QuestionStreamParser()
+    response = await client.chat.stream_async(
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"},
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+    async for chunk in response:
+        usage = getattr(getattr(chunk, "data", chunk), "usage", None)
+        if usage is not None and on_usage is not None:
+            on_usage(usage)
+        for question in parser.feed(_chunk_text(chunk)):
+            if question_model is not None:
+                try:
+                    question = question_model.model_validate(question).model_dump()
+                except Exception as e:
+                    print(f"⚠️  Skipping malformed streamed question: {e}")
+                    continue
+            yield question
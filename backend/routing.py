@@ -0,0 +1,217 @@
+"""
+Session-affine routing across several workers
+"""
+
+import asyncio
+import bisect
+import hashlib
+import hmac
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+# Header carried by forwarded requests: how many times the request was forwarded
+ROUTED_HEADER = "x-session-routed"
+SECRET_HEADER = "x-routing-secret"
+MAX_HOPS = 2
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring: adding or removing a node only moves the keys next to it"""
+
+    def __init__(self, nodes: List[str], replicas: int = 64):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class SessionRouter:
+    """
+    Gives each session a single owning worker.
+
+    The preferred owner of a session is its node on a consistent hash ring of
+    `nodes` (the base URLs of every worker). Ownership itself is a lease in the
+    session storage, renewed while the session is resident and released when it
+    is archived or the worker shuts down. A request reaching a worker that is not
+    the preferred owner is forwarded there. When the preferred owner finds the
+    lease held by another worker, typically after `nodes` changed, it asks that
+    worker to hand the session over: the holder archives it and releases the
+    lease, and the new owner rehydrates it from storage. A worker that crashed
+    loses its leases after `lease_ttl` seconds.
+
+    With fewer than two nodes, routing is disabled and every session is local.
+    Otherwise `secret` is required: workers present it to each other's /internal
+    endpoints.
+    """
+
+    def __init__(self, self_url: str, nodes: List[str], storage,
+                 archive: Callable[[str], Awaitable[None]], is_resident: Callable[[str], bool],
+                 lease_ttl: float = 30.0, secret: Optional[str] = None):
+        self.self_url = self_url.rstrip("/")
+        self.storage = storage
+        self.archive = archive
+        self.is_resident = is_resident
+        self.lease_ttl = lease_ttl
+        self.secret = secret or None
+        self.ring = HashRing([node.rstrip("/") for node in nodes]) if len(nodes) > 1 else None
+        if self.ring is not None and self.secret is None:
+            raise ValueError("ROUTING_NODES lists several workers but ROUTING_SECRET is not set.")
+        # session_id -> time the lease was last written
+        self._leases: Dict[str, float] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.forwarded = 0
+        self.handovers_requested = 0
+        self.handovers_served = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ring is not None
+
+    def preferred_owner(self, session_id: str) -> str:
+        return self.ring.node_for(session_id) if self.ring is not None else self.self_url
+
+    def new_session_id(self) -> str:
+        """A fresh session code whose preferred owner is this worker"""
+        for _ in range(64):
+            session_id = str(uuid.uuid4())[:8]
+            if self.preferred_owner(session_id) == self.self_url:
+                return session_id
+        return session_id
+
+    def _holds(self, session_id: str) -> bool:
+        written = self._leases.get(session_id)
+        return written is not None and time.monotonic() - written < self.lease_ttl / 2
+
+    async def _acquire(self, session_id: str) -> str:
+        holder = await self.storage.acquire_lease(session_id, self.self_url, self.lease_ttl)
+        if holder == self.self_url:
+            self._leases[session_id] = time.monotonic()
+        return holder
+
+    async def owner(self, session_id: str, forwarded: bool = False) -> str:
+        """
+        The worker that serves the session: this one (claiming the lease if needed)
+        or the URL of another worker to forward to.
+
+        A `forwarded` request was sent here by a worker that prefers this one: while
+        workers disagree on `nodes` (during a rolling restart), sending it back on this
+        worker's own preference could bounce it until MAX_HOPS, so the lease decides.
+        """
+        if not self.enabled or self._holds(session_id):
+            return self.self_url
+
+        preferred = self.preferred_owner(session_id)
+        if preferred != self.self_url:
+            if not forwarded:
+                return preferred
+            return await self._acquire(session_id)
+
+        holder = await self._acquire(session_id)
+        if holder != self.self_url and await self._request_handover(holder, session_id):
+            holder = await self._acquire(session_id)
+        return holder
+
+    async def _request_handover(self, holder: str, session_id: str) -> bool:
+        self.handovers_requested += 1
+        try:
+            response = await self.client.post(
+                f"{holder}/internal/sessions/{session_id}/handover", headers=self._internal_headers()
+            )
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            print(f"⚠️ Handover of session {session_id} from {holder} failed: {e}")
+            return False
+
+    async def hand_over(self, session_id: str):
+        """Archive a session this worker holds and release its lease to the requester"""
+        if self.is_resident(session_id):
+            await self.archive(session_id)
+        self._leases.pop(session_id, None)
+        await self.storage.release_lease(session_id, self.self_url)
+        self.handovers_served += 1
+
+    def authorized(self, headers) -> bool:
+        """Whether a request to an /internal endpoint comes from another worker"""
+        if not self.enabled or self.secret is None:
+            return False
+        return hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self.secret.encode())
+
+    def _internal_headers(self) -> Dict[str, str]:
+        return {SECRET_HEADER: self.secret} if self.secret is not None else {}
+
+    # Forwarding
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        return self._client
+
+    async def forward(self, target: str, method: str, path: str, query: str, headers, body: bytes,
+                      hops: int) -> httpx.Response:
+        self.forwarded += 1
+        forwarded_headers = {
+            key: value for key, value in headers.items() if key.lower() not in ("host", "content-length")
+        }
+        forwarded_headers[ROUTED_HEADER] = str(hops + 1)
+        url = f"{target}{path}" + (f"?{query}" if query else "")
+        return await self.client.request(method, url, headers=forwarded_headers, content=body)
+
+    # Lease upkeep
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            for session_id in list(self._leases):
+                try:
+                    if self.is_resident(session_id):
+                        await self._acquire(session_id)
+                    else:
+                        # Archived by the engine: let the next request's worker claim it
+                        self._leases.pop(session_id, None)
+                        await self.storage.release_lease(session_id, self.self_url)
+                except Exception as e:
+                    print(f"❌ Error renewing lease of session {session_id}: {e}")
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._renew())
+
+    async def stop(self):
+        """Release every lease; call after the sessions were persisted"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for session_id in list(self._leases):
+            try:
+                await self.storage.release_lease(session_id, self.self_url)
+            except Exception as e:
+                print(f"❌ Error releasing lease of session {session_id}: {e}")
+        self._leases.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "self": self.self_url,
+            "nodes": self.ring.nodes if self.ring is not None else [self.self_url],
+            "leases": len(self._leases),
+            "forwarded": self.forwarded,
+            "handovers_requested": self.handovers_requested,
+            "handovers_served": self.handovers_served,
+        }
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from fake_llm import FakeMistral, fake_questions
+from question_stream import QuestionStreamParser, stream_quiz_questions
+
+MESSAGES = [{"role": "user", "content": "Generate 5 multiple choice quiz questions about space."}]
+
+
+def feed_in_chunks(text, sizes):
+    parser = QuestionStreamParser()
+    questions = []
+    position = 0
+    for size in sizes:
+        questions.extend(parser.feed(text[position:position + size]))
+        position += size
+    questions.extend(parser.feed(text[position:]))
+    return questions
+
+
+def collect(client, **kwargs):
+    async def run():
+        return [question async for question in stream_quiz_questions(client, "fake", MESSAGES, **kwargs)]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 10_000])
+def test_parser_yields_every_question_whatever_the_chunking(chunk_size):
+    questions = fake_questions("space", 5)
+    text = json.dumps({"questions": questions}, indent=2)
+
+    assert feed_in_chunks(text, [chunk_size] * (len(text) // chunk_size + 1)) == questions
+
+
+def test_parser_with_random_chunks():
+    questions = fake_questions("history", 8)
+    text = json.dumps({"questions": questions})
+    rng = random.Random(0)
+    for _ in range(20):
+        sizes = [rng.randint(1, 40) for _ in range(len(text))]
+        assert feed_in_chunks(text, sizes) == questions
+
+
+def test_parser_emits_a_question_as_soon_as_it_closes():
+    parser = QuestionStreamParser()
+    assert parser.feed('{"questions": [{"id": 1, "question": "a?", "options": ["x"], "correct": 0}') == [
+        {"id": 1, "question": "a?", "options": ["x"], "correct": 0}
+    ]
+    assert parser.feed(', {"id": 2, "question": "b?"') == []
+    assert parser.feed(', "options": [], "correct": 1}]}') == [
+        {"id": 2, "question": "b?", "options": [], "correct": 1}
+    ]
+
+
+def test_parser_ignores_brackets_and_escaped_quotes_inside_strings():
+    question = {"id": 1, "question": 'Is "}" or "]" a \\"bracket\\"? {[', "options": ["}", "]", "\\", "{"], "correct": 2}
+    text = json.dumps([question])
+
+    assert feed_in_chunks(text, [1] * len(text)) == [question]
+
+
+def test_parser_accepts_a_bare_array():
+    questions = fake_questions("art", 3)
+
+    assert QuestionStreamParser().feed(json.dumps(questions)) == questions
+
+
+def test_parser_skips_a_malformed_question_and_keeps_the_next_ones():
+    text = '{"questions": [{"id": 1, "question": "ok?"}, {"id": 2, "question": bad}, {"id": 3, "question": "ok?"}]}'
+
+    assert [q["id"] for q in feed_in_chunks(text, [5] * len(text))] == [1, 3]
+
+
+def test_parser_drops_a_question_cut_short():
+    text = '{"questions": [{"id": 1, "question": "ok?"}, {"id": 2, "question": "cut'
+
+    assert QuestionStreamParser().feed(text) == [{"id": 1, "question": "ok?"}]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 16, 512])
+def test_stream_through_fake_client(chunk_size):
+    client = FakeMistral(latency=0, chunk_size=chunk_size)
+    usages = []
+
+    questions = collect(client, on_usage=usages.append)
+
+    assert questions == fake_questions("space", 5)
+    assert len(usages) == 1 and usages[0].completion_tokens > 0
+
+
+def test_first_question_arrives_before_the_stream_ends():
+    client = FakeMistral(latency=0, chunk_size=8)
+    total_chunks = len(client.chat._completion_text(MESSAGES)) // 8 + 1
+    read = []
+    stream_async = client.chat.stream_async
+
+    async def counting_stream(**kwargs):
+        response = await stream_async(**kwargs)
+
+        async def chunks():
+            async for chunk in response:
+                read.append(chunk)
+                yield chunk
+        return chunks()
+
+    client.chat.stream_async = counting_stream
+
+    async def first_question():
+        async for question in stream_quiz_questions(client, "fake", MESSAGES):
+            return question, len(read)
+
+    question, chunks_read = asyncio.run(first_question())
+
+    assert question == fake_questions("space", 5)[0]
+    assert chunks_read < total_chunks / 3
+
+
+def test_malformed_stream_through_fake_client():
+    pydantic = pytest.importorskip("pydantic")
+
+    class QuizQuestion(pydantic.BaseModel):
+        id: int
+        question: str
+        options: list
+        correct: int
+
+    good = fake_questions("space", 2)
+    text = json.dumps({"questions": [good[0], {"id": "x", "question": None}, good[1]]})[:-2]
+    text += ', {"id": 4, "question": "never clo'
+    client = FakeMistral(latency=0, chunk_size=3)
+    client.chat._completion_text = lambda messages: text
+
+    assert collect(client, question_model=QuizQuestion) == good
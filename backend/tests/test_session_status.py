@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+# Read by game_api at import: in-memory storage, the fake LLM, nothing stored or pre-generated
+os.environ.update({
+    "STORAGE_BACKEND": "memory",
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_LATENCY_SECONDS": "0.3",
+    "QUESTION_CORPUS_PATH": "",
+    "PREGENERATE_THEMES": "",
+    "WARM_UP_ON_START": "false",
+    "STREAM_QUESTIONS": "true",
+    "QUESTIONS_PER_SESSION": "5",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import game_api  # noqa: E402
+
+
+def test_status_reports_the_configured_total_while_pending():
+    with TestClient(game_api.app) as client:
+        created = client.post("/create-session", json={"theme": "deep sea creatures"}).json()
+        assert created["status"] == "pending" and created["total_questions"] == 5
+
+        statuses = []
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            status = client.get(f"/session-status/{created['session_id']}").json()
+            statuses.append(status)
+            if status["status"] == "ready":
+                break
+            time.sleep(0.02)
+
+    pending = [status for status in statuses if status["status"] == "pending"]
+    assert pending, "the session was never observed pending"
+    assert all(status["total_questions"] == 5 for status in statuses)
+    assert all(status["questions_ready"] < 5 for status in pending)
+    assert statuses[-1] == {
+        "session_id": created["session_id"], "status": "ready", "total_questions": 5, "questions_ready": 5,
+    }
@@ -0,0 +1,17 @@
+import filecmp
+import os
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MCPSERVER_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "mcpserver")
+
+
+@pytest.mark.parametrize("name", ["storage.py", "event_bus.py", "metrics.py"])
+def test_shared_module_is_identical_in_the_mcp_server(name):
+    if not os.path.isdir(MCPSERVER_DIR):
+        pytest.skip("mcpserver/ is not checked out next to backend/")
+
+    assert filecmp.cmp(os.path.join(BACKEND_DIR, name), os.path.join(MCPSERVER_DIR, name), shallow=False), (
+        f"backend/{name} and mcpserver/{name} differ: change both copies together"
+    )
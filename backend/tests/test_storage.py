@@ -0,0 +1,155 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from storage import MemoryStorage, SQLiteStorage
+
+PLAYERS = 50
+ANSWERS_PER_PLAYER = 10
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    storage = MemoryStorage() if request.param == "memory" else SQLiteStorage(str(tmp_path / "sessions.db"))
+    yield storage
+    storage.close()
+
+
+async def seed(storage, session_id="s1", players=PLAYERS):
+    await storage.set_session(session_id, {"session_id": session_id, "questions": [], "current_question": 0})
+    created = await storage.add_players(session_id, [
+        {"player_id": f"p{i}", "pseudo": f"player{i}", "score": 0} for i in range(players)
+    ])
+    assert all(was_created for _, was_created in created)
+
+
+def scores(storage, session_id="s1"):
+    players = asyncio.run(storage.list_players(session_id))
+    return {player["player_id"]: player["score"] for player in players}
+
+
+def test_concurrent_increments_lose_no_points(storage):
+    async def run():
+        await seed(storage)
+        return await asyncio.gather(*(
+            storage.increment_score("s1", f"p{i}", 1)
+            for _ in range(ANSWERS_PER_PLAYER) for i in range(PLAYERS)
+        ))
+
+    returned = asyncio.run(run())
+
+    assert scores(storage) == {f"p{i}": ANSWERS_PER_PLAYER for i in range(PLAYERS)}
+    # Every increment saw its own result: each player got scores 1..N exactly once
+    for i in range(PLAYERS):
+        assert sorted(returned[i::PLAYERS]) == list(range(1, ANSWERS_PER_PLAYER + 1))
+
+
+def test_concurrent_batched_increments(storage):
+    async def run():
+        await seed(storage)
+        await asyncio.gather(*(
+            storage.apply_score_increments("s1", {f"p{i}": 2 for i in range(start, PLAYERS, 3)})
+            for start in range(3) for _ in range(ANSWERS_PER_PLAYER)
+        ))
+
+    asyncio.run(run())
+
+    assert scores(storage) == {f"p{i}": 2 * ANSWERS_PER_PLAYER for i in range(PLAYERS)}
+
+
+def test_concurrent_joins_with_the_same_pseudo_create_one_player(storage):
+    async def run():
+        await storage.set_session("s1", {"session_id": "s1"})
+        return await asyncio.gather(*(
+            storage.add_player("s1", {"player_id": f"id{i}", "pseudo": "alice", "score": 0}) for i in range(20)
+        ))
+
+    results = asyncio.run(run())
+
+    assert sum(created for _, created in results) == 1
+    assert len({record["player_id"] for record, _ in results}) == 1
+    assert len(scores(storage)) == 1
+
+
+def test_sqlite_runs_in_wal_mode(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteStorage(path).close()
+
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_connections_share_increments(tmp_path):
+    """Several processes on one file: each thread has its own connection and event loop"""
+    path = str(tmp_path / "sessions.db")
+    setup = SQLiteStorage(path)
+    asyncio.run(seed(setup))
+    errors = []
+
+    def worker():
+        storage = SQLiteStorage(path)
+        try:
+            async def answer():
+                await asyncio.gather(*(storage.increment_score("s1", f"p{i}", 1) for i in range(PLAYERS)))
+            for _ in range(ANSWERS_PER_PLAYER // 2):
+                asyncio.run(answer())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            storage.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert scores(setup) == {f"p{i}": 4 * (ANSWERS_PER_PLAYER // 2) for i in range(PLAYERS)}
+    setup.close()
+
+
+def test_sqlite_waits_for_the_write_lock_off_the_event_loop(tmp_path):
+    """Another process holding the write lock stalls the call, not the event loop"""
+    path = str(tmp_path / "sessions.db")
+    storage = SQLiteStorage(path)
+    asyncio.run(seed(storage, players=1))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        increment = asyncio.create_task(storage.increment_score("s1", "p0", 1))
+        ticks = 0
+        while ticks < 10:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not increment.done()
+        other.execute("COMMIT")
+        return await increment
+
+    assert asyncio.run(run()) == 1
+    other.close()
+    storage.close()
+
+
+def test_batched_increments_for_an_unknown_player_fail_and_write_nothing(storage):
+    async def run():
+        await seed(storage, players=2)
+        with pytest.raises(KeyError):
+            await storage.apply_score_increments("s1", {"p0": 1, "ghost": 1, "p1": 1})
+
+    asyncio.run(run())
+
+    assert scores(storage) == {"p0": 0, "p1": 0}
+
+
+def test_increment_for_an_unknown_player_fails(storage):
+    async def run():
+        await seed(storage, players=1)
+        with pytest.raises(KeyError):
+            await storage.increment_score("s1", "ghost", 1)
+
+    asyncio.run(run())
+
+    assert scores(storage) == {"p0": 0}
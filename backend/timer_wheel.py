@@ -0,0 +1,130 @@
+"""
+Hashed timer wheel: deadlines for any number of keys, driven by a single task
+"""
+
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class _Timer:
+    __slots__ = ("due", "callback", "args")
+
+    def __init__(self, due: int, callback: Callable, args: tuple):
+        self.due = due
+        self.callback = callback
+        self.args = args
+
+
+class TimerWheel:
+    """
+    Schedules one callback per key on a ring of `slots` buckets, each covering `tick`
+    seconds.
+
+    A timer due in n ticks goes into bucket n % slots and fires once the wheel has
+    turned that far, so scheduling and cancelling are O(1) and each tick only visits
+    one bucket, whatever the number of timers. Deadlines are rounded up to the next
+    tick, so a timer fires up to one tick after its deadline, plus however long the
+    event loop takes to resume the wheel task. The wheel is turned by one task, which
+    sleeps until the next tick deadline, or until something is scheduled while the
+    wheel is empty. Callbacks run on that task and must not block.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 512):
+        self.tick = tick
+        self.slots = slots
+        self._buckets: List[Dict[Hashable, _Timer]] = [{} for _ in range(slots)]
+        self._timers: Dict[Hashable, _Timer] = {}
+        self._origin = time.monotonic()
+        # Last tick whose bucket was processed
+        self._turned = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.fired = 0
+        self.cancelled = 0
+
+    def _now(self) -> float:
+        return (time.monotonic() - self._origin) / self.tick
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable, *args):
+        """Call `callback(*args)` in `delay` seconds, replacing any timer of `key`"""
+        self.cancel(key, count=False)
+        if not self._timers:
+            # Nothing pending: no bucket between the last turn and now needs a visit
+            self._turned = max(self._turned, int(self._now()))
+        due = max(self._turned + 1, math.ceil(self._now() + delay / self.tick))
+        timer = _Timer(due, callback, args)
+        self._timers[key] = timer
+        self._buckets[due % self.slots][key] = timer
+        if self._wake is not None:
+            self._wake.set()
+
+    def cancel(self, key: Hashable, count: bool = True) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        del self._buckets[timer.due % self.slots][key]
+        if count:
+            self.cancelled += 1
+        return True
+
+    def pending(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def _advance(self, now_tick: int):
+        first = self._turned + 1
+        # A late turn never needs to visit a bucket twice
+        for tick in range(first, min(now_tick, first + self.slots - 1) + 1):
+            bucket = self._buckets[tick % self.slots]
+            if not bucket:
+                continue
+            expired = [(key, timer) for key, timer in bucket.items() if timer.due <= now_tick]
+            for key, timer in expired:
+                del bucket[key]
+                del self._timers[key]
+            for key, timer in expired:
+                self.fired += 1
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    print(f"❌ Error in timer {key}: {e}")
+        self._turned = max(self._turned, now_tick)
+
+    async def _run(self):
+        while True:
+            if not self._timers:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            # Sleep until the next tick deadline, not for a whole tick: the time spent
+            # in callbacks and in waking up late is not added to the next turn
+            target = self._turned + 1
+            await asyncio.sleep(max(0.0, (target - self._now()) * self.tick))
+            self._advance(max(target, int(self._now())))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            if self._timers:
+                self._wake.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "pending": len(self._timers),
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "tick_seconds": self.tick,
+            "slots": self.slots,
+        }
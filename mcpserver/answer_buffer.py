@@ -0,0 +1,261 @@
+"""
+Write-behind buffering of submitted answers
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+
+
+class SubmitRejected(Exception):
+    """The answer cannot be accepted (unknown session or player, no active question)"""
+
+
+class _QuestionState:
+    __slots__ = ("questions", "current_index", "status", "fetched_at")
+
+    def __init__(self, session_data: dict):
+        self.questions = session_data.get('questions', [])
+        self.current_index = session_data.get('current_question', 0)
+        self.status = session_data.get('status')
+        self.fetched_at = time.monotonic()
+
+
+class _SessionState:
+    """What the buffer knows of one session: its current question and its players"""
+
+    __slots__ = ("question", "players")
+
+    def __init__(self):
+        self.question: Optional[_QuestionState] = None
+        # pseudo -> player record with the score as this process knows it
+        self.players: Dict[str, dict] = {}
+
+
+class AnswerBuffer:
+    """
+    Scores answers in memory and writes score increments to storage in batches.
+
+    `submit` checks the answer against a copy of the session's current question read
+    from storage at most `question_ttl` seconds ago, and acknowledges it right away:
+    an answer can be scored against the previous question for that long after the
+    question advanced on an instance this one hears nothing from. Score increments
+    accumulate per player and are flushed with one batched write per session once
+    `max_pending` points are buffered, every `flush_interval` seconds, when the
+    session's question advances, before scores are read and at shutdown. Flushed
+    increments are announced on the `event_bus`; changes other instances announce
+    update the cached questions and scores. The state of at most `max_sessions`
+    sessions is kept, least recently used first out; a session's state is dropped once
+    its quiz is finished.
+    """
+
+    def __init__(self, storage_getter: Callable, max_pending: int = 200,
+                 flush_interval: float = 0.5, question_ttl: float = 0.25, session_cache=None,
+                 event_bus=None, max_sessions: int = 1024):
+        self.storage_getter = storage_getter
+        self.session_cache = session_cache
+        self.event_bus = event_bus
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.question_ttl = question_ttl
+        self.max_sessions = max_sessions
+
+        self._sessions: "OrderedDict[str, _SessionState]" = OrderedDict()
+        # session_id -> player_id -> score increment not yet written
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._pending_points = 0
+        self._flusher: Optional[asyncio.Task] = None
+
+        self.accepted = 0
+        self.flushes = 0
+        self.flushed_writes = 0
+        self.evictions = 0
+
+        if event_bus is not None:
+            event_bus.subscribe(self._on_event)
+
+    def _session(self, session_id: str) -> _SessionState:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _SessionState()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _knows(self, session_id: str, pseudo: str) -> bool:
+        session = self._sessions.get(session_id)
+        return session is not None and pseudo in session.players
+
+    async def _question_state(self, session_id: str) -> _QuestionState:
+        state = self._session(session_id).question
+        if state is not None and time.monotonic() - state.fetched_at < self.question_ttl:
+            return state
+
+        # Read past the session cache: `question_ttl` alone bounds how stale the question is
+        session_data = await self.storage_getter().get_session(session_id)
+        if session_data is None:
+            self._sessions.pop(session_id, None)
+            raise SubmitRejected(f"Session '{session_id}' not found")
+
+        fresh = _QuestionState(session_data)
+        if state is not None and fresh.current_index != state.current_index:
+            await self.question_advanced(session_id)
+        self._session(session_id).question = fresh
+        return fresh
+
+    async def _player(self, session_id: str, pseudo: str) -> dict:
+        player = self._session(session_id).players.get(pseudo)
+        if player is None:
+            player = await self.storage_getter().find_player(session_id, pseudo)
+            if player is None:
+                raise SubmitRejected(f"User '{pseudo}' not found in session '{session_id}'")
+            self._session(session_id).players[pseudo] = player
+        return player
+
+    async def submit(self, session_id: str, pseudo: str, answer_index: int) -> dict:
+        if self._knows(session_id, pseudo):
+            state = await self._question_state(session_id)
+        else:
+            # Independent reads; a missing session is reported before a missing player
+            state, player = await asyncio.gather(self._question_state(session_id),
+                                                 self._player(session_id, pseudo), return_exceptions=True)
+            for outcome in (state, player):
+                if isinstance(outcome, BaseException):
+                    raise outcome
+
+        if state.current_index >= len(state.questions):
+            if state.status == 'pending':
+                raise SubmitRejected("Question not generated yet - try again in a few seconds")
+            # Nothing left to score in this session: forget it once its points are written
+            await self.flush(session_id)
+            self._sessions.pop(session_id, None)
+            raise SubmitRejected("Quiz finished - no active question")
+
+        player = await self._player(session_id, pseudo)
+        current_question = state.questions[state.current_index]
+        correct_answer = current_question.get('correct')
+        is_correct = answer_index == correct_answer
+
+        if is_correct:
+            player['score'] = player.get('score', 0) + 1
+            increments = self._pending.setdefault(session_id, {})
+            increments[player['player_id']] = increments.get(player['player_id'], 0) + 1
+            self._pending_points += 1
+
+        self.accepted += 1
+        self._ensure_flusher()
+        if self._pending_points >= self.max_pending:
+            await self.flush()
+
+        return {
+            "correct": is_correct,
+            "correct_answer_index": correct_answer,
+            "submitted_answer_index": answer_index,
+            "player_pseudo": pseudo,
+            "new_score": player.get('score', 0),
+            "question_id": current_question.get('id')
+        }
+
+    async def submit_many(self, session_id: str, answers: Dict[str, int]) -> List[Union[dict, SubmitRejected]]:
+        """`submit` for several players; the ones not cached yet are loaded in one read"""
+        if any(not self._knows(session_id, pseudo) for pseudo in answers):
+            _, players = await asyncio.gather(self._question_state(session_id),
+                                              self.storage_getter().list_players(session_id))
+            known = self._session(session_id).players
+            for player in players:
+                known.setdefault(player['pseudo'], player)
+
+        results = []
+        for pseudo, answer_index in answers.items():
+            try:
+                results.append(await self.submit(session_id, pseudo, answer_index))
+            except SubmitRejected as e:
+                results.append(e)
+        return results
+
+    async def flush(self, session_id: Optional[str] = None):
+        """Write buffered increments (of one session, or of all sessions) in batches"""
+        if session_id is None:
+            pending, self._pending = self._pending, {}
+            self._pending_points = 0
+        else:
+            increments = self._pending.pop(session_id, None)
+            pending = {session_id: increments} if increments else {}
+            self._pending_points = sum(sum(i.values()) for i in self._pending.values())
+
+        storage = self.storage_getter()
+        for sid, increments in pending.items():
+            try:
+                await storage.apply_score_increments(sid, increments)
+                if self.session_cache is not None:
+                    self.session_cache.apply_increments(sid, increments)
+                if self.event_bus is not None:
+                    self.event_bus.publish(sid, "scores_changed", {"increments": increments})
+                self.flushes += 1
+                self.flushed_writes += len(increments)
+            except Exception as e:
+                if isinstance(e, KeyError) and e.args and e.args[0] in increments:
+                    # No retry can score a player missing from storage: drop just that one
+                    player_id = e.args[0]
+                    print(f"⚠️ Dropped {increments.pop(player_id)} points of unknown player {player_id} "
+                          f"in session {sid}")
+                else:
+                    print(f"❌ Error flushing {len(increments)} score updates for session {sid}: {e}")
+                # Put the increments back so the next flush retries them
+                merged = self._pending.setdefault(sid, {})
+                for player_id, amount in increments.items():
+                    merged[player_id] = merged.get(player_id, 0) + amount
+                    self._pending_points += amount
+
+    async def question_advanced(self, session_id: str):
+        """Flush the session and forget its cached question and players"""
+        await self.flush(session_id)
+        self._sessions.pop(session_id, None)
+
+    def _on_event(self, session_id: str, event: str, data: dict):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        if event == "question_advanced":
+            asyncio.get_running_loop().create_task(self.question_advanced(session_id))
+        elif event == "scores_changed":
+            increments = data.get("increments", {})
+            for player in session.players.values():
+                if player["player_id"] in increments:
+                    player["score"] = player.get("score", 0) + increments[player["player_id"]]
+
+    def has_pending(self, session_id: str) -> bool:
+        return session_id in self._pending
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._pending:
+                await self.flush()
+
+    async def close(self):
+        if self._flusher is not None and not self._flusher.done():
+            try:
+                self._flusher.cancel()
+            except RuntimeError:
+                pass  # Its event loop is already closed
+        self._flusher = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "pending_points": self._pending_points,
+            "flushes": self.flushes,
+            "flushed_writes": self.flushed_writes,
+            "sessions": len(self._sessions),
+            "evictions": self.evictions,
+        }
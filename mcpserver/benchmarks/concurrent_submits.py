@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Concurrency check: hundreds of simultaneous submit_answer calls must not lose points
+
+Registers the MCP tools on a throwaway FastMCP instance, seeds a session with one
+question, adds `--players` players and fires `--players` x `--answers` correct
+submissions at once. Every submission is worth one point, so the final scores
+must add up exactly; any lost update shows up as a missing point.
+
+Usage:
+  python benchmarks/concurrent_submits.py                      # in-memory storage
+  python benchmarks/concurrent_submits.py --buffered           # through the answer buffer
+  STORAGE_BACKEND=sqlite python benchmarks/concurrent_submits.py
+  STORAGE_BACKEND=firestore python benchmarks/concurrent_submits.py  # needs credentials
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+from answer_buffer import AnswerBuffer  # noqa: E402
+from storage import create_storage  # noqa: E402
+from tools import register_tools  # noqa: E402
+
+
+def firestore_client_factory():
+    from main import get_firestore_client
+    return get_firestore_client()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--answers", type=int, default=3, help="Correct submissions per player")
+    parser.add_argument("--buffered", action="store_true", help="Submit through the write-behind answer buffer")
+    args = parser.parse_args()
+
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    storage = create_storage(firestore_client_factory=firestore_client_factory)
+    answer_buffer = AnswerBuffer(lambda: storage) if args.buffered else None
+    mcp = FastMCP("concurrency-check")
+    register_tools(mcp, lambda: storage, answer_buffer)
+
+    session_id = f"bench-{uuid.uuid4().hex[:8]}"
+    await storage.set_session(session_id, {
+        "session_id": session_id,
+        "questions": [{"id": 1, "question": "Pick A", "options": ["A", "B", "C", "D"], "correct": 0}],
+        "current_question": 0,
+        "status": "ready",
+    })
+
+    pseudos = [f"player{i}" for i in range(args.players)]
+    print(f"🧪 {storage.name} storage{' + answer buffer' if answer_buffer else ''}, session {session_id}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        mcp.call_tool("add_player", {"session_id": session_id, "player_pseudo": pseudo}) for pseudo in pseudos
+    ))
+    print(f"   Added {len(pseudos)} players in {time.perf_counter() - start:.2f}s")
+
+    submits = [
+        mcp.call_tool("submit_answer", {"session_id": session_id, "player_pseudo": pseudo, "answer_index": 0})
+        for pseudo in pseudos for _ in range(args.answers)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*submits)
+    elapsed = time.perf_counter() - start
+    if answer_buffer is not None:
+        print(f"   Buffer: {answer_buffer.stats()}")
+        await answer_buffer.close()
+    print(f"   {len(submits)} concurrent submits in {elapsed:.2f}s ({len(submits) / elapsed:.0f}/s)")
+
+    players = await storage.list_players(session_id)
+    expected = len(pseudos) * args.answers
+    total = sum(player["score"] for player in players)
+    wrong = [p for p in players if p["score"] != args.answers]
+
+    await storage.delete_session(session_id)
+    storage.close()
+
+    if len(players) != len(pseudos) or total != expected or wrong:
+        print(f"❌ Lost updates: {len(players)} players, {total}/{expected} points, {len(wrong)} wrong scores")
+        sys.exit(1)
+    print(f"✅ No lost updates: {total}/{expected} points across {len(players)} players")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
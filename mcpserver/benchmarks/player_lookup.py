@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of one join and one answer as a room grows
+
+Runs both player-lookup algorithms through the same storage backend, in rooms of
+each `--sizes` player count:
+
+- legacy: players kept as a list inside the session document; every join and
+  every answer reads the document, scans the list and writes the document back,
+  so a call costs O(n) and filling a whole room O(n²)
+- indexed: one record per player, looked up by pseudo and incremented in place
+  (`add_player`, `find_player` + `increment_score`, as the tools do)
+
+Each room is filled in one write, then `--calls` joins and answers are timed in
+it; the per-call cost of the legacy algorithm grows with the room, the indexed one
+stays flat.
+
+Usage:
+  python benchmarks/player_lookup.py --sizes 100,1000,10000
+  STORAGE_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python benchmarks/player_lookup.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import create_storage  # noqa: E402
+
+QUESTIONS = [{"id": 1, "question": "Pick A", "options": ["A", "B", "C", "D"], "correct": 0}]
+
+
+def new_player(pseudo):
+    return {"player_id": str(uuid.uuid4())[:8], "pseudo": pseudo, "score": 0}
+
+
+async def legacy_room(storage, session_id, size, calls):
+    """The pre-index algorithm: the whole players list is read, scanned and written back"""
+    await storage.set_session(session_id, {
+        "questions": QUESTIONS, "current_question": 0,
+        "players": [new_player(f"player{i}") for i in range(size)],
+    })
+
+    start = time.perf_counter()
+    for i in range(calls):
+        pseudo = f"joiner{i}"
+        session = await storage.get_session(session_id)
+        players = session.get("players", [])
+        if next((p for p in players if p.get("pseudo") == pseudo), None) is None:
+            players.append(new_player(pseudo))
+            await storage.set_session(session_id, session)
+    join = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in random.sample(range(size), calls):
+        session = await storage.get_session(session_id)
+        for player in session.get("players", []):
+            if player.get("pseudo") == f"player{i}":
+                player["score"] = player.get("score", 0) + 1
+                break
+        await storage.set_session(session_id, session)
+    answer = time.perf_counter() - start
+    return join, answer
+
+
+async def indexed_room(storage, session_id, size, calls):
+    """Player records looked up through the pseudo index"""
+    await storage.set_session(session_id, {"questions": QUESTIONS, "current_question": 0})
+    await storage.add_players(session_id, [new_player(f"player{i}") for i in range(size)])
+
+    start = time.perf_counter()
+    for i in range(calls):
+        await storage.add_player(session_id, new_player(f"joiner{i}"))
+    join = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in random.sample(range(size), calls):
+        player = await storage.find_player(session_id, f"player{i}")
+        await storage.increment_score(session_id, player["player_id"], 1)
+    answer = time.perf_counter() - start
+    return join, answer
+
+
+def report(label, size, calls, join, answer):
+    print(f"   {size:>7} players  {label:<8} join {join / calls * 1e6:9.1f}µs/call   "
+          f"answer {answer / calls * 1e6:9.1f}µs/call")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated room sizes")
+    parser.add_argument("--calls", type=int, default=100, help="Joins and answers timed per room")
+    args = parser.parse_args()
+
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    storage = create_storage()
+    print(f"🧪 Per-call cost of joining and answering ({storage.name} storage)\n")
+    for size in (int(size) for size in args.sizes.split(",")):
+        calls = min(args.calls, size)
+        for label, room in (("legacy", legacy_room), ("indexed", indexed_room)):
+            session_id = f"bench-{uuid.uuid4().hex[:8]}"
+            report(label, size, calls, *await room(storage, session_id, size, calls))
+            await storage.delete_session(session_id)
+    storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""
+Incrementally maintained per-session leaderboard
+"""
+
+from itertools import islice
+from typing import Dict, List, Optional
+
+
+class Leaderboard:
+    """
+    Players ordered by score, highest first, updated in O(log n) per score change.
+
+    Players are grouped in one bucket per score value; a Fenwick tree over the score
+    values counts the players at or below each score. That gives a player's rank
+    and finds the player at any position without sorting. Players with the same
+    score share a rank and are listed in the order they reached it.
+    Scores are non-negative integers.
+    """
+
+    def __init__(self):
+        self._capacity = 16
+        self._tree = [0] * (self._capacity + 1)
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._scores: Dict[str, int] = {}
+        self._pseudos: Dict[str, str] = {}
+        self._by_pseudo: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._scores
+
+    # Fenwick tree over score values (index = score + 1)
+
+    def _add_count(self, score: int, delta: int):
+        i = score + 1
+        while i <= self._capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, score: int) -> int:
+        i = min(score + 1, self._capacity)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _score_at(self, ascending_position: int) -> int:
+        """Smallest score with more than `ascending_position` players at or below it"""
+        index = 0
+        step = self._capacity
+        remaining = ascending_position
+        while step:
+            following = index + step
+            if following <= self._capacity and self._tree[following] <= remaining:
+                index = following
+                remaining -= self._tree[following]
+            step >>= 1
+        return index
+
+    def _grow(self, score: int):
+        while score >= self._capacity:
+            self._capacity *= 2
+        self._tree = [0] * (self._capacity + 1)
+        for value, bucket in self._buckets.items():
+            self._add_count(value, len(bucket))
+
+    # Updates
+
+    def set(self, player_id: str, pseudo: str, score: int):
+        """Add a player or move it to a new score"""
+        if score < 0:
+            raise ValueError(f"Leaderboard scores must be non-negative, got {score}")
+        previous = self._scores.get(player_id)
+        if previous == score:
+            self._rename(player_id, pseudo)
+            return
+        if previous is not None:
+            self._take_out(player_id, previous)
+        if score >= self._capacity:
+            self._grow(score)
+        self._buckets.setdefault(score, {})[player_id] = None
+        self._add_count(score, 1)
+        self._scores[player_id] = score
+        self._rename(player_id, pseudo)
+
+    def increment(self, player_id: str, amount: int = 1) -> int:
+        score = self._scores[player_id] + amount
+        self.set(player_id, self._pseudos[player_id], score)
+        return score
+
+    def remove(self, player_id: str):
+        score = self._scores.pop(player_id, None)
+        if score is None:
+            return
+        self._take_out(player_id, score)
+        pseudo = self._pseudos.pop(player_id)
+        if self._by_pseudo.get(pseudo) == player_id:
+            del self._by_pseudo[pseudo]
+
+    def _take_out(self, player_id: str, score: int):
+        bucket = self._buckets[score]
+        del bucket[player_id]
+        if not bucket:
+            del self._buckets[score]
+        self._add_count(score, -1)
+
+    def _rename(self, player_id: str, pseudo: str):
+        previous = self._pseudos.get(player_id)
+        if previous != pseudo:
+            if previous is not None and self._by_pseudo.get(previous) == player_id:
+                del self._by_pseudo[previous]
+            self._pseudos[player_id] = pseudo
+            self._by_pseudo[pseudo] = player_id
+
+    def sync(self, players: List[dict]) -> bool:
+        """
+        Bring the board in line with a freshly loaded player list, touching only what
+        changed; returns whether anything did.
+        """
+        seen = set()
+        changed = False
+        for player in players:
+            player_id = player['player_id']
+            seen.add(player_id)
+            score = player.get('score', 0)
+            if self._scores.get(player_id) != score or self._pseudos.get(player_id) != player.get('pseudo'):
+                self.set(player_id, player.get('pseudo'), score)
+                changed = True
+        if len(seen) != len(self._scores):
+            for player_id in [pid for pid in self._scores if pid not in seen]:
+                self.remove(player_id)
+            changed = True
+        return changed
+
+    # Queries
+
+    def player_id(self, pseudo: str) -> Optional[str]:
+        return self._by_pseudo.get(pseudo)
+
+    def rank(self, player_id: str) -> Optional[int]:
+        """1-based rank; tied players share the rank of the first of them"""
+        score = self._scores.get(player_id)
+        if score is None:
+            return None
+        return len(self._scores) - self._count_at_most(score) + 1
+
+    def position(self, player_id: str) -> Optional[int]:
+        """0-based position in the listing order"""
+        score = self._scores.get(player_id)
+        if score is None:
+            return None
+        above = len(self._scores) - self._count_at_most(score)
+        for offset, other in enumerate(self._buckets[score]):
+            if other == player_id:
+                return above + offset
+        return None
+
+    def page(self, start: int, count: int) -> List[dict]:
+        """`count` entries from 0-based position `start`, highest scores first"""
+        total = len(self._scores)
+        start = max(start, 0)
+        end = min(start + count, total)
+        entries = []
+        position = start
+        while position < end:
+            score = self._score_at(total - 1 - position)
+            above = total - self._count_at_most(score)
+            rank = above + 1
+            bucket = self._buckets[score]
+            for player_id in islice(bucket, position - above, position - above + end - position):
+                entries.append({
+                    "rank": rank,
+                    "player_id": player_id,
+                    "pseudo": self._pseudos[player_id],
+                    "score": score,
+                })
+                position += 1
+        return entries
+
+    def top(self, k: Optional[int] = None) -> List[dict]:
+        return self.page(0, len(self._scores) if k is None else k)
+
+    def around(self, player_id: str, count: int) -> List[dict]:
+        """A page of about `count` entries centered on a player"""
+        position = self.position(player_id)
+        if position is None:
+            return []
+        start = min(position - count // 2, len(self._scores) - count)
+        return self.page(max(start, 0), count)
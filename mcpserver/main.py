@@ -3,19 +3,27 @@ MCP Server Template
 """
 
 import dotenv
+import logging
 import os
 import json
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
 from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from metrics import REGISTRY, InstrumentedStorage, timed_tool
 
 import mcp.types as types
 
-# Global variable to store the database client
+# Global variables to store the database client and the storage backend
 _db = None
+_storage = None
 
 def get_firestore_client():
     """
-    Lazy-load Firestore client to improve cold start performance.
+    Lazy-load the asyncio Firestore client to improve cold start performance.
+    Created once; every storage call shares the client and its channel.
     """
     global _db
     if _db is not None:
@@ -23,12 +31,12 @@ def get_firestore_client():
         
     # Import Firebase modules only when needed
     import firebase_admin
-    from firebase_admin import credentials, firestore
+    from firebase_admin import credentials, firestore_async
     
     # Check if default app already exists
     try:
         firebase_admin.get_app()
-        _db = firestore.client()  # App already exists, just return client
+        _db = firestore_async.client()  # App already exists, just return client
         return _db
     except ValueError:
         # App doesn't exist, initialize it
@@ -57,16 +65,55 @@ def get_firestore_client():
             except FileNotFoundError:
                 raise ValueError("Neither FIREBASE_SERVICE_ACCOUNT_KEY environment variable nor cred.json file found.")
     
-    _db = firestore.client()
+    _db = firestore_async.client()
     return _db
 
+def get_storage():
+    """
+    Lazy-load the session storage backend selected by STORAGE_BACKEND.
+    Firestore is only one option; memory and sqlite run without any network access.
+    """
+    global _storage
+    if _storage is None:
+        from storage import create_storage
+        # Every storage call is timed into the storage_operation_duration_seconds histogram
+        _storage = InstrumentedStorage(create_storage(firestore_client_factory=get_firestore_client))
+    return _storage
+
 mcp = FastMCP("Kahoot Game Alternative", port=7860, stateless_http=True, debug=True, host="0.0.0.0")
 
 # Import tools registration
 from tools import register_tools
 
-# Register all tools with lazy DB initialization
-register_tools(mcp, get_firestore_client)
+# Session changes announced between instances (EVENT_BUS=local|socket)
+from event_bus import create_event_bus
+event_bus = create_event_bus()
+
+# Read-through cache of sessions for the polled read tools
+from session_cache import SessionCache
+session_cache = SessionCache(
+    get_storage,
+    max_sessions=int(os.environ.get("SESSION_CACHE_MAX_SESSIONS", "1024")),
+    ttl=float(os.environ.get("SESSION_CACHE_STALENESS_SECONDS", "1")),
+    event_bus=event_bus,
+)
+
+# Opt-in: answers are acknowledged from memory and written to storage in batches
+answer_buffer = None
+if os.environ.get("ANSWER_BUFFER_ENABLED", "false").lower() == "true":
+    from answer_buffer import AnswerBuffer
+    answer_buffer = AnswerBuffer(
+        get_storage,
+        max_pending=int(os.environ.get("ANSWER_BUFFER_MAX_PENDING", "200")),
+        flush_interval=float(os.environ.get("ANSWER_BUFFER_FLUSH_SECONDS", "0.5")),
+        question_ttl=float(os.environ.get("ANSWER_BUFFER_QUESTION_TTL_SECONDS", "0.25")),
+        session_cache=session_cache,
+        event_bus=event_bus,
+        max_sessions=session_cache.max_sessions,
+    )
+
+# Register all tools with lazy storage initialization
+register_tools(mcp, get_storage, answer_buffer, session_cache, event_bus)
 
 @mcp.resource(
     uri="greeting://{name}",
@@ -98,6 +145,7 @@ def greet_user(
     title="Health Check",
     description="Quick health check that responds immediately without initializing heavy dependencies",
 )
+@timed_tool
 async def health_check() -> str:
     """Health check endpoint for fast Lambda response"""
     return json.dumps({
@@ -107,5 +155,61 @@ async def health_check() -> str:
     })
 
 
+@mcp.tool(
+    title="Server Stats",
+    description="Hit/miss counters of the session cache and state of the answer buffer",
+)
+@timed_tool
+async def server_stats() -> str:
+    """In-memory counters only; never touches storage"""
+    return json.dumps({
+        "session_cache": session_cache.stats(),
+        "answer_buffer": answer_buffer.stats() if answer_buffer is not None else None,
+        "event_bus": event_bus.stats(),
+    }, indent=2)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Tool latencies and storage call counters in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def flush_answer_buffer():
+    """Write the answers still buffered; what cannot be written is logged as lost"""
+    try:
+        await answer_buffer.close()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").error("Flushing buffered answers at shutdown failed: %s", e)
+        return
+    pending = answer_buffer.stats()["pending_points"]
+    if pending:
+        logging.getLogger("uvicorn.error").error("%d buffered points could not be written at shutdown", pending)
+
+
+def streamable_http_app():
+    """
+    The MCP Starlette app, flushing the answer buffer when it shuts down. FastMCP's own
+    `lifespan` runs once per request with stateless HTTP, so the app's lifespan is
+    wrapped instead: it runs once, on the loop that served the answers.
+    """
+    app = mcp.streamable_http_app()
+    session_manager_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with session_manager_lifespan(app):
+            try:
+                yield
+            finally:
+                if answer_buffer is not None:
+                    await flush_answer_buffer()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
 if __name__ == "__main__":
-    mcp.run(transport="streamable-http")
\ No newline at end of file
+    import uvicorn
+    uvicorn.run(streamable_http_app(), host=mcp.settings.host, port=mcp.settings.port,
+                log_level=mcp.settings.log_level.lower())
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Pre-serialized `get_next_question` replies of a session
+"""
+
+import json
+from typing import List, Optional
+
+
+def _without_version(reply: dict) -> str:
+    """The reply as `json.dumps(..., indent=2)` renders it, cut before its version value"""
+    text = json.dumps({**reply, "version": None}, indent=2)
+    return text[:-len("null\n}")]
+
+
+class QuestionPayloads:
+    """
+    The replies of one session serialized once: each question without its correct
+    answer, and the reply once the quiz is finished.
+
+    Questions never change once stored, so a reply is built when its question is
+    first seen and kept until the question list is replaced. Only the session version
+    differs between two calls for the same question; it is appended to the stored text,
+    so serving a question is a list lookup and a string concatenation.
+    """
+
+    __slots__ = ("questions", "total_questions", "_replies", "_finished", "_finished_number")
+
+    def __init__(self):
+        self.questions: list = []
+        self.total_questions = 0
+        self._replies: List[str] = []
+        self._finished = ""
+        self._finished_number = 0
+
+    def sync(self, questions: list, total_questions: int):
+        """Serialize the questions not seen yet; all of them when the list was replaced"""
+        known = len(self._replies)
+        if (total_questions != self.total_questions or known > len(questions)
+                or (known and questions[known - 1] != self.questions[known - 1])):
+            self._replies = []
+        self.questions = questions
+        self.total_questions = total_questions
+        if len(self._replies) == len(questions) and self._finished_number == len(questions) + 1:
+            return
+
+        for index in range(len(self._replies), len(questions)):
+            question = questions[index]
+            self._replies.append(_without_version({
+                "question_id": question.get('id'),
+                "question_text": question.get('question'),
+                "options": question.get('options', []),
+                "question_number": index + 1,
+                "total_questions": total_questions,
+            }))
+        self._finished_number = len(questions) + 1
+        self._finished = self._finished_reply(self._finished_number)
+
+    def _finished_reply(self, question_number: int) -> str:
+        return _without_version({
+            "finished": True,
+            "message": "Quiz finished - no more questions available",
+            "total_questions": len(self.questions),
+            "current_question": question_number,
+        })
+
+    def question(self, index: int, version: Optional[str]) -> str:
+        return self._replies[index] + json.dumps(version) + "\n}"
+
+    def finished(self, index: int, version: Optional[str]) -> str:
+        # Sessions only move past their last question by one
+        prefix = self._finished if index + 1 == self._finished_number else self._finished_reply(index + 1)
+        return prefix + json.dumps(version) + "\n}"
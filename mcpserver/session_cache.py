@@ -0,0 +1,240 @@
+"""
+Read-through cache of session documents and player lists for the MCP read tools
+"""
+
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+
+from leaderboard import Leaderboard
+from question_payloads import QuestionPayloads
+
+
+class _Entry:
+    __slots__ = ("session", "session_at", "players_at", "session_version", "players_version", "leaderboard", "payloads")
+
+    def __init__(self, version: int):
+        self.session: Optional[dict] = None
+        self.session_at = 0.0
+        # When the roster was last listed into the leaderboard; None: list it on the next read
+        self.players_at: Optional[float] = None
+        # The question state and the player state change independently
+        self.session_version = version
+        self.players_version = version
+        self.leaderboard = Leaderboard()
+        self.payloads = QuestionPayloads()
+
+
+class SessionCache:
+    """
+    Process-local read-through cache in front of the session storage.
+
+    Each cached session carries two version numbers, one for the session document
+    (the questions and the current question) and one for its players, each changing
+    whenever that part of the cached state may have changed: on this server's own
+    writes (`invalidate`, `apply_increments`, `add_players`) and when a refresh from
+    storage returns different data. Scores moving thus leave the question's version
+    alone. Changes made by other processes are picked up as soon as they are announced
+    on the `event_bus`, and otherwise after at most `ttl` seconds, the configured
+    staleness bound. At most `max_sessions` sessions are kept, least recently used
+    first out.
+
+    Returned documents and leaderboards are shared with the cache and must be treated
+    as read-only. A session's leaderboard survives invalidation and is updated in place
+    from each reload, and so do its serialized question replies: only questions that
+    were not stored at the previous load get serialized. Score increments and joins,
+    this server's own and announced ones, are applied to the leaderboard directly
+    (`apply_increments`, `add_players`) instead of listing the roster again.
+    """
+
+    def __init__(self, storage_getter: Callable, max_sessions: int = 1024, ttl: float = 1.0, event_bus=None):
+        self.storage_getter = storage_getter
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._versions = itertools.count(1)
+        # session_id -> roster reads in flight, and the sessions changed while one was
+        self._listing: Dict[str, int] = {}
+        self._changed_while_listing: Set[str] = set()
+        # Versions restart with the process; the epoch keeps old ETags from matching new ones
+        self.epoch = uuid.uuid4().hex[:8]
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.patches = 0
+
+        self.event_bus = event_bus
+        if event_bus is not None:
+            event_bus.subscribe(self._on_event)
+
+    def _entry(self, session_id: str) -> _Entry:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = _Entry(next(self._versions))
+            self._entries[session_id] = entry
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._entries.move_to_end(session_id)
+        return entry
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        if self.event_bus is not None:
+            self.event_bus.start()
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.session is not None and self._fresh(entry.session_at):
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry.session
+
+        self.misses += 1
+        session = await self.storage_getter().get_session(session_id)
+        if session is None:
+            self._entries.pop(session_id, None)
+            return None
+
+        entry = self._entry(session_id)
+        if entry.session is not None and entry.session != session:
+            entry.session_version = next(self._versions)
+        entry.session = session
+        entry.session_at = time.monotonic()
+        entry.payloads.sync(*self._questions(session))
+        return session
+
+    async def get_leaderboard(self, session_id: str) -> Leaderboard:
+        """The session's players ordered by score; the roster is listed again after `ttl` seconds"""
+        if self.event_bus is not None:
+            self.event_bus.start()
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.players_at is not None and self._fresh(entry.players_at):
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry.leaderboard
+
+        self.misses += 1
+        self._listing[session_id] = self._listing.get(session_id, 0) + 1
+        try:
+            players = await self.storage_getter().list_players(session_id)
+        finally:
+            self._listing[session_id] -= 1
+            if not self._listing[session_id]:
+                del self._listing[session_id]
+        # The listing may predate a change applied meanwhile: use it, but list again next time
+        current = session_id not in self._changed_while_listing
+        if session_id not in self._listing:
+            self._changed_while_listing.discard(session_id)
+
+        cached = session_id in self._entries
+        entry = self._entry(session_id)
+        # Only players whose score moved are repositioned on the board
+        if entry.leaderboard.sync(players) and cached:
+            entry.players_version = next(self._versions)
+        entry.players_at = time.monotonic() if current else None
+        return entry.leaderboard
+
+    @staticmethod
+    def _questions(session: dict):
+        questions = session.get('questions', [])
+        return questions, session.get('total_questions', len(questions))
+
+    def payloads(self, session_id: str, session: dict) -> QuestionPayloads:
+        """Serialized question replies of `session`, as returned by `get_session`"""
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.session is session:
+            return entry.payloads
+        # Not cached (evicted, or caching disabled): serialize for this call only
+        payloads = QuestionPayloads()
+        payloads.sync(*self._questions(session))
+        return payloads
+
+    def question_etag(self, session_id: str) -> Optional[str]:
+        """Opaque version token of the session document, None when the session is not cached"""
+        entry = self._entries.get(session_id)
+        return f"{self.epoch}.{entry.session_version}" if entry is not None else None
+
+    def scores_etag(self, session_id: str) -> Optional[str]:
+        """Opaque version token of the players and the session document, None when not cached"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        return f"{self.epoch}.{entry.session_version}.{entry.players_version}"
+
+    def invalidate(self, session_id: str, players_only: bool = False):
+        """Drop cached state after this server wrote to the session"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        self.invalidations += 1
+        entry.players_version = next(self._versions)
+        entry.players_at = None
+        if not players_only:
+            entry.session_version = next(self._versions)
+            entry.session = None
+
+    def _patchable(self, session_id: str) -> Optional[_Entry]:
+        """The entry whose leaderboard a change can be applied to, None when it is not listed"""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry.players_version = next(self._versions)
+        if session_id in self._listing:
+            # A roster read in flight may or may not include the change: list again next time
+            self._changed_while_listing.add(session_id)
+            if entry is not None:
+                entry.players_at = None
+            return None
+        if entry is None or entry.players_at is None:
+            return None
+        self.patches += 1
+        return entry
+
+    def apply_increments(self, session_id: str, increments: Dict[str, int]):
+        """Move the players whose score was incremented in storage, without listing the roster"""
+        entry = self._patchable(session_id)
+        if entry is None:
+            return
+        for player_id, amount in increments.items():
+            if player_id not in entry.leaderboard:
+                # A player this cache has not seen join yet
+                entry.players_at = None
+                return
+            entry.leaderboard.increment(player_id, amount)
+
+    def add_players(self, session_id: str, players: List[dict]):
+        """Put players who just joined on the board, with their starting score"""
+        entry = self._patchable(session_id)
+        if entry is None:
+            return
+        for player in players:
+            if player['player_id'] not in entry.leaderboard:
+                entry.leaderboard.set(player['player_id'], player['pseudo'], player.get('score', 0))
+
+    def _on_event(self, session_id: str, event: str, data: dict):
+        """Another instance changed the session: apply what it announced, or drop what it made stale"""
+        if event == "scores_changed":
+            self.apply_increments(session_id, data.get("increments", {}))
+        elif event == "player_joined":
+            self.add_players(session_id, data.get("players", []))
+        else:
+            self.invalidate(session_id)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "patches": self.patches,
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "staleness_seconds": self.ttl,
+        }
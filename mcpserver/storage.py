@@ -0,0 +1,801 @@
+"""
+Storage backends for quiz sessions
+
+Both services store one document per session in the `quiz_sessions` collection.
+This module hides where that collection lives behind `SessionStorage`:
+
+- `FirestoreStorage`: Google Cloud Firestore through its asyncio client (production)
+- `MemoryStorage`: process-local dicts, for tests, benchmarks and single-instance runs
+- `SQLiteStorage`: a local SQLite file in WAL mode, for small deployments
+
+Players are stored as one record per player (a `players` subcollection in Firestore,
+a `players` table in SQLite) so a score change is a constant-size atomic increment
+instead of a rewrite of the whole session document. Records are indexed by both
+`player_id` and `pseudo`. Session documents written by older versions, with players
+as a list inside the document, are migrated to records the first time their players
+are read.
+
+Each backend also keeps leases: short-lived, renewable claims on a key by one owner,
+used to give every session a single owning worker when several serve the game.
+
+Pick one with STORAGE_BACKEND=firestore|memory|sqlite (SQLITE_PATH sets the file).
+This file is kept identical in backend/ and mcpserver/.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+SESSIONS_COLLECTION = "quiz_sessions"
+PLAYERS_COLLECTION = "players"
+LEASES_COLLECTION = "session_leases"
+
+
+class _ServerTimestamp:
+    """Placeholder replaced by the backend's notion of "now" when a document is written"""
+
+    def __repr__(self):
+        return "SERVER_TIMESTAMP"
+
+
+SERVER_TIMESTAMP = _ServerTimestamp()
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _resolve_timestamps(data: dict, now) -> dict:
+    return {key: (now if value is SERVER_TIMESTAMP else value) for key, value in data.items()}
+
+
+def _legacy_player_records(players) -> List[dict]:
+    """Turn a legacy `players` list into player records, keeping the first entry per pseudo"""
+    records = []
+    seen = set()
+    for player in players or []:
+        pseudo = player.get("pseudo")
+        if pseudo is None or pseudo in seen:
+            continue
+        seen.add(pseudo)
+        records.append({
+            "player_id": player.get("player_id") or str(uuid.uuid4())[:8],
+            "pseudo": pseudo,
+            "score": player.get("score", 0),
+        })
+    return records
+
+
+def _deep_merge(target: dict, updates: dict) -> dict:
+    """Merge like Firestore `set(..., merge=True)`: nested maps merge, everything else is replaced"""
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+class SessionStorage:
+    """Interface of a quiz session store"""
+
+    name = "abstract"
+
+    # Bound on the set of sessions whose legacy `players` list is known to be migrated
+    _MIGRATED_LIMIT = 100_000
+
+    def __init__(self):
+        self._migrated = set()
+
+    def _mark_migrated(self, session_id: str):
+        if len(self._migrated) >= self._MIGRATED_LIMIT:
+            self._migrated.clear()
+        self._migrated.add(session_id)
+
+    def _is_migrated(self, session_id: str) -> bool:
+        return session_id in self._migrated
+
+    def connect(self):
+        """Set up the backend's client ahead of the first call; blocking, so run it in a thread"""
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        """Return the session document, or None when it does not exist"""
+        raise NotImplementedError
+
+    async def set_session(self, session_id: str, data: dict, merge: bool = False):
+        """Create or overwrite the session document (merge keeps fields not in `data`)"""
+        raise NotImplementedError
+
+    async def update_session(self, session_id: str, fields: dict):
+        """Update fields of an existing session, raising SessionNotFound if it does not exist"""
+        raise NotImplementedError
+
+    async def append_question(self, session_id: str, question: dict):
+        """Append one question to the session's `questions` array"""
+        raise NotImplementedError
+
+    async def create_session_if_missing(self, session_id: str, data: dict) -> bool:
+        """Create the session document unless it exists; True when it was created"""
+        raise NotImplementedError
+
+    async def delete_session(self, session_id: str):
+        """Delete the session document and its player records"""
+        raise NotImplementedError
+
+    async def add_player(self, session_id: str, player: dict) -> Tuple[dict, bool]:
+        """
+        Atomically add a player record unless one with the same pseudo exists.
+        Returns the stored record and whether it was created.
+        """
+        raise NotImplementedError
+
+    async def add_players(self, session_id: str, players: List[dict]) -> List[Tuple[dict, bool]]:
+        """
+        `add_player` for many players in one transaction (one per 500 players in
+        Firestore). Returns a (record, created) pair per input player, in order.
+        """
+        raise NotImplementedError
+
+    async def find_player(self, session_id: str, pseudo: str) -> Optional[dict]:
+        """Player record by pseudo"""
+        raise NotImplementedError
+
+    async def get_player(self, session_id: str, player_id: str) -> Optional[dict]:
+        """Player record by player_id"""
+        raise NotImplementedError
+
+    async def list_players(self, session_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    async def increment_score(self, session_id: str, player_id: str, amount: int) -> int:
+        """
+        Atomically add `amount` to a player's score and return the score this increment
+        produced. An unknown player_id raises KeyError.
+        """
+        raise NotImplementedError
+
+    async def apply_score_increments(self, session_id: str, increments: Dict[str, int]):
+        """
+        Atomically add many score increments (player_id -> amount) in one batched write.
+        An unknown player_id fails the call (KeyError, NotFound in Firestore).
+        """
+        raise NotImplementedError
+
+    async def acquire_lease(self, key: str, owner: str, ttl: float) -> str:
+        """
+        Take or renew the lease on `key` for `ttl` seconds, unless another owner holds
+        an unexpired one. Returns the owner holding the lease afterwards.
+        """
+        raise NotImplementedError
+
+    async def release_lease(self, key: str, owner: str):
+        """Drop the lease on `key` if `owner` holds it"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FirestoreStorage(SessionStorage):
+    """
+    Sessions in Firestore, through the asyncio client: calls wait on the network without
+    holding a thread. `client_factory` returns a Firestore `AsyncClient` and is called on
+    first use; every call then shares that client and its channel.
+    """
+
+    name = "firestore"
+
+    def __init__(self, client_factory: Callable[[], object], collection: str = SESSIONS_COLLECTION):
+        super().__init__()
+        self._client_factory = client_factory
+        self._client = None
+        # The client may be created by a warm-up thread while the loop asks for it
+        self._client_lock = threading.Lock()
+        self.collection = collection
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def connect(self):
+        # Importing the SDK and loading credentials happen in the factory
+        self.client
+
+    def _doc(self, session_id: str):
+        return self.client.collection(self.collection).document(session_id)
+
+    @staticmethod
+    def _resolve(data: dict) -> dict:
+        from firebase_admin import firestore
+        return _resolve_timestamps(data, firestore.SERVER_TIMESTAMP)
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        snapshot = await self._doc(session_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def set_session(self, session_id: str, data: dict, merge: bool = False):
+        await self._doc(session_id).set(self._resolve(data), merge=merge)
+
+    async def update_session(self, session_id: str, fields: dict):
+        from google.api_core.exceptions import NotFound
+        try:
+            await self._doc(session_id).update(self._resolve(fields))
+        except NotFound:
+            raise SessionNotFound(session_id)
+
+    async def append_question(self, session_id: str, question: dict):
+        from firebase_admin import firestore
+        await self._doc(session_id).update({"questions": firestore.ArrayUnion([question])})
+
+    async def create_session_if_missing(self, session_id: str, data: dict) -> bool:
+        from google.api_core.exceptions import AlreadyExists
+        try:
+            await self._doc(session_id).create(self._resolve(data))
+            return True
+        except AlreadyExists:
+            return False
+
+    def _players(self, session_id: str):
+        return self._doc(session_id).collection(PLAYERS_COLLECTION)
+
+    async def delete_session(self, session_id: str):
+        players = [player async for player in self._players(session_id).list_documents()]
+        await asyncio.gather(*(player.delete() for player in players))
+        await self._doc(session_id).delete()
+
+    async def _migrate(self, session_id: str):
+        from firebase_admin import firestore
+        from google.cloud.firestore import async_transactional
+
+        if self._is_migrated(session_id):
+            return
+        session_ref = self._doc(session_id)
+        players = self._players(session_id)
+
+        @async_transactional
+        async def migrate(transaction):
+            snapshot = await session_ref.get(field_paths=["players"], transaction=transaction)
+            legacy = (snapshot.to_dict() or {}).get("players") if snapshot.exists else None
+            if not isinstance(legacy, list):
+                return
+            for record in _legacy_player_records(legacy):
+                transaction.set(players.document(record["player_id"]), record)
+            transaction.update(session_ref, {"players": firestore.DELETE_FIELD})
+
+        await migrate(self.client.transaction())
+        self._mark_migrated(session_id)
+
+    async def add_player(self, session_id: str, player: dict) -> Tuple[dict, bool]:
+        from firebase_admin import firestore
+        from google.cloud.firestore import async_transactional
+
+        await self._migrate(session_id)
+        players = self._players(session_id)
+        query = players.where(filter=firestore.FieldFilter("pseudo", "==", player["pseudo"])).limit(1)
+
+        @async_transactional
+        async def add(transaction):
+            async for existing in query.stream(transaction=transaction):
+                return existing.to_dict(), False
+            transaction.create(players.document(player["player_id"]), player)
+            return dict(player), True
+
+        return await add(self.client.transaction())
+
+    async def add_players(self, session_id: str, players: List[dict]) -> List[Tuple[dict, bool]]:
+        from google.cloud.firestore import async_transactional
+
+        await self._migrate(session_id)
+        collection = self._players(session_id)
+
+        @async_transactional
+        async def add(transaction, chunk):
+            # One read of the roster validates the whole chunk
+            existing = {}
+            async for snapshot in collection.stream(transaction=transaction):
+                record = snapshot.to_dict()
+                existing[record["pseudo"]] = record
+            results = []
+            for player in chunk:
+                record = existing.get(player["pseudo"])
+                if record is not None:
+                    results.append((dict(record), False))
+                    continue
+                transaction.create(collection.document(player["player_id"]), player)
+                existing[player["pseudo"]] = player
+                results.append((dict(player), True))
+            return results
+
+        results = []
+        # A Firestore transaction holds at most 500 writes
+        for start in range(0, len(players), 500):
+            results.extend(await add(self.client.transaction(), players[start:start + 500]))
+        return results
+
+    # Firestore indexes every field, so lookups by pseudo are indexed queries, not scans
+    async def find_player(self, session_id: str, pseudo: str) -> Optional[dict]:
+        from firebase_admin import firestore
+        await self._migrate(session_id)
+        query = self._players(session_id).where(filter=firestore.FieldFilter("pseudo", "==", pseudo)).limit(1)
+        async for snapshot in query.stream():
+            return snapshot.to_dict()
+        return None
+
+    async def get_player(self, session_id: str, player_id: str) -> Optional[dict]:
+        await self._migrate(session_id)
+        snapshot = await self._players(session_id).document(player_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def list_players(self, session_id: str) -> List[dict]:
+        await self._migrate(session_id)
+        return [snapshot.to_dict() async for snapshot in self._players(session_id).stream()]
+
+    async def increment_score(self, session_id: str, player_id: str, amount: int) -> int:
+        from google.cloud.firestore import async_transactional
+        player_ref = self._players(session_id).document(player_id)
+
+        # Read and write in one transaction, so the returned score is this increment's own
+        @async_transactional
+        async def increment(transaction):
+            snapshot = await player_ref.get(field_paths=["score"], transaction=transaction)
+            if not snapshot.exists:
+                raise KeyError(player_id)
+            score = snapshot.to_dict().get("score", 0) + amount
+            transaction.update(player_ref, {"score": score})
+            return score
+
+        return await increment(self.client.transaction())
+
+    async def apply_score_increments(self, session_id: str, increments: Dict[str, int]):
+        from firebase_admin import firestore
+        players = self._players(session_id)
+        items = list(increments.items())
+        batches = []
+        # A Firestore batch holds at most 500 writes; the batches are committed concurrently
+        for start in range(0, len(items), 500):
+            batch = self.client.batch()
+            for player_id, amount in items[start:start + 500]:
+                batch.update(players.document(player_id), {"score": firestore.Increment(amount)})
+            batches.append(batch.commit())
+        await asyncio.gather(*batches)
+
+    def _lease(self, key: str):
+        return self.client.collection(LEASES_COLLECTION).document(key)
+
+    async def acquire_lease(self, key: str, owner: str, ttl: float) -> str:
+        from google.cloud.firestore import async_transactional
+        lease_ref = self._lease(key)
+
+        @async_transactional
+        async def acquire(transaction):
+            snapshot = await lease_ref.get(transaction=transaction)
+            lease = snapshot.to_dict() if snapshot.exists else None
+            now = time.time()
+            if lease is not None and lease["owner"] != owner and lease["expires_at"] > now:
+                return lease["owner"]
+            transaction.set(lease_ref, {"owner": owner, "expires_at": now + ttl})
+            return owner
+
+        return await acquire(self.client.transaction())
+
+    async def release_lease(self, key: str, owner: str):
+        from google.cloud.firestore import async_transactional
+        lease_ref = self._lease(key)
+
+        @async_transactional
+        async def release(transaction):
+            snapshot = await lease_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.get("owner") == owner:
+                transaction.delete(lease_ref)
+
+        await release(self.client.transaction())
+
+
+class MemoryStorage(SessionStorage):
+    """Sessions in process memory. Documents are copied in and out, like a remote store."""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._sessions: Dict[str, dict] = {}
+        # session_id -> player_id -> record, and session_id -> pseudo -> the same record
+        self._players: Dict[str, Dict[str, dict]] = {}
+        self._pseudos: Dict[str, Dict[str, dict]] = {}
+        # key -> (owner, expires_at)
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        session = self._sessions.get(session_id)
+        return copy.deepcopy(session) if session is not None else None
+
+    async def set_session(self, session_id: str, data: dict, merge: bool = False):
+        data = _resolve_timestamps(data, _now_iso())
+        if merge and session_id in self._sessions:
+            _deep_merge(self._sessions[session_id], data)
+        else:
+            self._sessions[session_id] = copy.deepcopy(data)
+
+    async def update_session(self, session_id: str, fields: dict):
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        session.update(copy.deepcopy(_resolve_timestamps(fields, _now_iso())))
+
+    async def append_question(self, session_id: str, question: dict):
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFound(session_id)
+        questions = session.setdefault("questions", [])
+        if question not in questions:
+            questions.append(copy.deepcopy(question))
+
+    async def create_session_if_missing(self, session_id: str, data: dict) -> bool:
+        if session_id in self._sessions:
+            return False
+        self._sessions[session_id] = copy.deepcopy(_resolve_timestamps(data, _now_iso()))
+        return True
+
+    async def delete_session(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._players.pop(session_id, None)
+        self._pseudos.pop(session_id, None)
+
+    def _insert_player(self, session_id: str, record: dict):
+        self._players.setdefault(session_id, {})[record["player_id"]] = record
+        self._pseudos.setdefault(session_id, {})[record["pseudo"]] = record
+
+    def _migrate(self, session_id: str):
+        session = self._sessions.get(session_id)
+        if session is None or not isinstance(session.get("players"), list):
+            return
+        for record in _legacy_player_records(session.pop("players")):
+            if record["pseudo"] not in self._pseudos.get(session_id, {}):
+                self._insert_player(session_id, record)
+
+    # No awaits between the check and the write: each call is atomic on the event loop
+    async def add_player(self, session_id: str, player: dict) -> Tuple[dict, bool]:
+        self._migrate(session_id)
+        existing = self._pseudos.get(session_id, {}).get(player["pseudo"])
+        if existing is not None:
+            return dict(existing), False
+        self._insert_player(session_id, dict(player))
+        return dict(player), True
+
+    async def add_players(self, session_id: str, players: List[dict]) -> List[Tuple[dict, bool]]:
+        return [await self.add_player(session_id, player) for player in players]
+
+    async def find_player(self, session_id: str, pseudo: str) -> Optional[dict]:
+        self._migrate(session_id)
+        player = self._pseudos.get(session_id, {}).get(pseudo)
+        return dict(player) if player is not None else None
+
+    async def get_player(self, session_id: str, player_id: str) -> Optional[dict]:
+        self._migrate(session_id)
+        player = self._players.get(session_id, {}).get(player_id)
+        return dict(player) if player is not None else None
+
+    async def list_players(self, session_id: str) -> List[dict]:
+        self._migrate(session_id)
+        return [dict(player) for player in self._players.get(session_id, {}).values()]
+
+    async def increment_score(self, session_id: str, player_id: str, amount: int) -> int:
+        player = self._players.get(session_id, {}).get(player_id)
+        if player is None:
+            raise KeyError(player_id)
+        player["score"] = player.get("score", 0) + amount
+        return player["score"]
+
+    async def apply_score_increments(self, session_id: str, increments: Dict[str, int]):
+        players = self._players.get(session_id, {})
+        missing = [player_id for player_id in increments if player_id not in players]
+        if missing:
+            raise KeyError(missing[0])
+        for player_id, amount in increments.items():
+            players[player_id]["score"] = players[player_id].get("score", 0) + amount
+
+    async def acquire_lease(self, key: str, owner: str, ttl: float) -> str:
+        lease = self._leases.get(key)
+        now = time.time()
+        if lease is not None and lease[0] != owner and lease[1] > now:
+            return lease[0]
+        self._leases[key] = (owner, now + ttl)
+        return owner
+
+    async def release_lease(self, key: str, owner: str):
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] == owner:
+            del self._leases[key]
+
+
+class SQLiteStorage(SessionStorage):
+    """
+    Sessions as JSON documents in a local SQLite file.
+
+    The database runs in WAL mode so readers never block the writer. sqlite3 calls
+    block, on the disk and on other processes holding the write lock, so each call
+    runs in a worker thread (`asyncio.to_thread`) and the event loop keeps serving
+    meanwhile. The calls share one connection and take turns on it under a lock.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "quiz_sessions.db"):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS players ("
+            "session_id TEXT NOT NULL, player_id TEXT NOT NULL, pseudo TEXT NOT NULL, "
+            "score INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (session_id, player_id))"
+        )
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS players_by_pseudo ON players (session_id, pseudo)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _locked(self, fn: Callable, *args):
+        with self._lock:
+            return fn(*args)
+
+    async def _call(self, fn: Callable, *args):
+        """Run `fn(*args)` on a worker thread, holding the connection lock"""
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _transaction(self, fn: Callable, *args):
+        """Run `fn(*args)` in a write transaction (caller holds the lock)"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(*args)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _load(self, session_id: str) -> Optional[dict]:
+        row = self._conn.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, session_id: str, data: dict):
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, data) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data",
+            (session_id, json.dumps(data)),
+        )
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        return await self._call(self._load, session_id)
+
+    async def set_session(self, session_id: str, data: dict, merge: bool = False):
+        data = _resolve_timestamps(data, _now_iso())
+
+        def write():
+            current = self._load(session_id) if merge else None
+            self._store(session_id, _deep_merge(current, data) if current is not None else data)
+
+        await self._call(self._transaction, write)
+
+    async def update_session(self, session_id: str, fields: dict):
+        fields = _resolve_timestamps(fields, _now_iso())
+
+        def write():
+            current = self._load(session_id)
+            if current is None:
+                raise SessionNotFound(session_id)
+            current.update(fields)
+            self._store(session_id, current)
+
+        await self._call(self._transaction, write)
+
+    async def append_question(self, session_id: str, question: dict):
+        def write():
+            current = self._load(session_id)
+            if current is None:
+                raise SessionNotFound(session_id)
+            questions = current.setdefault("questions", [])
+            if question not in questions:
+                questions.append(question)
+            self._store(session_id, current)
+
+        await self._call(self._transaction, write)
+
+    async def create_session_if_missing(self, session_id: str, data: dict) -> bool:
+        data = _resolve_timestamps(data, _now_iso())
+
+        def insert():
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, data) VALUES (?, ?)",
+                (session_id, json.dumps(data)),
+            )
+            return cursor.rowcount == 1
+
+        return await self._call(insert)
+
+    async def delete_session(self, session_id: str):
+        def delete():
+            self._conn.execute("DELETE FROM players WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+        await self._call(self._transaction, delete)
+
+    @staticmethod
+    def _player_row(row) -> dict:
+        return {"player_id": row[0], "pseudo": row[1], "score": row[2]}
+
+    def _find_player(self, session_id: str, pseudo: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT player_id, pseudo, score FROM players WHERE session_id = ? AND pseudo = ?",
+            (session_id, pseudo),
+        ).fetchone()
+        return self._player_row(row) if row else None
+
+    def _migrate(self, session_id: str):
+        """Move a legacy `players` list out of the session document (caller holds the lock)"""
+        if self._is_migrated(session_id):
+            return
+
+        def move():
+            current = self._load(session_id)
+            if current is not None and isinstance(current.get("players"), list):
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO players (session_id, player_id, pseudo, score) VALUES (?, ?, ?, ?)",
+                    [(session_id, r["player_id"], r["pseudo"], r["score"])
+                     for r in _legacy_player_records(current.pop("players"))],
+                )
+                self._store(session_id, current)
+
+        self._transaction(move)
+        self._mark_migrated(session_id)
+
+    def _add_players(self, session_id: str, players: List[dict]) -> List[Tuple[dict, bool]]:
+        """Insert the players whose pseudo is free (caller holds the lock, in a transaction)"""
+        results = []
+        for player in players:
+            existing = self._find_player(session_id, player["pseudo"])
+            if existing is not None:
+                results.append((existing, False))
+                continue
+            self._conn.execute(
+                "INSERT INTO players (session_id, player_id, pseudo, score) VALUES (?, ?, ?, ?)",
+                (session_id, player["player_id"], player["pseudo"], player.get("score", 0)),
+            )
+            results.append((dict(player), True))
+        return results
+
+    async def add_player(self, session_id: str, player: dict) -> Tuple[dict, bool]:
+        def add():
+            self._migrate(session_id)
+            return self._transaction(self._add_players, session_id, [player])[0]
+
+        return await self._call(add)
+
+    async def add_players(self, session_id: str, players: List[dict]) -> List[Tuple[dict, bool]]:
+        def add():
+            self._migrate(session_id)
+            return self._transaction(self._add_players, session_id, players)
+
+        return await self._call(add)
+
+    async def find_player(self, session_id: str, pseudo: str) -> Optional[dict]:
+        def find():
+            self._migrate(session_id)
+            return self._find_player(session_id, pseudo)
+
+        return await self._call(find)
+
+    async def get_player(self, session_id: str, player_id: str) -> Optional[dict]:
+        def get():
+            self._migrate(session_id)
+            row = self._conn.execute(
+                "SELECT player_id, pseudo, score FROM players WHERE session_id = ? AND player_id = ?",
+                (session_id, player_id),
+            ).fetchone()
+            return self._player_row(row) if row else None
+
+        return await self._call(get)
+
+    async def list_players(self, session_id: str) -> List[dict]:
+        def select():
+            self._migrate(session_id)
+            return self._conn.execute(
+                "SELECT player_id, pseudo, score FROM players WHERE session_id = ?", (session_id,)
+            ).fetchall()
+
+        return [self._player_row(row) for row in await self._call(select)]
+
+    async def increment_score(self, session_id: str, player_id: str, amount: int) -> int:
+        def increment():
+            self._conn.execute(
+                "UPDATE players SET score = score + ? WHERE session_id = ? AND player_id = ?",
+                (amount, session_id, player_id),
+            )
+            row = self._conn.execute(
+                "SELECT score FROM players WHERE session_id = ? AND player_id = ?",
+                (session_id, player_id),
+            ).fetchone()
+            if row is None:
+                raise KeyError(player_id)
+            return row[0]
+
+        return await self._call(self._transaction, increment)
+
+    async def apply_score_increments(self, session_id: str, increments: Dict[str, int]):
+        def increment():
+            cursor = self._conn.executemany(
+                "UPDATE players SET score = score + ? WHERE session_id = ? AND player_id = ?",
+                [(amount, session_id, player_id) for player_id, amount in increments.items()],
+            )
+            if cursor.rowcount != len(increments):
+                # An unknown player matched no row: roll the whole batch back, as the other backends do
+                for player_id in increments:
+                    if self._conn.execute(
+                        "SELECT 1 FROM players WHERE session_id = ? AND player_id = ?", (session_id, player_id)
+                    ).fetchone() is None:
+                        raise KeyError(player_id)
+
+        await self._call(self._transaction, increment)
+
+    async def acquire_lease(self, key: str, owner: str, ttl: float) -> str:
+        def acquire():
+            row = self._conn.execute("SELECT owner, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and row[0] != owner and row[1] > now:
+                return row[0]
+            self._conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                (key, owner, now + ttl),
+            )
+            return owner
+
+        return await self._call(self._transaction, acquire)
+
+    async def release_lease(self, key: str, owner: str):
+        await self._call(self._conn.execute, "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_storage(backend: Optional[str] = None,
+                   firestore_client_factory: Optional[Callable[[], object]] = None) -> SessionStorage:
+    """
+    Build the storage backend named by `backend` or the STORAGE_BACKEND environment variable.
+    """
+    backend = (backend or os.environ.get("STORAGE_BACKEND", "firestore")).lower()
+
+    if backend == "firestore":
+        if firestore_client_factory is None:
+            raise ValueError("The Firestore storage backend needs a client factory.")
+        return FirestoreStorage(firestore_client_factory)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(os.environ.get("SQLITE_PATH", "quiz_sessions.db"))
+
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected firestore, memory or sqlite).")
@@ -0,0 +1,34 @@
+import asyncio
+import sqlite3
+
+from answer_buffer import AnswerBuffer
+from storage import SQLiteStorage
+
+QUESTIONS = [{"id": "q0", "question": "First?", "options": ["a", "b", "c", "d"], "correct": 0}]
+
+
+def test_flush_drops_an_unknown_player_and_writes_the_others(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    storage = SQLiteStorage(path)
+    buffer = AnswerBuffer(lambda: storage, flush_interval=3600)
+
+    async def run():
+        await storage.set_session("s1", {"questions": QUESTIONS, "current_question": 0})
+        await storage.add_players("s1", [
+            {"player_id": "p1", "pseudo": "alice", "score": 0},
+            {"player_id": "p2", "pseudo": "bob", "score": 0},
+        ])
+        await buffer.submit("s1", "alice", 0)
+        await buffer.submit("s1", "bob", 0)
+        # Bob's record disappears before his point is written
+        with sqlite3.connect(path) as other:
+            other.execute("DELETE FROM players WHERE player_id = 'p2'")
+        await buffer.flush()
+        # The rest of the batch was put back for the next flush
+        assert buffer.has_pending("s1")
+        await buffer.flush()
+        return {p["pseudo"]: p["score"] for p in await storage.list_players("s1")}
+
+    assert asyncio.run(run()) == {"alice": 1}
+    assert not buffer.has_pending("s1")
+    storage.close()
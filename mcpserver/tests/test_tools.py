@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+from session_cache import SessionCache  # noqa: E402
+from storage import MemoryStorage  # noqa: E402
+from tools import register_tools  # noqa: E402
+
+QUESTIONS = [
+    {"id": "q0", "question": "First?", "options": ["a", "b", "c", "d"], "correct": 0},
+    {"id": "q1", "question": "Second?", "options": ["a", "b", "c", "d"], "correct": 2},
+]
+
+
+@pytest.fixture
+def server():
+    storage = MemoryStorage()
+    # Far longer than the test: a cached session never expires on its own
+    session_cache = SessionCache(lambda: storage, ttl=3600)
+    mcp = FastMCP("test")
+    register_tools(mcp, lambda: storage, session_cache=session_cache)
+    return mcp, storage
+
+
+async def call(mcp, name, **arguments):
+    result = await mcp.call_tool(name, arguments)
+    content = result[0] if isinstance(result, tuple) else result
+    return content[0].text
+
+
+async def start_quiz(mcp, storage, pseudos):
+    await storage.set_session("s1", {"questions": QUESTIONS, "current_question": 0})
+    for pseudo in pseudos:
+        await call(mcp, "add_player", session_id="s1", player_pseudo=pseudo)
+    # Cache question 0, then advance outside this server
+    assert json.loads(await call(mcp, "get_next_question", session_id="s1"))["question_id"] == "q0"
+    await storage.update_session("s1", {"current_question": 1})
+
+
+def test_submit_answer_scores_the_question_advanced_outside_the_cache(server):
+    mcp, storage = server
+
+    async def run():
+        await start_quiz(mcp, storage, ["alice"])
+        stale = json.loads(await call(mcp, "submit_answer", session_id="s1", player_pseudo="alice", answer_index=0))
+        fresh = json.loads(await call(mcp, "submit_answer", session_id="s1", player_pseudo="alice", answer_index=2))
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+
+    assert stale["question_id"] == "q1" and not stale["correct"] and stale["new_score"] == 0
+    assert fresh["question_id"] == "q1" and fresh["correct"] and fresh["new_score"] == 1
+
+
+def test_submit_answers_scores_the_question_advanced_outside_the_cache(server):
+    mcp, storage = server
+
+    async def run():
+        await start_quiz(mcp, storage, ["alice", "bob"])
+        reply = await call(mcp, "submit_answers", session_id="s1", answers={"alice": 0, "bob": 2})
+        return json.loads(reply)["results"], await storage.list_players("s1")
+
+    results, players = asyncio.run(run())
+
+    assert {r["player_pseudo"]: (r["question_id"], r["correct"]) for r in results} == {
+        "alice": ("q1", False), "bob": ("q1", True),
+    }
+    assert {p["pseudo"]: p["score"] for p in players} == {"alice": 0, "bob": 1}
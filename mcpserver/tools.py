@@ -2,6 +2,7 @@
 MCP Tools for Session Management and Quiz
 """
 
+import asyncio
 import json
 import uuid
 import random
@@ -9,74 +10,82 @@ from mcp.server.fastmcp import FastMCP
 from pydantic import Field
 from typing import Dict, List, Optional
 
+from answer_buffer import SubmitRejected
+from metrics import timed_tool
+from session_cache import SessionCache
+from storage import SERVER_TIMESTAMP
 
-def register_tools(mcp: FastMCP, db_getter):
-    """Register all MCP tools with lazy database loading"""
+# Largest list accepted by the batch tools
+MAX_BATCH_SIZE = 500
+
+
+def register_tools(mcp: FastMCP, storage_getter, answer_buffer=None, session_cache=None, event_bus=None):
+    """
+    Register all MCP tools with lazy storage loading.
+    With an `answer_buffer`, submit_answer is acknowledged from memory and scores are written behind.
+    With a `session_cache`, read tools are served from memory until this server writes to the
+    session or the cache's staleness bound passes.
+    With an `event_bus`, the changes the tools write are announced to the other instances.
+    Every tool call is timed into the `mcp_tool_duration_seconds` histogram.
+    """
+    if session_cache is None:
+        # A zero staleness bound makes every read go to storage
+        session_cache = SessionCache(storage_getter, ttl=0)
+    
+    def announce(session_id: str, event: str, data: Optional[dict] = None):
+        if event_bus is not None:
+            event_bus.publish(session_id, event, data)
+    
+    def unchanged(version: Optional[str], if_version: Optional[str]) -> Optional[str]:
+        """Tiny payload for a conditional read whose version still matches, else None"""
+        if if_version and if_version == version:
+            return json.dumps({"unchanged": True, "version": if_version})
+        return None
+    
     
     @mcp.tool(
         title="Add Player to Session",
         description="Add a player to a session with their pseudo and score in the database",
     )
+    @timed_tool
     async def add_player(
         session_id: str = Field(description="The ID of the session to add the player to"),
         player_pseudo: str = Field(description="The pseudo/username of the player to add")
     ) -> str:
         """Add a player to a session in the database"""
         try:
-            # Get database client lazily
-            db = db_getter()
-            # Create a reference to the session document
-            session_ref = db.collection('quiz_sessions').document(session_id)
-            
-            # Get the current session data
-            session_doc = session_ref.get()
-            print(session_doc)
-            
-            # Initialize session_data with default values
-            session_data = {
-                'players': []
-            }
+            # Get storage lazily
+            storage = storage_getter()
             
-            if session_doc.exists:
-                session_data = session_doc.to_dict()
+            # Make sure the session document exists, stamping its creation time
+            if await storage.create_session_if_missing(session_id, {'created_at': SERVER_TIMESTAMP}):
+                session_cache.invalidate(session_id)
+                announce(session_id, "session_changed")
             
-            # Add the new player to the players list  
+            # Add the new player as its own record; the pseudo check is atomic in storage
             new_player = {
+                'player_id': str(uuid.uuid4())[:8],
                 'pseudo': player_pseudo,
                 'score': 0  # Initialize score to 0
             }
+            player, created = await storage.add_player(session_id, new_player)
+            if created:
+                session_cache.add_players(session_id, [player])
+                announce(session_id, "player_joined", {
+                    "players": [{"player_id": player['player_id'], "pseudo": player_pseudo}]
+                })
             
-            # Check if player already exists in this session
-            players = session_data.get('players', [])
-            existing_player = next((player for player in players if player.get('pseudo') == player_pseudo), None)
-            
-            if existing_player:
+            if not created:
                 result = {
                     "player_pseudo": player_pseudo,
                     "session_id": session_id,
-                    "score": existing_player.get('score', 0),
+                    "score": player.get('score', 0),
                     "message": f"Player '{player_pseudo}' already exists in session '{session_id}'",
                     "already_exists": True
                 }
                 return json.dumps(result, indent=2)
             
-            # Generate player_id for the new player
-            player_id = str(uuid.uuid4())[:8]
-            new_player['player_id'] = player_id
-            
-            # Add the new player
-            players.append(new_player)
-            session_data['players'] = players
-            
-            # Update the session document
-            if not session_doc.exists:
-                # For new sessions, use update with timestamp
-                from firebase_admin import firestore
-                session_ref.set(session_data)
-                session_ref.update({'created_at': firestore.SERVER_TIMESTAMP})
-            else:
-                # For existing sessions, just merge
-                session_ref.set(session_data, merge=True)
+            player_id = player['player_id']
             
             result = {
                 "player_id": player_id,
@@ -92,28 +101,103 @@ def register_tools(mcp: FastMCP, db_getter):
         except Exception as e:
             return f"Error adding player to session: {str(e)}"
 
+    @mcp.tool(
+        title="Add Players to Session",
+        description="Add several players to a session in one call; reports the result for each pseudo",
+    )
+    @timed_tool
+    async def add_players(
+        session_id: str = Field(description="The ID of the session to add the players to"),
+        player_pseudos: List[str] = Field(description=f"The pseudos of the players to add (at most {MAX_BATCH_SIZE})")
+    ) -> str:
+        """Add many players to a session in one storage transaction"""
+        try:
+            if len(player_pseudos) > MAX_BATCH_SIZE:
+                return f"Too many players: at most {MAX_BATCH_SIZE} per call"
+            
+            storage = storage_getter()
+            if await storage.create_session_if_missing(session_id, {'created_at': SERVER_TIMESTAMP}):
+                session_cache.invalidate(session_id)
+                announce(session_id, "session_changed")
+            
+            # Duplicates within the batch resolve to the first one's record
+            new_players = [
+                {'player_id': str(uuid.uuid4())[:8], 'pseudo': pseudo, 'score': 0}
+                for pseudo in dict.fromkeys(player_pseudos)
+            ]
+            stored = {
+                player['pseudo']: (player, created)
+                for player, created in await storage.add_players(session_id, new_players)
+            }
+            
+            joined = [
+                {"player_id": player['player_id'], "pseudo": pseudo}
+                for pseudo, (player, created) in stored.items() if created
+            ]
+            if joined:
+                session_cache.add_players(session_id, joined)
+                announce(session_id, "player_joined", {"players": joined})
+            
+            results = []
+            seen = set()
+            for pseudo in player_pseudos:
+                player, created = stored[pseudo]
+                created = created and pseudo not in seen
+                seen.add(pseudo)
+                results.append({
+                    "player_pseudo": pseudo,
+                    "player_id": player['player_id'],
+                    "score": player.get('score', 0),
+                    "already_exists": not created
+                })
+            
+            return json.dumps({
+                "session_id": session_id,
+                "added": len(joined),
+                "already_existing": len(results) - len(joined),
+                "players": results
+            }, indent=2)
+            
+        except Exception as e:
+            return f"Error adding players to session: {str(e)}"
+
     @mcp.tool(
         title="Get Next Question",
         description="Get the next question for a quiz session",
     )
+    @timed_tool
     async def get_next_question(
-        session_id: str = Field(description="The ID of the quiz session")
+        session_id: str = Field(description="The ID of the quiz session"),
+        if_version: Optional[str] = Field(
+            default=None,
+            description="The 'version' returned by a previous call; if the session has not changed since, a short 'unchanged' reply is returned instead"
+        )
     ) -> str:
         """Get the next question from the quiz session"""
         try:
-            # Get database client lazily
-            db = db_getter()
-            # Get the session from Firestore
-            session_ref = db.collection('quiz_sessions').document(session_id)
-            session_doc = session_ref.get()
+            # Served from the session cache; storage is only read on a miss
+            session_data = await session_cache.get_session(session_id)
             
-            if not session_doc.exists:
+            if session_data is None:
                 return f"Session '{session_id}' not found"
             
-            session_data = session_doc.to_dict()
+            # The question did not move since the caller's version: skip building and serializing the reply
+            version = session_cache.question_etag(session_id)
+            not_modified = unchanged(version, if_version)
+            if not_modified is not None:
+                return not_modified
+            
             questions = session_data.get('questions', [])
             current_question_index = session_data.get('current_question', 0)
             
+            # Questions may still be generating (or streaming in) for sessions created on an unseen theme
+            pending = session_data.get('status') == 'pending'
+            if pending and current_question_index >= len(questions):
+                return json.dumps({
+                    "pending": True,
+                    "message": "Questions for this session are still being generated. Try again in a few seconds."
+                }, indent=2)
+            
             # Check if session has questions
             if not questions:
                 return json.dumps({
@@ -121,28 +205,11 @@ def register_tools(mcp: FastMCP, db_getter):
                     "message": "This session has no questions configured. Please create the session via the backend API first."
                 }, indent=2)
             
-            # Check if there are more questions available
+            # Replies were serialized (without the correct answer) when the questions were loaded
+            payloads = session_cache.payloads(session_id, session_data)
             if current_question_index >= len(questions):
-                return json.dumps({
-                    "finished": True,
-                    "message": "Quiz finished - no more questions available",
-                    "total_questions": len(questions),
-                    "current_question": current_question_index + 1
-                }, indent=2)
-            
-            # Get the current question
-            current_question = questions[current_question_index]
-            
-            # Format the response (without the correct answer)
-            question_data = {
-                "question_id": current_question.get('id'),
-                "question_text": current_question.get('question'),
-                "options": current_question.get('options', []),
-                "question_number": current_question_index + 1,
-                "total_questions": len(questions)
-            }
-            
-            return json.dumps(question_data, indent=2)
+                return payloads.finished(current_question_index, version)
+            return payloads.question(current_question_index, version)
             
         except Exception as e:
             return f"Error getting next question: {str(e)}"
@@ -151,6 +218,7 @@ def register_tools(mcp: FastMCP, db_getter):
         title="Submit Answer",
         description="Submit answer, validate it, and update score in one operation for the current user",
     )
+    @timed_tool
     async def submit_answer(
         session_id: str = Field(description="The ID of the quiz session"),
         player_pseudo: str = Field(description="The pseudo/playername of the player"),
@@ -158,44 +226,45 @@ def register_tools(mcp: FastMCP, db_getter):
     ) -> str:
         """Submit answer, validate, and update score atomically"""
         try:
-            # Get database client lazily
-            db = db_getter()
-            session_ref = db.collection('quiz_sessions').document(session_id)
-            session_doc = session_ref.get()
+            if answer_buffer is not None:
+                # Scored against the cached question, written to storage in the next batch
+                try:
+                    result = await answer_buffer.submit(session_id, player_pseudo, answer_index)
+                except SubmitRejected as e:
+                    return str(e)
+                return json.dumps(result, indent=2)
+            
+            # Get storage lazily; the session and the player are read concurrently. Read past the
+            # session cache: a cached question may already have been advanced
+            storage = storage_getter()
+            session_data, player = await asyncio.gather(storage.get_session(session_id),
+                                                        storage.find_player(session_id, player_pseudo))
             
-            if not session_doc.exists:
+            if session_data is None:
                 return f"Session '{session_id}' not found"
             
-            session_data = session_doc.to_dict()
             questions = session_data.get('questions', [])
             current_question_index = session_data.get('current_question', 0)
-            players = session_data.get('players', [])
             
             # Check if question exists
             if current_question_index >= len(questions):
+                if session_data.get('status') == 'pending':
+                    return "Question not generated yet - try again in a few seconds"
                 return "Quiz finished - no active question"
             
             current_question = questions[current_question_index]
             correct_answer = current_question.get('correct')
             is_correct = answer_index == correct_answer
             
-            # Find and update player score
-            player_found = False
-            new_score = 0
-            for player in players:
-                if player.get('pseudo') == player_pseudo:
-                    if is_correct:
-                        player['score'] = player.get('score', 0) + 1
-                    new_score = player.get('score', 0)
-                    player_found = True
-                    break
-            
-            if not player_found:
+            if player is None:
                 return f"User '{player_pseudo}' not found in session '{session_id}'"
             
-            # Update session document
-            session_data['players'] = players
-            session_ref.set(session_data, merge=True)
+            # Constant-size atomic increment of this player's score only
+            new_score = player.get('score', 0)
+            if is_correct:
+                new_score = await storage.increment_score(session_id, player['player_id'], 1)
+                session_cache.apply_increments(session_id, {player['player_id']: 1})
+                announce(session_id, "scores_changed", {"increments": {player['player_id']: 1}})
             
             result = {
                 "correct": is_correct,
@@ -211,47 +280,155 @@ def register_tools(mcp: FastMCP, db_getter):
         except Exception as e:
             return f"Error submitting answer: {str(e)}"
 
+    @mcp.tool(
+        title="Submit Answers",
+        description="Submit the answers of several players to the current question in one call; reports the result for each player",
+    )
+    @timed_tool
+    async def submit_answers(
+        session_id: str = Field(description="The ID of the quiz session"),
+        answers: Dict[str, int] = Field(
+            description=f"The selected answer index (0-3) of each player, keyed by pseudo (at most {MAX_BATCH_SIZE})"
+        )
+    ) -> str:
+        """Submit many answers, validated against one session read and scored in one batched write"""
+        try:
+            if len(answers) > MAX_BATCH_SIZE:
+                return f"Too many answers: at most {MAX_BATCH_SIZE} per call"
+            
+            if answer_buffer is not None:
+                try:
+                    outcomes = await answer_buffer.submit_many(session_id, answers)
+                except SubmitRejected as e:
+                    return str(e)
+                results = [
+                    {"player_pseudo": pseudo, "error": str(outcome)} if isinstance(outcome, SubmitRejected) else outcome
+                    for pseudo, outcome in zip(answers, outcomes)
+                ]
+                return json.dumps({"session_id": session_id, "results": results}, indent=2)
+            
+            # The session and the roster are read concurrently, past the session cache
+            storage = storage_getter()
+            session_data, roster = await asyncio.gather(storage.get_session(session_id),
+                                                        storage.list_players(session_id))
+            
+            if session_data is None:
+                return f"Session '{session_id}' not found"
+            
+            questions = session_data.get('questions', [])
+            current_question_index = session_data.get('current_question', 0)
+            
+            if current_question_index >= len(questions):
+                if session_data.get('status') == 'pending':
+                    return "Question not generated yet - try again in a few seconds"
+                return "Quiz finished - no active question"
+            
+            current_question = questions[current_question_index]
+            correct_answer = current_question.get('correct')
+            
+            # One read of the roster, one batched write of the points
+            players = {player['pseudo']: player for player in roster}
+            increments = {}
+            for pseudo, answer_index in answers.items():
+                player = players.get(pseudo)
+                if player is not None and answer_index == correct_answer:
+                    increments[player['player_id']] = 1
+            if increments:
+                await storage.apply_score_increments(session_id, increments)
+                session_cache.apply_increments(session_id, increments)
+                announce(session_id, "scores_changed", {"increments": increments})
+            
+            results = []
+            for pseudo, answer_index in answers.items():
+                player = players.get(pseudo)
+                if player is None:
+                    results.append({
+                        "player_pseudo": pseudo,
+                        "error": f"User '{pseudo}' not found in session '{session_id}'"
+                    })
+                    continue
+                results.append({
+                    "correct": answer_index == correct_answer,
+                    "correct_answer_index": correct_answer,
+                    "submitted_answer_index": answer_index,
+                    "player_pseudo": pseudo,
+                    "new_score": player.get('score', 0) + increments.get(player['player_id'], 0),
+                    "question_id": current_question.get('id')
+                })
+            
+            return json.dumps({"session_id": session_id, "results": results}, indent=2)
+            
+        except Exception as e:
+            return f"Error submitting answers: {str(e)}"
+
     @mcp.tool(
         title="Get Live Scores",
-        description="Get the current scoreboard for a quiz session for all players",
+        description="Get the current scoreboard for a quiz session: all players, the top players, or the players around one player",
     )
+    @timed_tool
     async def get_scores(
-        session_id: str = Field(description="The ID of the quiz session")
+        session_id: str = Field(description="The ID of the quiz session"),
+        if_version: Optional[str] = Field(
+            default=None,
+            description="The 'version' returned by a previous call with the same arguments; if the scores have not changed since, a short 'unchanged' reply is returned instead"
+        ),
+        limit: Optional[int] = Field(
+            default=None,
+            description="Return only this many players: the top ones, or the page around 'around_player' (10 if omitted there)"
+        ),
+        around_player: Optional[str] = Field(
+            default=None,
+            description="Pseudo of a player; return their rank and the players ranked around them"
+        )
     ) -> str:
         """Get live scoreboard for the session"""
         try:
-            # Get database client lazily
-            db = db_getter()
-            session_ref = db.collection('quiz_sessions').document(session_id)
-            session_doc = session_ref.get()
+            # Write buffered answers first so the scoreboard includes them
+            if answer_buffer is not None and answer_buffer.has_pending(session_id):
+                await answer_buffer.flush(session_id)
             
-            if not session_doc.exists:
+            # Served from the session cache; storage is only read on a miss
+            session_data = await session_cache.get_session(session_id)
+            
+            if session_data is None:
                 return f"Session '{session_id}' not found"
             
-            session_data = session_doc.to_dict()
-            players = session_data.get('players', [])
-            current_question = session_data.get('current_question', 0)
-            total_questions = len(session_data.get('questions', []))
+            # Kept ordered by the cache: only players whose score moved are repositioned
+            leaderboard = await session_cache.get_leaderboard(session_id)
             
-            # Build and sort scoreboard
-            scores = []
-            for player in players:
-                scores.append({
-                    "pseudo": player.get('pseudo'),
-                    "score": player.get('score', 0)
-                })
+            # Nothing moved since the caller's version: skip building and serializing the scoreboard
+            version = session_cache.scores_etag(session_id)
+            not_modified = unchanged(version, if_version)
+            if not_modified is not None:
+                return not_modified
             
-            # Sort by score (highest first)
-            scores.sort(key=lambda x: x["score"], reverse=True)
+            current_question = session_data.get('current_question', 0)
+            total_questions = len(session_data.get('questions', []))
             
-            result = {
-                "scores": scores,
+            result = {}
+            if around_player is not None:
+                player_id = leaderboard.player_id(around_player)
+                if player_id is None:
+                    return f"User '{around_player}' not found in session '{session_id}'"
+                entries = leaderboard.around(player_id, limit or 10)
+                result["player_pseudo"] = around_player
+                result["player_rank"] = leaderboard.rank(player_id)
+            else:
+                entries = leaderboard.top(limit)
+            
+            result.update({
+                "scores": [
+                    {"rank": entry["rank"], "pseudo": entry["pseudo"], "score": entry["score"]}
+                    for entry in entries
+                ],
+                "total_players": len(leaderboard),
                 "current_question": current_question + 1,
                 "total_questions": total_questions,
-                "session_id": session_id
-            }
+                "session_id": session_id,
+                "version": version
+            })
             
             return json.dumps(result, indent=2)
             
         except Exception as e:
-            return f"Error getting scores: {str(e)}"
\ No newline at end of file
+            return f"Error getting scores: {str(e)}"